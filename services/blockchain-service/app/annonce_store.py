@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BOOKING_ANNONCE_DB_PATH = str(Path(__file__).parent.parent / "data" / "booking_annonces.sqlite3")
+
+# Nombre maximum de variables par requête SQLite (limite basse des anciennes versions)
+_SQLITE_MAX_VARS = 900
+
+
+class BookingAnnonceStore:
+    """
+    Mapping persistant frontend_id (réservation ou échange) → annonceId.
+    Cette information n'existe pas on-chain: contrairement à l'IndexStore, ce fichier
+    ne doit pas être supprimé. Un cache LRU borné évite de relire SQLite à chaque requête.
+    S'utilise comme un dict (get, [], in) pour rester compatible avec l'ancien BOOKING_ANNONCE_MAP.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv("BOOKING_ANNONCE_DB_PATH", DEFAULT_BOOKING_ANNONCE_DB_PATH)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS booking_annonces (
+                    frontend_id TEXT PRIMARY KEY,
+                    annonce_id TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+
+        # Le mapping ne change jamais une fois écrit: TTL long, seule la taille borne le cache
+        self._cache = TTLCache.from_env("booking_annonce", max_size=10000, ttl=24 * 3600)
+
+        logger.info(f"✅ [ANNONCES] Mapping réservation → annonce ouvert: {self.db_path}")
+
+    def set(self, frontend_id: str, annonce_id: str) -> None:
+        self.set_many({frontend_id: annonce_id})
+
+    def set_many(self, mapping: Dict[str, str]) -> None:
+        rows = [(str(frontend_id), str(annonce_id)) for frontend_id, annonce_id in mapping.items() if frontend_id and annonce_id]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO booking_annonces (frontend_id, annonce_id) VALUES (?, ?)",
+                rows
+            )
+        for frontend_id, annonce_id in rows:
+            self._cache.set(frontend_id, annonce_id)
+
+    def get(self, frontend_id: Optional[str], default: Optional[str] = None) -> Optional[str]:
+        if not frontend_id:
+            return default
+        return self.get_many([frontend_id]).get(frontend_id, default)
+
+    def get_many(self, frontend_ids: Iterable[Optional[str]]) -> Dict[str, str]:
+        """Lecture groupée: cache d'abord, puis une requête SQLite pour les ids manquants"""
+        result = {}
+        missing = []
+        for frontend_id in dict.fromkeys(frontend_ids):
+            if not frontend_id:
+                continue
+            annonce_id = self._cache.get(frontend_id)
+            if annonce_id is not None:
+                result[frontend_id] = annonce_id
+            else:
+                missing.append(frontend_id)
+
+        for start in range(0, len(missing), _SQLITE_MAX_VARS):
+            chunk = missing[start:start + _SQLITE_MAX_VARS]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT frontend_id, annonce_id FROM booking_annonces WHERE frontend_id IN ({placeholders})",
+                    chunk
+                ).fetchall()
+            for frontend_id, annonce_id in rows:
+                result[frontend_id] = annonce_id
+                self._cache.set(frontend_id, annonce_id)
+
+        return result
+
+    def __getitem__(self, frontend_id: str) -> str:
+        annonce_id = self.get(frontend_id)
+        if annonce_id is None:
+            raise KeyError(frontend_id)
+        return annonce_id
+
+    def __setitem__(self, frontend_id: str, annonce_id: str) -> None:
+        self.set(frontend_id, annonce_id)
+
+    def __contains__(self, frontend_id: str) -> bool:
+        return self.get(frontend_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM booking_annonces").fetchone()[0]
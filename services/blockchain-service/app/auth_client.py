@@ -0,0 +1,184 @@
+import os
+import asyncio
+import threading
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .concurrency import gather_bounded
+
+logger = logging.getLogger(__name__)
+
+AUTH_POOL_SIZE = int(os.getenv("AUTH_POOL_SIZE", "50"))
+AUTH_DEFAULT_TIMEOUT = float(os.getenv("AUTH_TIMEOUT", "5"))
+
+# Timeouts par endpoint (préfixe du chemin → secondes): les lectures d'utilisateurs
+# doivent échouer vite, les écritures (reviews, notes) peuvent prendre plus de temps
+AUTH_ENDPOINT_TIMEOUTS = {
+    "/health": float(os.getenv("AUTH_TIMEOUT_HEALTH", "2")),
+    "/api/users": float(os.getenv("AUTH_TIMEOUT_USERS", "3")),
+    "/api/profile": float(os.getenv("AUTH_TIMEOUT_PROFILE", "3")),
+    "/api/annonces": float(os.getenv("AUTH_TIMEOUT_ANNONCES", "3")),
+    "/api/reviews": float(os.getenv("AUTH_TIMEOUT_REVIEWS", "5")),
+}
+
+
+class _LeaderCancelled(Exception):
+    """Le porteur d'une requête coalescée a été annulé: les appelants en attente la relancent"""
+
+
+class AuthServiceClient:
+    """
+    Client unique vers l'auth-service:
+    - pool de connexions keep-alive (httpx pour les handlers, requests.Session pour le code synchrone)
+    - timeout choisi selon l'endpoint
+    - single-flight: N requêtes GET identiques simultanées = 1 seul appel réseau
+    """
+
+    def __init__(self, base_url: str = None):
+        self.base_url = (base_url or os.getenv("AUTH_SERVICE_URL", "http://localhost:3001")).rstrip("/")
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=AUTH_DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=AUTH_POOL_SIZE,
+                max_keepalive_connections=AUTH_POOL_SIZE
+            )
+        )
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=AUTH_POOL_SIZE, pool_maxsize=AUTH_POOL_SIZE)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._inflight_sync: Dict[Tuple, Dict] = {}
+        self._inflight_sync_lock = threading.Lock()
+
+    def timeout_for(self, path: str) -> float:
+        """Timeout de l'endpoint (préfixe le plus long qui correspond)"""
+        matches = [prefix for prefix in AUTH_ENDPOINT_TIMEOUTS if path.startswith(prefix)]
+        if not matches:
+            return AUTH_DEFAULT_TIMEOUT
+        return AUTH_ENDPOINT_TIMEOUTS[max(matches, key=len)]
+
+    @staticmethod
+    def _key(path: str, params: Optional[Dict], headers: Optional[Dict]) -> Tuple:
+        # L'en-tête Authorization fait partie de la clé: on ne partage jamais
+        # une réponse entre deux utilisateurs différents
+        authorization = (headers or {}).get("Authorization")
+        return (path, tuple(sorted((params or {}).items())), authorization)
+
+    # ============ ASYNC (handlers FastAPI) ============
+
+    async def get(self, path: str, headers: Dict = None, params: Dict = None, timeout: float = None) -> httpx.Response:
+        """GET coalescé: les appelants concurrents d'une même URL partagent la même réponse"""
+        key = self._key(path, params, headers)
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                # L'appelant qui portait la requête a été annulé, pas nous: l'un des
+                # appelants en attente la relance (le premier redevient porteur)
+                return await self.get(path, headers=headers, params=params, timeout=timeout)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._client.get(
+                path,
+                headers=headers,
+                params=params,
+                timeout=timeout or self.timeout_for(path)
+            )
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            # Annulation du porteur: ne pas annuler les autres appelants, ils relancent la requête
+            future.set_exception(e if isinstance(e, Exception) else _LeaderCancelled())
+            # Marquer l'exception comme récupérée si aucun autre appelant n'attendait
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def post(self, path: str, headers: Dict = None, json: Dict = None, timeout: float = None) -> httpx.Response:
+        """POST (jamais coalescé)"""
+        return await self._client.post(
+            path,
+            headers=headers,
+            json=json,
+            timeout=timeout or self.timeout_for(path)
+        )
+
+    async def get_user(self, user_id: str, authorization: Optional[str] = None) -> Optional[Dict]:
+        """Données d'un utilisateur (/api/users/{id}), None si introuvable"""
+        headers = {"Authorization": authorization} if authorization else None
+        response = await self.get(f"/api/users/{user_id}", headers=headers)
+        if response.status_code != 200:
+            return None
+        return response.json().get("data")
+
+    async def get_annonce(self, annonce_id: str, authorization: Optional[str] = None) -> Optional[Dict]:
+        """Données d'une annonce (/api/annonces/{id}), None si introuvable"""
+        headers = {"Authorization": authorization} if authorization else None
+        response = await self.get(f"/api/annonces/{annonce_id}", headers=headers)
+        if response.status_code != 200:
+            return None
+        return response.json().get("data")
+
+    async def get_users_many(self, user_ids: Iterable[str], authorization: Optional[str] = None) -> Dict[str, Optional[Dict]]:
+        """Résout une liste d'ids utilisateurs (dédoublonnés, fan-out borné) → {id: données}"""
+        return await gather_bounded(lambda user_id: self.get_user(user_id, authorization), user_ids)
+
+    async def get_annonces_many(self, annonce_ids: Iterable[str], authorization: Optional[str] = None) -> Dict[str, Optional[Dict]]:
+        """Résout une liste d'ids d'annonces (dédoublonnés, fan-out borné) → {id: données}"""
+        return await gather_bounded(lambda annonce_id: self.get_annonce(annonce_id, authorization), annonce_ids)
+
+    # ============ SYNC (code exécuté dans le pool de threads) ============
+
+    def get_sync(self, path: str, headers: Dict = None, params: Dict = None, timeout: float = None) -> requests.Response:
+        """Équivalent synchrone de get(), coalescé entre threads"""
+        key = self._key(path, params, headers)
+
+        with self._inflight_sync_lock:
+            call = self._inflight_sync.get(key)
+            leader = call is None
+            if leader:
+                call = {"event": threading.Event(), "response": None, "error": None}
+                self._inflight_sync[key] = call
+
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["response"]
+
+        try:
+            call["response"] = self._session.get(
+                f"{self.base_url}{path}",
+                headers=headers,
+                params=params,
+                timeout=timeout or self.timeout_for(path)
+            )
+            return call["response"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._inflight_sync_lock:
+                self._inflight_sync.pop(key, None)
+            call["event"].set()
+
+    async def aclose(self):
+        await self._client.aclose()
+        self._session.close()
+        logger.info("🛑 [AUTH] Connexions vers l'auth-service fermées")
+
+
+# Instance globale
+auth_client = AuthServiceClient()
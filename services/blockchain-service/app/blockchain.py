@@ -1,49 +1,89 @@
-from web3 import Web3, HTTPProvider
+from web3 import Web3, HTTPProvider, AsyncWeb3, AsyncHTTPProvider
 from web3.middleware import ExtraDataToPOAMiddleware
+from web3.logs import DISCARD
 from eth_account import Account
 from eth_account.messages import encode_defunct
-import hashlib
-import hmac
+from eth_utils.abi import get_abi_output_types
+from hexbytes import HexBytes
+import multiprocessing
 import os
 import uuid
 import time
 import json
 from typing import Dict, List, Optional, Tuple, Any
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import logging
-import requests
 from datetime import datetime
 
+from .indexer import EventIndexer
+from .concurrency import run_blocking
+from .auth_client import auth_client
+from .cache import TTLCache
+from .wallet_derivation import derive_wallet
+from .nonce_manager import NonceManager
+from .tx_queue import TransactionQueue
+from .gas_station import GasStation, GasTopUpPending
+from .wallet_init_store import WalletInitStore
+
 logger = logging.getLogger(__name__)
 
 class DeterministicWalletGenerator:
-    """Génère des wallets Ethereum déterministes depuis un userId"""
+    """
+    Génère des wallets Ethereum déterministes depuis un userId
+    ⚡ Mémoïsé: la dérivation (HMAC + multiplication secp256k1) n'est faite qu'une fois par userId
+    """
+    
+    # En dessous de ce nombre de wallets à dériver, un pool de processus coûte plus qu'il ne rapporte
+    PROCESS_POOL_THRESHOLD = 64
     
     def __init__(self, master_secret: str = "edumate-blockchain-master-secret-2024"):
         self.master_secret = master_secret.encode()
+        # Cache local uniquement (jamais partagé via Redis: il contient des clés privées)
+        self._memo = TTLCache.from_env("wallet_derivation", max_size=20000, ttl=24 * 3600)
     
     def get_wallet_for_user(self, user_id: str) -> Tuple[str, str]:
         """
         Génère une paire de clés déterministe pour un userId
-        Retourne (private_key, address)
+        Retourne (private_key, address) - adresse au format checksum
         """
-        # HMAC-SHA256 pour garantir la déterminisme
-        seed = hmac.new(
-            self.master_secret,
-            user_id.encode('utf-8'),
-            hashlib.sha256
-        ).digest()
-        
-        # La seed devient la clé privée
-        private_key = "0x" + seed.hex()
-        
-        # Créer le compte
-        account = Account.from_key(private_key)
-        
-        return private_key, account.address
+        wallet = self._memo.get(user_id)
+        if wallet is None:
+            wallet = derive_wallet(self.master_secret, user_id)
+            self._memo.set(user_id, wallet)
+        return wallet
+    
+    def derive_many(self, user_ids: List[str], max_workers: Optional[int] = None) -> Dict[str, Tuple[str, str]]:
+        """
+        Dérive (et mémoïse) les wallets d'une liste d'utilisateurs.
+        Au-delà de PROCESS_POOL_THRESHOLD wallets manquants, la dérivation est répartie
+        sur un pool de processus (initialisation des wallets au démarrage).
+        """
+        wallets = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            wallet = self._memo.get(user_id)
+            if wallet is None:
+                missing.append(user_id)
+            else:
+                wallets[user_id] = wallet
+        
+        if len(missing) >= self.PROCESS_POOL_THRESHOLD:
+            # spawn: pas de fork d'un processus qui contient déjà des threads (uvicorn, indexeur)
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                derived = pool.map(derive_wallet, [self.master_secret] * len(missing), missing, chunksize=32)
+                derived = list(derived)
+        else:
+            derived = [derive_wallet(self.master_secret, user_id) for user_id in missing]
+        
+        for user_id, wallet in zip(missing, derived):
+            self._memo.set(user_id, wallet)
+            wallets[user_id] = wallet
+        
+        return wallets
 
 
 class BlockchainManager:
-    """Gestionnaire de la blockchain - Zéro stockage local"""
+    """Gestionnaire de la blockchain - source de vérité on-chain (seul un index reconstructible est stocké localement)"""
     
     def __init__(self, auth_service_url: str = None):
         # Utiliser la variable d'environnement WEB3_PROVIDER_URL (définie en Docker)
@@ -55,6 +95,10 @@ class BlockchainManager:
             raise ConnectionError(f"Impossible de se connecter à Ganache sur {web3_provider}")
         
         self.w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+        
+        # ⚡ Client web3 asynchrone pour les lectures faites directement depuis les handlers FastAPI
+        self.async_w3 = AsyncWeb3(AsyncHTTPProvider(web3_provider))
+        self.async_w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
         # Utiliser AUTH_SERVICE_URL de l'environnement, ou le paramètre, ou default local
         self.auth_service_url = auth_service_url or os.getenv("AUTH_SERVICE_URL", "http://localhost:3001")
         
@@ -64,23 +108,153 @@ class BlockchainManager:
         # Générateur de wallets déterministes
         self.wallet_generator = DeterministicWalletGenerator()
         
-        # ⚡ CACHE pour les stats (éviter recalcul à chaque appel)
-        self._stats_cache = {}
-        self._stats_cache_timestamp = {}
-        self._stats_cache_ttl = 30  # 30 secondes
+        # ⚡ Nonces suivis en mémoire par compte émetteur (plusieurs transactions en vol par compte)
+        self.nonce_manager = NonceManager(self.w3)
+        
+        # ⚡ Option: approve + createBooking envoyés à la suite (nonces consécutifs), un seul reçu attendu
+        # Désactivé par défaut: createBooking peut alors être miné derrière un approve en échec
+        self.pipeline_booking_approve = os.getenv("BOOKING_PIPELINE_APPROVE", "false").lower() == "true"
+        
+        # ⚡ Onboarding: wallets enregistrés / approvisionnés par lots (registerWalletsBatch, fundWallets)
+        # Utilisé seulement si le contrat déployé les expose (sélecteurs cherchés dans son bytecode)
+        self.onboarding_batch_size = int(os.getenv("ONBOARDING_BATCH_SIZE", "50"))
+        self._contract_code: Dict[str, bytes] = {}
         
-        # ⚡ CACHE pour l'historique des transactions
-        self._history_cache = {}
-        self._history_cache_timestamp = {}
-        self._history_cache_ttl = 15  # 15 secondes (plus court car plus dynamique)
+        # ⚡ Constantes de la chaîne: owner lu une fois, gas price gardé quelques secondes
+        self._owner_address = None
+        self._gas_price_cache = TTLCache.from_env("gas_price", max_size=1, ttl=5)
         
-        # ⚡ CACHE pour les infos wallet (éviter requêtes HTTP répétées)
-        self._wallet_info_cache = {}
-        self._wallet_info_cache_timestamp = {}
-        self._wallet_info_cache_ttl = 60  # 60 secondes (les users changent rarement de nom)
+        # ⚡ Taille des lots JSON-RPC pour les lectures en masse (batch_call)
+        self.rpc_batch_size = int(os.getenv("RPC_BATCH_SIZE", "200"))
+        
+        # Index local des événements on-chain (démarré dans le lifespan de main.py)
+        self.indexer = EventIndexer(self)
+        
+        # Progression de l'initialisation des wallets (hors de l'index reconstructible)
+        self.wallet_init_store = WalletInitStore()
+        
+        # ⚡ Écritures en mode asynchrone (?wait=false): suivi des reçus en arrière-plan
+        self.tx_queue = TransactionQueue(self)
+        
+        # ⚡ Recharges ETH des wallets en arrière-plan (abonnée à l'indexeur)
+        self.gas_station = GasStation(self)
+        
+        # ⚡ CACHES bornés (LRU + TTL), configurables via CACHE_<NOM>_MAX_SIZE / CACHE_<NOM>_TTL
+        # Stats, historique et soldes sont tagués par adresse et invalidés dès qu'une écriture
+        # du service ou un événement indexé touche cette adresse: le TTL n'est qu'un filet de sécurité
+        # shared=True: second niveau Redis commun aux workers si REDIS_URL est défini (voir cache.py)
+        self._stats_cache = TTLCache.from_env("stats", max_size=1000, ttl=600, shared=True)
+        self._history_cache = TTLCache.from_env("history", max_size=2000, ttl=600, shared=True)
+        self._balance_cache = TTLCache.from_env("balance", max_size=5000, ttl=300)
+        
+        # Infos wallet: éviter les requêtes HTTP répétées (60 secondes, les users changent rarement de nom)
+        self._wallet_info_cache = TTLCache.from_env("wallet_info", max_size=5000, ttl=60, shared=True)
+        
+        self.indexer.add_listener(self.invalidate_addresses)
+        
+        # ⚡ Enregistrements on-chain des wallets: définitifs, seuls les résultats positifs sont mis en cache
+        # (pré-remplis depuis l'index au démarrage, puis alimentés par les WalletRegistered indexés)
+        self._registered_wallets = TTLCache.from_env("wallet_registration", max_size=20000, ttl=24 * 3600)
+        self._prefill_registered_wallets()
+        self.indexer.add_wallet_listener(self._remember_registered_wallets)
+        self.indexer.add_reset_listener(self._registered_wallets.clear)
+        
+        # ⚡ En-têtes de blocs (hash, timestamp): immuables une fois le bloc final, lus en lot
+        # BLOCK_FINALITY_DEPTH = profondeur à partir de laquelle un bloc est mis en cache (0 sur Ganache)
+        self._block_headers = TTLCache.from_env("block_headers", max_size=50000, ttl=24 * 3600)
+        self.block_finality_depth = int(os.getenv("BLOCK_FINALITY_DEPTH", "0"))
+        self.indexer.add_reset_listener(self._block_headers.clear)
         
         logger.info("✅ BlockchainManager initialisé - 100% on-chain")
     
+    @property
+    def owner_address(self) -> str:
+        """Owner du token (constant pour un déploiement): un seul appel owner() par process"""
+        if self._owner_address is None:
+            self._owner_address = self.w3.to_checksum_address(self.token_contract.functions.owner().call())
+        return self._owner_address
+    
+    def contract_has_function(self, address: str, signature: str) -> bool:
+        """
+        Le contrat déployé à cette adresse expose-t-il la fonction? Le sélecteur est cherché dans
+        le dispatcher du bytecode (PUSH4 <sélecteur>), lu une fois: le code d'un contrat est immuable.
+        """
+        code = self._contract_code.get(address)
+        if code is None:
+            code = self._contract_code[address] = bytes(self.w3.eth.get_code(address))
+        return b"\x63" + bytes(Web3.keccak(text=signature)[:4]) in code
+    
+    def get_gas_price(self) -> int:
+        """Gas price du nœud, mis en cache quelques secondes au lieu d'un RPC par transaction"""
+        gas_price = self._gas_price_cache.get("gas_price")
+        if gas_price is None:
+            gas_price = self.w3.eth.gas_price
+            self._gas_price_cache.set("gas_price", gas_price)
+        return gas_price
+    
+    def invalidate_addresses(self, addresses):
+        """Invalide les caches (historique, stats, solde) des adresses touchées par une transaction"""
+        for address in addresses:
+            if not address:
+                continue
+            address = self.w3.to_checksum_address(address)
+            dropped = (
+                self._history_cache.invalidate_tag(address)
+                + self._stats_cache.invalidate_tag(address)
+                + int(self._balance_cache.delete(address))
+            )
+            if dropped:
+                logger.debug(f"🧹 [CACHE] {dropped} entrées invalidées pour {address[:8]}...")
+    
+    def _prefill_registered_wallets(self):
+        try:
+            registrations = self.indexer.store.get_registered_wallets()
+        except Exception as e:
+            logger.warning(f"⚠️ [CACHE] Pré-remplissage des wallets enregistrés impossible: {e}")
+            return
+        self._remember_registered_wallets(registrations)
+        if registrations:
+            logger.info(f"⚡ [CACHE] {len(registrations)} wallets enregistrés chargés depuis l'index")
+    
+    def _remember_registered_wallets(self, registrations: Dict[str, str]):
+        for user_id, address in registrations.items():
+            self._registered_wallets.set(user_id, address)
+    
+    def _after_write(self, *addresses):
+        """
+        Après une transaction minée: invalidation immédiate des adresses connues, puis
+        rattrapage de l'index (qui invalide aussi les autres parties via ses events)
+        """
+        self.invalidate_addresses(addresses)
+        try:
+            self.indexer.sync()
+        except Exception as e:
+            logger.warning(f"⚠️ [INDEX] Rattrapage après écriture impossible: {e}")
+    
+    def _enqueue(self, tx_hash, kind: str, addresses, meta: Dict = None) -> Dict:
+        """Mode asynchrone: le reçu et _after_write sont pris en charge par la TransactionQueue"""
+        job = self.tx_queue.track(tx_hash, kind, addresses, meta)
+        return {
+            "job_id": job["id"],
+            "transaction_hash": job["transactionHash"],
+            "status": "SUBMITTED",
+            **(meta or {})
+        }
+    
+    def _after_exchange_write(self, exchange_id: int):
+        """Invalide les caches des deux participants d'un échange de compétences, puis rattrape l'index"""
+        addresses = []
+        try:
+            exchange = self.get_skill_exchange(exchange_id)
+            addresses = [
+                self.wallet_generator.get_wallet_for_user(user_id)[1]
+                for user_id in (exchange["studentId"], exchange["tutorId"])
+                if user_id
+            ]
+        except Exception as e:
+            logger.warning(f"⚠️ [CACHE] Invalidation de l'échange {exchange_id} impossible: {e}")
+        self._after_write(*addresses)
+    
     def uuid_to_bytes32(self, uuid_str: str) -> bytes:
         """
         Convertit un UUID string (format: d755226e-bb7b-4bec-9af0-e578da8362dc)
@@ -123,6 +297,61 @@ class BlockchainManager:
         except Exception:
             return None
     
+    def batch_call(self, contract, fn_name: str, args_list: List[tuple]) -> List[Optional[Any]]:
+        """
+        Exécute la même fonction view pour plusieurs jeux d'arguments en lots JSON-RPC
+        (un aller-retour HTTP par lot de rpc_batch_size appels au lieu d'un par appel).
+        Retourne les résultats dans l'ordre de args_list, None pour un appel en échec.
+        """
+        output_types = get_abi_output_types(contract.get_function_by_name(fn_name).abi)
+        results = []
+        
+        for start in range(0, len(args_list), self.rpc_batch_size):
+            chunk = args_list[start:start + self.rpc_batch_size]
+            batch = [
+                ("eth_call", [{"to": contract.address, "data": contract.encode_abi(fn_name, args=list(args))}, "latest"])
+                for args in chunk
+            ]
+            
+            try:
+                responses = self.w3.provider.make_batch_request(batch)
+                if not isinstance(responses, list):
+                    # En cas d'erreur globale, le noeud renvoie une seule réponse
+                    raise ValueError(responses.get("error"))
+            except Exception as e:
+                logger.warning(f"⚠️ [BATCH] Lot JSON-RPC refusé ({e}), repli sur des appels unitaires")
+                for args in chunk:
+                    try:
+                        results.append(getattr(contract.functions, fn_name)(*args).call())
+                    except Exception:
+                        results.append(None)
+                continue
+            
+            for response in responses:
+                results.append(self._decode_call_result(output_types, response))
+        
+        return results
+    
+    def _decode_call_result(self, output_types: List[str], response: Dict) -> Optional[Any]:
+        """Décode la réponse d'un eth_call comme le ferait .call() (None si l'appel a échoué)"""
+        if response.get("error") or not response.get("result"):
+            return None
+        
+        data = HexBytes(response["result"])
+        if not data:
+            return None
+        
+        try:
+            values = self.w3.codec.decode(output_types, data)
+        except Exception:
+            return None
+        
+        values = [
+            self.w3.to_checksum_address(value) if output_type == "address" else value
+            for output_type, value in zip(output_types, values)
+        ]
+        return values[0] if len(values) == 1 else values
+    
     def load_contracts_from_env(self):
         """Charger les adresses des contrats depuis les variables d'environnement"""
         self.token_address = os.getenv("EDU_TOKEN_ADDRESS")
@@ -147,6 +376,10 @@ class BlockchainManager:
             {"constant": False, "inputs": [{"name": "to", "type": "address"}, {"name": "value", "type": "uint256"}], "name": "transfer", "outputs": [{"name": "", "type": "bool"}], "type": "function"},
             {"constant": False, "inputs": [{"name": "from", "type": "address"}, {"name": "to", "type": "address"}, {"name": "value", "type": "uint256"}], "name": "transferFrom", "outputs": [{"name": "", "type": "bool"}], "type": "function"},
             {"constant": False, "inputs": [{"name": "userId", "type": "bytes32"}, {"name": "walletAddress", "type": "address"}], "name": "registerWallet", "outputs": [], "type": "function"},
+            
+            # ⚡ Onboarding groupé (enregistrement + EDU initiaux, ETH pour le gas)
+            {"constant": False, "inputs": [{"name": "userIds", "type": "bytes32[]"}, {"name": "walletAddresses", "type": "address[]"}], "name": "registerWalletsBatch", "outputs": [], "type": "function"},
+            {"constant": False, "payable": True, "stateMutability": "payable", "inputs": [{"name": "wallets", "type": "address[]"}], "name": "fundWallets", "outputs": [], "type": "function"},
             {"constant": True, "inputs": [{"name": "userId", "type": "bytes32"}], "name": "getWalletAddress", "outputs": [{"name": "", "type": "address"}], "type": "function"},
             
             # ✅ AJOUT: Getter pour addressToUserId
@@ -180,7 +413,35 @@ class BlockchainManager:
             {"constant": False, "inputs": [{"name": "bookingId", "type": "uint256"}, {"name": "courseHeld", "type": "bool"}], "name": "confirmCourseOutcome", "outputs": [], "type": "function"},
             {"constant": True, "inputs": [{"name": "bookingId", "type": "uint256"}], "name": "getBooking", "outputs": [{"name": "id", "type": "uint256"}, {"name": "student", "type": "address"}, {"name": "tutor", "type": "address"}, {"name": "amount", "type": "uint256"}, {"name": "startTime", "type": "uint256"}, {"name": "duration", "type": "uint256"}, {"name": "status", "type": "uint8"}, {"name": "outcome", "type": "uint8"}, {"name": "createdAt", "type": "uint256"}, {"name": "studentConfirmed", "type": "bool"}, {"name": "tutorConfirmed", "type": "bool"}, {"name": "description", "type": "string"}, {"name": "frontendId", "type": "bytes32"}], "type": "function"},
             {"constant": True, "inputs": [{"name": "frontendId", "type": "bytes32"}], "name": "getBookingByFrontendId", "outputs": [{"name": "", "type": "uint256"}], "type": "function"},
-            {"constant": True, "inputs": [], "name": "getBookingCount", "outputs": [{"name": "", "type": "uint256"}], "type": "function"}
+            {"constant": True, "inputs": [], "name": "getBookingCount", "outputs": [{"name": "", "type": "uint256"}], "type": "function"},
+            
+            # ✅ Events du cycle de vie d'une réservation (alimentent l'index des bookings)
+            {"anonymous": False, "inputs": [
+                {"indexed": True, "name": "bookingId", "type": "uint256"},
+                {"indexed": True, "name": "frontendId", "type": "bytes32"},
+                {"indexed": True, "name": "student", "type": "address"},
+                {"indexed": False, "name": "tutor", "type": "address"},
+                {"indexed": False, "name": "amount", "type": "uint256"},
+                {"indexed": False, "name": "startTime", "type": "uint256"},
+                {"indexed": False, "name": "description", "type": "string"}
+            ], "name": "BookingCreated", "type": "event"},
+            {"anonymous": False, "inputs": [
+                {"indexed": True, "name": "bookingId", "type": "uint256"},
+                {"indexed": False, "name": "confirmedBy", "type": "address"}
+            ], "name": "BookingConfirmed", "type": "event"},
+            {"anonymous": False, "inputs": [
+                {"indexed": True, "name": "bookingId", "type": "uint256"},
+                {"indexed": False, "name": "cancelledBy", "type": "address"},
+                {"indexed": False, "name": "reason", "type": "string"}
+            ], "name": "BookingCancelled", "type": "event"},
+            {"anonymous": False, "inputs": [
+                {"indexed": True, "name": "bookingId", "type": "uint256"}
+            ], "name": "BookingCompleted", "type": "event"},
+            {"anonymous": False, "inputs": [
+                {"indexed": True, "name": "bookingId", "type": "uint256"},
+                {"indexed": False, "name": "confirmedBy", "type": "address"},
+                {"indexed": False, "name": "courseHeld", "type": "bool"}
+            ], "name": "OutcomeConfirmed", "type": "event"}
         ]
         
         self.skill_exchange_abi = [
@@ -235,407 +496,282 @@ class BlockchainManager:
             address=self.skill_exchange_address,
             abi=self.skill_exchange_abi
         )
+        
+        self.async_token_contract = self.async_w3.eth.contract(
+            address=self.token_address,
+            abi=self.token_abi
+        )
     
     def get_transaction_history(self, user_wallet_address: str, limit: int = 20, include_wallet_info: bool = True) -> List[Dict]:
+        """Les `limit` transactions les plus récentes (première page de get_transaction_history_page)"""
+        return self.get_transaction_history_page(user_wallet_address, limit, include_wallet_info)["transactions"]
+    
+    def get_transaction_history_page(self, user_wallet_address: str, limit: int = 20, include_wallet_info: bool = True,
+                                     cursor: Optional[Tuple[int, int, int, int]] = None, start_time: Optional[int] = None,
+                                     end_time: Optional[int] = None, direction: Optional[str] = None,
+                                     offset: int = 0) -> Dict:
         """
-        Récupère l'historique des transactions depuis la blockchain
-        en utilisant get_logs (méthode fiable pour Ganache)
-        Récupère DEUX types d'événements:
-        1. EduTransfer (transferts avec description)
-        2. Transfer standard (transferFrom utilisé par les bookings)
+        Récupère une page de l'historique des transactions depuis l'index des événements
+        (alimenté en continu par EventIndexer, voir indexer.py)
+        Lignes de l'historique:
+        1. Transferts (EduTransfer avec description, Transfer standard des bookings)
+        2. Ligne "entrante" tuteur de chaque paiement de réservation
+        3. Réservations dont l'utilisateur est le tuteur
+        4. Échanges de compétences
         
         Args:
             include_wallet_info: Si False, ne pas appeler _get_wallet_info_sync (gain de performance)
         
-        ⚡ OPTIMISATION: Cache de 15 secondes pour éviter les scans répétés
+        ⚡ OPTIMISATION: Cache par adresse, invalidé à chaque transaction qui la concerne
+        ⚡ Pagination par curseur et filtres (dates, direction) appliqués en SQL par l'index
+        (IndexStore.get_history_for_address): retourne {"transactions", "nextCursor", "total"}.
+        Le curseur est la clé (timestamp, bloc, logIndex, sous-clé) de la dernière ligne rendue;
+        total est compté sur les mêmes lignes. offset (numéro de page) reste proportionnel à la profondeur.
         """
         try:
             wallet_address = self.w3.to_checksum_address(user_wallet_address)
             
             # ⚡ Créer une clé de cache unique
-            cache_key = f"{wallet_address}:{limit}:{include_wallet_info}"
+            cache_key = f"{wallet_address}:{limit}:{include_wallet_info}:{cursor}:{start_time}:{end_time}:{direction}:{offset}"
             
             # ⚡ Vérifier le cache d'abord
-            now = time.time()
-            if cache_key in self._history_cache:
-                cache_age = now - self._history_cache_timestamp.get(cache_key, 0)
-                if cache_age < self._history_cache_ttl:
-                    logger.info(f"⚡ [CACHE] Historique servi depuis le cache pour {wallet_address[:8]}... (âge: {cache_age:.1f}s)")
-                    return self._history_cache[cache_key]
-            
-            logger.info(f"⏱️ [HISTORY] Scan blockchain pour {wallet_address[:8]}... (limit={limit})")
-            start_time = time.time()
-            
-            # Obtenir l'adresse du owner pour filtrer les initialisations
-            owner_address = self.token_contract.functions.owner().call()
-            
-            # Format pour les topics
-            address_hash_from = f'0x{wallet_address[2:].rjust(64, "0")}'
-            address_hash_to = address_hash_from
+            cached = self._history_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"⚡ [CACHE] Historique servi depuis le cache pour {wallet_address[:8]}...")
+                return cached
             
-            transactions = []
+            logger.info(f"⏱️ [HISTORY] Lecture de l'index pour {wallet_address[:8]}... (limit={limit})")
+            started_at = time.time()
             
-            try:
-                # ============ ÉVÉNEMENTS EduTransfer (custom avec description) ============
-                # ⚠️ Ne PAS utiliser .hex() - Ganache requiert le préfixe "0x"
-                edu_event_signature = self.w3.keccak(text="EduTransfer(address,address,uint256,string,uint256)")
-                
-                # EduTransfer où l'utilisateur est l'expéditeur
-                edu_logs_from = self.w3.eth.get_logs({
-                    'fromBlock': 0,
-                    'toBlock': 'latest',
-                    'address': self.token_address,
-                    'topics': [
-                        edu_event_signature,
-                        address_hash_from
-                    ]
-                })
-                
-                # EduTransfer où l'utilisateur est le destinataire
-                edu_logs_to = self.w3.eth.get_logs({
-                    'fromBlock': 0,
-                    'toBlock': 'latest',
-                    'address': self.token_address,
-                    'topics': [
-                        edu_event_signature,
-                        None,
-                        address_hash_to
-                    ]
-                })
-                
-                # ============ ÉVÉNEMENTS Transfer standard (ERC20) ============
-                # ⚠️ Ne PAS utiliser .hex() - Ganache requiert le préfixe "0x"
-                transfer_event_signature = self.w3.keccak(text="Transfer(address,address,uint256)")
-                
-                # Transfer où l'utilisateur est l'expéditeur
-                transfer_logs_from = self.w3.eth.get_logs({
-                    'fromBlock': 0,
-                    'toBlock': 'latest',
-                    'address': self.token_address,
-                    'topics': [
-                        transfer_event_signature,
-                        address_hash_from
-                    ]
-                })
-                
-                # Transfer où l'utilisateur est le destinataire
-                transfer_logs_to = self.w3.eth.get_logs({
-                    'fromBlock': 0,
-                    'toBlock': 'latest',
-                    'address': self.token_address,
-                    'topics': [
-                        transfer_event_signature,
-                        None,
-                        address_hash_to
-                    ]
-                })
-                
-                # Combiner tous les logs
-                all_logs = edu_logs_from + edu_logs_to + transfer_logs_from + transfer_logs_to
-                
-                # Déduplication par transactionHash
-                unique_logs = {
-                    log['transactionHash'].hex(): log
-                    for log in all_logs
-                }.values()
-                
-                # Traiter les logs
-                for log in sorted(unique_logs, key=lambda x: x['blockNumber'], reverse=True)[:limit]:
-                    try:
-                        # Récupérer les infos du block
-                        block = self.w3.eth.get_block(log['blockNumber'])
-                        
-                        # Déterminer le type d'événement
-                        # ⚠️ Comparer en bytes car edu_event_signature est maintenant en bytes
-                        is_edu_transfer = log['topics'][0] == edu_event_signature
-                        
-                        if is_edu_transfer:
-                            # Décoder EduTransfer
-                            event = self.token_contract.events.EduTransfer().process_log(log)
-                            description = event['args']['description']
-                            amount = float(self.w3.from_wei(event['args']['amount'], 'ether'))
-                        else:
-                            # Décoder Transfer standard
-                            event = self.token_contract.events.Transfer().process_log(log)
-                            amount = float(self.w3.from_wei(event['args']['value'], 'ether'))
-                            
-                            # FILTRER les transferts d'initialisation (owner → user, 600 EDU)
-                            from_address = event['args']['from']
-                            to_address = event['args']['to']
-                            if from_address == owner_address and amount == 600.0:
-                                logger.debug(f"Filtrage transfert initialisation: {amount} EDU de {from_address} vers {to_address}")
-                                continue
-                            
-                            # ⚠️ FILTRER les transferts provenant de l'escrow (déjà affichés comme bookings)
-                            # Quand les deux parties confirment leurs avis, l'escrow libère les fonds au tuteur
-                            # Ce transfert escrow→tuteur crée un événement Transfer qui apparaît en double
-                            # dans l'historique (une fois comme booking, une fois comme transfer)
-                            escrow_checksum = self.w3.to_checksum_address(self.escrow_address)
-                            if from_address == escrow_checksum:
-                                logger.debug(f"🔕 [FILTRÉ] Transfer escrow→{to_address[:10]}... (déjà affiché comme booking)")
-                                continue
-                            
-                            # Description par défaut
-                            description = "Transfert de tokens"
-                        
-                        # Enrichir les métadonnées pour les bookings
-                        metadata = {}
-                        booking_status = "completed"  # Statut par défaut
-                        
-                        if event['args']['to'] == self.escrow_address:
-                            # C'est un booking - chercher le booking correspondant
-                            try:
-                                booking_count = self.escrow_contract.functions.getBookingCount().call()
-                                # Chercher le booking avec le même étudiant et montant
-                                for booking_id in range(booking_count):
-                                    booking = self.escrow_contract.functions.getBooking(booking_id).call()
-                                    booking_student = booking[1]
-                                    booking_tutor = booking[2]
-                                    booking_amount = float(self.w3.from_wei(booking[3], 'ether'))
-                                    booking_description = booking[11]  # Index de la description dans le struct
-                                    booking_blockchain_status = booking[6]  # Index du statut: 0=PENDING, 1=CONFIRMED, 2=FAILED, 3=CANCELLED
-                                    
-                                    if booking_student == event['args']['from'] and abs(booking_amount - amount) < 0.01:
-                                        # Utiliser la description du booking depuis la blockchain
-                                        description = booking_description
-                                        
-                                        # Déterminer le statut réel de la transaction basé sur le statut du booking
-                                        # 0 = PENDING → transaction pending (argent bloqué)
-                                        # 1 = CONFIRMED → transaction pending (toujours en attente de confirmation du cours)
-                                        # 2 = FAILED ou 3 = CANCELLED → transaction cancelled
-                                        if booking_blockchain_status == 0:
-                                            booking_status = "pending"  # Réservation en attente
-                                        elif booking_blockchain_status == 1:
-                                            booking_status = "pending"  # Confirmée mais cours pas encore validé
-                                        elif booking_blockchain_status == 2 or booking_blockchain_status == 3:
-                                            booking_status = "cancelled"
-                                        else:
-                                            booking_status = "completed"  # Autres cas
-                                        
-                                        # Récupérer les infos du tuteur depuis la BDD
-                                        try:
-                                            tutor_user_id_bytes = self.token_contract.functions.getUserId(booking_tutor).call()
-                                            tutor_user_id = self.bytes32_to_uuid(tutor_user_id_bytes)
-                                            
-                                            if tutor_user_id:
-                                                # Appeler l'auth-service pour avoir les infos du tuteur
-                                                import requests
-                                                tutor_resp = requests.get(
-                                                    f"{self.auth_service_url}/api/users/{tutor_user_id}",
-                                                    timeout=3
-                                                )
-                                                if tutor_resp.status_code == 200:
-                                                    tutor_data = tutor_resp.json().get("data", {})
-                                                    metadata = {
-                                                        "bookingId": booking_id,
-                                                        "tutorName": f"{tutor_data.get('firstName', '')} {tutor_data.get('lastName', '')}".strip(),
-                                                        "tutorId": tutor_user_id,
-                                                        "annonceId": None,  # On ne peut pas le récupérer depuis la blockchain
-                                                        "startTime": booking[4],
-                                                        "duration": booking[5]
-                                                    }
-                                        except Exception as tutor_err:
-                                            logger.warning(f"Erreur récupération infos tuteur: {tutor_err}")
-                                        
-                                        break
-                            except Exception as booking_err:
-                                logger.warning(f"Erreur enrichissement booking: {booking_err}")
-                        
-                        # Formatter la transaction
-                        transaction = {
-                            "id": log['transactionHash'].hex()[:32],
-                            "fromWalletId": event['args']['from'],
-                            "toWalletId": event['args']['to'],
-                            "amount": amount,
-                            "fee": 0.0,
-                            "transactionType": "BOOKING" if event['args']['to'] == self.escrow_address else "TRANSFER",
-                            "status": booking_status,  # Utiliser le statut réel du booking
-                            "description": description,
-                            "metadata": metadata,
-                            "createdAt": datetime.fromtimestamp(block['timestamp']).isoformat(),
-                            "fromWallet": self._get_wallet_info_sync(event['args']['from']),
-                            "toWallet": self._get_wallet_info_sync(event['args']['to']),
-                            "ledgerBlock": {
-                                "id": log['blockNumber'],
-                                "hash": block['hash'].hex(),
-                                "timestamp": block['timestamp']
-                            }
-                        }
-                        transactions.append(transaction)
-                        
-                        # Si c'est une réservation (booking), créer aussi une transaction "entrante" pour le tuteur
-                        if event['args']['to'] == self.escrow_address and metadata:
-                            # Transaction "entrante" pour le tuteur (en pending, car elle sera complétée après la validation du cours)
-                            tutor_transaction = {
-                                "id": (log['transactionHash'].hex()[:32] + "_tutor")[-32:],  # ID unique pour le tuteur
-                                "fromWalletId": event['args']['from'],  # L'étudiant
-                                "toWalletId": metadata.get('tutorId'),  # L'ID du tuteur (user ID, pas wallet)
-                                "amount": amount,
-                                "fee": 0.0,
-                                "transactionType": "BOOKING",
-                                "status": "pending",  # Toujours pending pour le tuteur jusqu'à validation du cours
-                                "description": description,
-                                "metadata": metadata,
-                                "createdAt": datetime.fromtimestamp(block['timestamp']).isoformat(),
-                                "fromWallet": self._get_wallet_info_sync(event['args']['from']),
-                                "toWallet": None,  # On ne peut pas récupérer le wallet du tuteur depuis juste l'ID
-                                "ledgerBlock": {
-                                    "id": log['blockNumber'],
-                                    "hash": block['hash'].hex(),
-                                    "timestamp": block['timestamp']
-                                }
-                            }
-                            transactions.append(tutor_transaction)
-                        
-                    except Exception as e:
-                        logger.warning(f"Erreur traitement log: {e}")
-                        continue
-                        
-            except Exception as e:
-                logger.error(f"Erreur récupération logs: {e}")
+            # Rattraper les derniers blocs puis lire l'index local (plus de scan depuis le bloc 0)
+            self.indexer.sync()
             
-            # ============ AJOUTER LES TRANSACTIONS ENTRANTES POUR LES TUTEURS ============
-            # Si l'utilisateur est un tuteur, ajouter les transactions entrantes pour ses bookings
+            # Récupérer le userId de cet utilisateur depuis la blockchain (une seule fois)
+            user_id = None
             try:
-                # Récupérer le userId de cet utilisateur depuis la blockchain
                 user_id_bytes = self.token_contract.functions.getUserId(wallet_address).call()
                 user_id = self.bytes32_to_uuid(user_id_bytes)
-                
-                if user_id:
-                    # Récupérer tous les bookings où cet utilisateur est tuteur
-                    tutor_bookings = self.get_tutor_bookings(user_id)
-                    
-                    # Pour chaque booking, créer une transaction entrante si elle n'existe pas déjà
-                    existing_booking_ids = set()
-                    for tx in transactions:
-                        if tx.get('metadata', {}).get('bookingId'):
-                            existing_booking_ids.add(tx['metadata']['bookingId'])
-                    
-                    for booking in tutor_bookings:
-                        booking_id = booking.get('blockchainId')
-                        
-                        # Si cette transaction n'existe pas déjà, la créer
-                        if booking_id not in existing_booking_ids:
-                            # Récupérer les détails du booking depuis la blockchain
-                            blockchain_booking = self.escrow_contract.functions.getBooking(booking_id).call()
-                            student_address = blockchain_booking[1]
-                            amount = blockchain_booking[3] / 10**18
-                            created_at = blockchain_booking[8]
-                            booking_status = blockchain_booking[6]
-                            description = blockchain_booking[11] if len(blockchain_booking) > 11 else "Réservation de cours"
-                            
-                            # Déterminer le statut de la transaction
-                            transaction_status = "completed"
-                            if booking_status == 0 or booking_status == 1:
-                                transaction_status = "pending"
-                            elif booking_status == 2:
-                                transaction_status = "cancelled"
-                            
-                            # Récupérer les infos du tuteur depuis auth-service
-                            tutor_name = "Tuteur"
-                            try:
-                                tutor_resp = requests.get(
-                                    f"{self.auth_service_url}/api/users/{user_id}",
-                                    timeout=5
-                                )
-                                if tutor_resp.status_code == 200:
-                                    tutor_data = tutor_resp.json().get("data", {})
-                                    tutor_name = f"{tutor_data.get('firstName', 'Tuteur')} {tutor_data.get('lastName', '')}"
-                            except:
-                                pass
-                            
-                            # Créer la transaction entrante pour le tuteur
-                            tutor_transaction = {
-                                "id": f"booking_{booking_id}_tutor",
-                                "fromWalletId": student_address,
-                                "toWalletId": user_id,
-                                "amount": amount,
-                                "fee": 0.0,
-                                "transactionType": "BOOKING",
-                                "status": transaction_status,
-                                "description": description,
-                                "metadata": {
-                                    "bookingId": booking_id,
-                                    "tutorId": user_id,
-                                    "tutorName": tutor_name,
-                                    "studentId": booking.get('studentId'),
-                                    "annonceId": booking.get('annonceId'),
-                                    "startTime": booking.get('startTime'),
-                                    "duration": booking.get('duration')
-                                },
-                                "createdAt": datetime.fromtimestamp(created_at).isoformat(),
-                                "fromWallet": self._get_wallet_info_sync(student_address),
-                                "toWallet": None,
-                                "ledgerBlock": None
-                            }
-                            transactions.append(tutor_transaction)
             except Exception as e:
-                logger.warning(f"Erreur ajout transactions tuteur: {e}")
+                logger.warning(f"Erreur récupération userId: {e}")
+            user_key = self.uuid_to_bytes32(user_id).hex() if user_id else None
+            
+            store = self.indexer.store
+            # limit + 1 lignes: la dernière indique seulement qu'il en reste
+            items = store.get_history_for_address(
+                wallet_address, limit + 1, user_key=user_key, escrow_address=self.escrow_address,
+                before=cursor, start_time=start_time, end_time=end_time, direction=direction, offset=offset
+            )
+            total = store.count_history_for_address(
+                wallet_address, user_key=user_key, escrow_address=self.escrow_address,
+                start_time=start_time, end_time=end_time, direction=direction
+            )
             
-            # ============ AJOUTER LES TRANSACTIONS SKILL EXCHANGE ============
-            try:
-                # Récupérer le userId de cet utilisateur depuis la blockchain
-                user_id_bytes = self.token_contract.functions.getUserId(wallet_address).call()
-                user_id = self.bytes32_to_uuid(user_id_bytes)
-                
-                if user_id:
-                    # Récupérer tous les skill exchanges où cet utilisateur est impliqué
-                    skill_exchanges = self.get_user_skill_exchanges(user_id)
-                    
-                    for exchange in skill_exchanges:
-                        try:
-                            exchange_id = exchange.get("id")
-                            student_id = exchange.get("studentId")
-                            tutor_id = exchange.get("tutorId")
-                            status = exchange.get("status")
-                            created_at = exchange.get("createdAt")
-                            frontend_id = exchange.get("frontendId")
-                            
-                            # Créer une transaction pour chaque skill exchange (même si 0 EDU)
-                            # C'est une transaction virtuelle pour affichage (type: SKILL_EXCHANGE)
-                            transaction = {
-                                "id": f"skill_exchange_{exchange_id}_{created_at}",
-                                "fromWalletId": student_id,  # ID utilisateur
-                                "toWalletId": tutor_id,      # ID utilisateur
-                                "amount": 0.0,  # Les skill exchanges sont gratuits
-                                "fee": 0.0,
-                                "transactionType": "SKILL_EXCHANGE",
-                                "status": "pending" if status in ["PENDING", "ACCEPTED"] else "completed",
-                                "description": f"Échange de compétences",
-                                "metadata": {
-                                    "exchangeId": exchange_id,
-                                    "studentId": student_id,
-                                    "tutorId": tutor_id,
-                                    "skillOffered": exchange.get("skillOffered"),
-                                    "skillRequested": exchange.get("skillRequested"),
-                                    "status": status,
-                                    "frontendId": frontend_id
-                                },
-                                "createdAt": exchange.get("createdAtIso") or datetime.fromtimestamp(created_at).isoformat() if isinstance(created_at, (int, float)) else str(created_at),
-                                "fromWallet": None,
-                                "toWallet": None,
-                                "ledgerBlock": None
-                            }
-                            transactions.append(transaction)
-                            
-                        except Exception as ex:
-                            logger.warning(f"Erreur ajout skill exchange {exchange.get('id')}: {ex}")
-                            continue
-            except Exception as e:
-                logger.warning(f"Erreur ajout transactions skill exchange: {e}")
+            page_items = items[:limit]
+            next_cursor = None
+            if len(items) > limit and page_items:
+                next_cursor = ":".join(str(part) for part in page_items[-1]["key"])
+            
+            transactions = []
+            for item in page_items:
+                try:
+                    transactions.append(self._format_history_item(item, wallet_address, user_id))
+                except Exception as e:
+                    logger.warning(f"Erreur traitement ligne d'historique {item['kind']} {item['key']}: {e}")
+            
+            page = {"transactions": transactions, "nextCursor": next_cursor, "total": total}
             
             # ⚡ Mettre en cache
-            self._history_cache[cache_key] = transactions
-            self._history_cache_timestamp[cache_key] = time.time()
+            self._history_cache.set(cache_key, page, tags=[wallet_address])
             
-            elapsed = (time.time() - start_time) * 1000
+            elapsed = (time.time() - started_at) * 1000
             logger.info(f"✅ [HISTORY] {len(transactions)} transactions récupérées en {elapsed:.0f}ms")
             
-            return transactions
+            return page
             
         except Exception as e:
             logger.error(f"Erreur récupération historique pour {user_wallet_address}: {e}")
-            return []
+            return {"transactions": [], "nextCursor": None, "total": 0}
+    
+    def _format_history_item(self, item: Dict, wallet_address: str, user_id: Optional[str]) -> Dict:
+        """Ligne de l'index (voir IndexStore.get_history_for_address) → transaction de l'historique"""
+        kind, row = item["kind"], item["row"]
+        if kind == "transfer":
+            return self._format_indexed_transfer(row)
+        if kind == "booking_companion":
+            return self._format_indexed_transfer(row, tutor_row=True)
+        if kind == "tutor_booking":
+            return self._format_tutor_booking(row, wallet_address, user_id)
+        return self._format_exchange_transaction(self._format_indexed_exchange(row))
+    
+    def _format_indexed_transfer(self, transfer: Dict, tutor_row: bool = False) -> Dict:
+        """
+        Transfert indexé → transaction de l'historique.
+        tutor_row: ligne "entrante" tuteur d'un paiement de réservation (rendue dès que la
+        réservation est indexée, pour que chaque ligne comptée dans le total soit affichée)
+        """
+        from_address = transfer['from_address']
+        to_address = transfer['to_address']
+        amount = transfer['amount']
+        description = transfer['description'] or "Transfert de tokens"
+        tx_hash = transfer['tx_hash'][2:]
+        
+        ledger_block = {
+            "id": transfer['block_number'],
+            "hash": transfer['block_hash'][2:],
+            "timestamp": transfer['block_timestamp']
+        }
+        
+        # Enrichir les métadonnées pour les bookings
+        metadata = {}
+        booking_status = "completed"  # Statut par défaut
+        
+        if to_address == self.escrow_address:
+            # C'est un booking - retrouver la réservation créée par cette même transaction
+            try:
+                booking = self.indexer.store.get_booking_by_tx(transfer['tx_hash'])
+                
+                if booking:
+                    # Utiliser la description du booking depuis la blockchain
+                    description = booking['description']
+                    booking_blockchain_status = booking['status']
+                    
+                    # Déterminer le statut réel de la transaction basé sur le statut du booking
+                    # 0 = PENDING → transaction pending (argent bloqué)
+                    # 1 = CONFIRMED → transaction pending (toujours en attente de confirmation du cours)
+                    # 2 = FAILED ou 3 = CANCELLED → transaction cancelled
+                    if booking_blockchain_status == 0:
+                        booking_status = "pending"  # Réservation en attente
+                    elif booking_blockchain_status == 1:
+                        booking_status = "pending"  # Confirmée mais cours pas encore validé
+                    elif booking_blockchain_status == 2 or booking_blockchain_status == 3:
+                        booking_status = "cancelled"
+                    else:
+                        booking_status = "completed"  # Autres cas
+                    
+                    # Infos du tuteur (⚡ cache des infos wallet), nom vide si l'auth-service ne répond pas
+                    tutor_info = self._get_wallet_info_sync(booking['tutor'])
+                    tutor_data = tutor_info.get("user") or {}
+                    metadata = {
+                        "bookingId": booking['booking_id'],
+                        "tutorName": f"{tutor_data.get('firstName', '')} {tutor_data.get('lastName', '')}".strip(),
+                        "tutorId": tutor_info.get("id"),
+                        "annonceId": None,  # On ne peut pas le récupérer depuis la blockchain
+                        "startTime": booking['start_time'],
+                        "duration": booking['duration']
+                    }
+            except Exception as booking_err:
+                logger.warning(f"Erreur enrichissement booking: {booking_err}")
+        
+        if tutor_row:
+            # Transaction "entrante" pour le tuteur (en pending, car elle sera complétée après la validation du cours)
+            return {
+                "id": (tx_hash[:32] + "_tutor")[-32:],  # ID unique pour le tuteur
+                "fromWalletId": from_address,  # L'étudiant
+                "toWalletId": metadata.get('tutorId'),  # L'ID du tuteur (user ID, pas wallet)
+                "amount": amount,
+                "fee": 0.0,
+                "transactionType": "BOOKING",
+                "status": "pending",  # Toujours pending pour le tuteur jusqu'à validation du cours
+                "description": description,
+                "metadata": metadata,
+                "createdAt": datetime.fromtimestamp(ledger_block['timestamp']).isoformat(),
+                "fromWallet": self._get_wallet_info_sync(from_address),
+                "toWallet": None,  # On ne peut pas récupérer le wallet du tuteur depuis juste l'ID
+                "ledgerBlock": ledger_block
+            }
+        
+        # Formatter la transaction
+        return {
+            "id": tx_hash[:32],
+            "fromWalletId": from_address,
+            "toWalletId": to_address,
+            "amount": amount,
+            "fee": 0.0,
+            "transactionType": "BOOKING" if to_address == self.escrow_address else "TRANSFER",
+            "status": booking_status,  # Utiliser le statut réel du booking
+            "description": description,
+            "metadata": metadata,
+            "createdAt": datetime.fromtimestamp(ledger_block['timestamp']).isoformat(),
+            "fromWallet": self._get_wallet_info_sync(from_address),
+            "toWallet": self._get_wallet_info_sync(to_address),
+            "ledgerBlock": ledger_block
+        }
+    
+    def _format_tutor_booking(self, row: Dict, wallet_address: str, user_id: str) -> Dict:
+        """Réservation indexée dont l'utilisateur est le tuteur → transaction entrante de l'historique"""
+        booking = self._format_indexed_booking(row)
+        booking_id = booking.get('blockchainId')
+        student_address = booking['studentAddress']
+        created_at = booking['createdAt']
+        
+        # Nom du tuteur (⚡ cache des infos wallet)
+        tutor_name = "Tuteur"
+        tutor_data = self._get_wallet_info_sync(wallet_address).get("user")
+        if tutor_data:
+            tutor_name = f"{tutor_data.get('firstName') or 'Tuteur'} {tutor_data.get('lastName', '')}"
+        
+        # Déterminer le statut de la transaction
+        transaction_status = "completed"
+        if booking['status'] in ("PENDING", "CONFIRMED"):
+            transaction_status = "pending"
+        elif booking['status'] == "CANCELLED":
+            transaction_status = "cancelled"
+        
+        return {
+            "id": f"booking_{booking_id}_tutor",
+            "fromWalletId": student_address,
+            "toWalletId": user_id,
+            "amount": booking['amount'],
+            "fee": 0.0,
+            "transactionType": "BOOKING",
+            "status": transaction_status,
+            "description": booking.get('description') or "Réservation de cours",
+            "metadata": {
+                "bookingId": booking_id,
+                "tutorId": user_id,
+                "tutorName": tutor_name,
+                "studentId": booking.get('studentId'),
+                "annonceId": booking.get('annonceId'),
+                "startTime": booking.get('startTime'),
+                "duration": booking.get('duration')
+            },
+            "createdAt": datetime.fromtimestamp(created_at).isoformat(),
+            "fromWallet": self._get_wallet_info_sync(student_address),
+            "toWallet": None,
+            "ledgerBlock": None
+        }
+    
+    def _format_exchange_transaction(self, exchange: Dict) -> Dict:
+        """Échange de compétences → transaction virtuelle de l'historique (type SKILL_EXCHANGE, 0 EDU)"""
+        exchange_id = exchange.get("id")
+        student_id = exchange.get("studentId")
+        tutor_id = exchange.get("tutorId")
+        status = exchange.get("status")
+        created_at = exchange.get("createdAt")
+        
+        return {
+            "id": f"skill_exchange_{exchange_id}_{created_at}",
+            "fromWalletId": student_id,  # ID utilisateur
+            "toWalletId": tutor_id,      # ID utilisateur
+            "amount": 0.0,  # Les skill exchanges sont gratuits
+            "fee": 0.0,
+            "transactionType": "SKILL_EXCHANGE",
+            "status": "pending" if status in ["PENDING", "ACCEPTED"] else "completed",
+            "description": f"Échange de compétences",
+            "metadata": {
+                "exchangeId": exchange_id,
+                "studentId": student_id,
+                "tutorId": tutor_id,
+                "skillOffered": exchange.get("skillOffered"),
+                "skillRequested": exchange.get("skillRequested"),
+                "status": status,
+                "frontendId": exchange.get("frontendId")
+            },
+            "createdAt": datetime.fromtimestamp(created_at).isoformat(),
+            "fromWallet": None,
+            "toWallet": None,
+            "ledgerBlock": None
+        }
     
     def _get_wallet_info_sync(self, wallet_address: str) -> Dict:
         """
@@ -644,10 +780,9 @@ class BlockchainManager:
         """
         try:
             # ⚡ Vérifier le cache d'abord
-            if wallet_address in self._wallet_info_cache:
-                cache_age = time.time() - self._wallet_info_cache_timestamp.get(wallet_address, 0)
-                if cache_age < self._wallet_info_cache_ttl:
-                    return self._wallet_info_cache[wallet_address]
+            cached = self._wallet_info_cache.get(wallet_address)
+            if cached is not None:
+                return cached
             
             # Essayer de récupérer le userId depuis la blockchain et le normaliser
             try:
@@ -655,10 +790,7 @@ class BlockchainManager:
                 user_id = self.bytes32_to_uuid(user_id_bytes)
 
                 if user_id:
-                    response = requests.get(
-                        f"{self.auth_service_url}/api/users/{user_id}",
-                        timeout=3
-                    )
+                    response = auth_client.get_sync(f"/api/users/{user_id}")
                     if response.status_code == 200:
                         user_data = response.json().get("data", {})
                         result = {
@@ -673,8 +805,7 @@ class BlockchainManager:
                             }
                         }
                         # ⚡ Mettre en cache le résultat réussi
-                        self._wallet_info_cache[wallet_address] = result
-                        self._wallet_info_cache_timestamp[wallet_address] = time.time()
+                        self._wallet_info_cache.set(wallet_address, result)
                         return result
             except Exception as e:
                 logger.debug(f"Impossible de normaliser l'userId pour {wallet_address}: {e}")
@@ -686,8 +817,7 @@ class BlockchainManager:
                 "user": None
             }
             # ⚡ Mettre en cache même les fallback
-            self._wallet_info_cache[wallet_address] = result
-            self._wallet_info_cache_timestamp[wallet_address] = time.time()
+            self._wallet_info_cache.set(wallet_address, result)
             return result
         except:
             result = {
@@ -695,17 +825,13 @@ class BlockchainManager:
                 "walletAddress": wallet_address,
                 "user": None
             }
-            self._wallet_info_cache[wallet_address] = result
-            self._wallet_info_cache_timestamp[wallet_address] = time.time()
+            self._wallet_info_cache.set(wallet_address, result)
             return result
     
     async def verify_user_exists(self, user_id: str) -> Dict:
         """Vérifier que l'utilisateur existe dans l'auth-service"""
         try:
-            response = requests.get(
-                f"{self.auth_service_url}/api/users/{user_id}",
-                timeout=5
-            )
+            response = await auth_client.get(f"/api/users/{user_id}")
             if response.status_code == 200:
                 return response.json().get("data", {})
             return None
@@ -720,17 +846,32 @@ class BlockchainManager:
         # Convertir l'UUID en bytes32
         user_id_bytes32 = self.uuid_to_bytes32(user_id)
         
-        # Vérifier d'abord sur la blockchain si le wallet est déjà enregistré
+        # ⚡ Enregistrement déjà connu (cache puis index local): aucun appel RPC
+        canonical_id = self.bytes32_to_uuid(user_id_bytes32)
+        registered = self._registered_wallets.get(canonical_id)
+        if registered is None and canonical_id:
+            registered = self.indexer.store.get_registered_wallet(canonical_id)
+            if registered:
+                self._registered_wallets.set(canonical_id, registered)
+        if registered:
+            private_key, address = self.wallet_generator.get_wallet_for_user(user_id)
+            return {
+                "address": address,
+                "private_key": private_key,
+                "exists_on_chain": True
+            }
+        
+        # Vérifier sur la blockchain si le wallet est déjà enregistré (pas encore indexé)
         try:
             existing_address = self.token_contract.functions.getWalletAddress(
                 user_id_bytes32
             ).call()
             
             if existing_address != "0x0000000000000000000000000000000000000000":
-                # Wallet existe sur la blockchain, générer la clé privée déterministement
+                if canonical_id:
+                    self._registered_wallets.set(canonical_id, existing_address)
+                # Wallet existe sur la blockchain, générer la clé privée déterministement (adresse déjà checksum)
                 private_key, address = self.wallet_generator.get_wallet_for_user(user_id)
-                # Convertir l'adresse en checksum
-                address = self.w3.to_checksum_address(address)
                 return {
                     "address": address,
                     "private_key": private_key,
@@ -739,10 +880,8 @@ class BlockchainManager:
         except:
             pass
         
-        # Créer un nouveau wallet déterministe
+        # Créer un nouveau wallet déterministe (adresse déjà checksum)
         private_key, address = self.wallet_generator.get_wallet_for_user(user_id)
-        # Convertir l'adresse en checksum
-        address = self.w3.to_checksum_address(address)
         
         return {
             "address": address,
@@ -758,16 +897,16 @@ class BlockchainManager:
         - Pour le tuteur : les transactions entrantes (depuis l'escrow après validation)
         - Ne PAS compter les transactions virtuelles créées pour affichage
         
-        ⚡ OPTIMISATION: Cache de 30 secondes + limit réduit à 50 transactions
+        ⚡ OPTIMISATION: Cache par utilisateur (invalidé à chaque transaction de son adresse) + agrégats de l'index
         """
         try:
-            # ⚡ Vérifier le cache d'abord
-            now = time.time()
-            if user_id in self._stats_cache:
-                cache_age = now - self._stats_cache_timestamp.get(user_id, 0)
-                if cache_age < self._stats_cache_ttl:
-                    logger.info(f"⚡ [CACHE] Stats servies depuis le cache pour {user_id} (âge: {cache_age:.1f}s)")
-                    return self._stats_cache[user_id]
+            # ⚡ Vérifier le cache d'abord (clé datée: "aujourd'hui" et "ce mois" changent au passage de minuit)
+            day, month = self.indexer.store.stats_periods(time.time())
+            cache_key = f"{user_id}:{day}"
+            cached = self._stats_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"⚡ [CACHE] Stats servies depuis le cache pour {user_id}")
+                return cached
             
             logger.info(f"⏱️ [STATS] Calcul des stats pour {user_id}...")
             start_time = time.time()
@@ -778,64 +917,11 @@ class BlockchainManager:
             # Récupérer le solde
             available_balance = self.get_token_balance(address)
             
-            # ⚡ OPTIMISATION: Réduire le limit à 20 (pareil que les transactions pour scan plus rapide)
-            # Les stats mensuelles nécessitent rarement 50+ transactions
-            # ⚡ OPTIMISATION: include_wallet_info=False car on n'a besoin que des montants
-            transactions = self.get_transaction_history(address, limit=20, include_wallet_info=False)
-            
-            # FILTRER les transactions virtuelles (celles créées pour affichage uniquement)
-            # Exclure les transactions avec id contenant '_tutor' ou commençant par 'booking_'
-            real_transactions = [
-                tx for tx in transactions 
-                if not (tx.get('id', '').endswith('_tutor') or tx.get('id', '').startswith('booking_'))
-            ]
-            
-            # Calculer les stats
-            today_sent = 0.0
-            today_received = 0.0
-            monthly_sent = 0.0
-            monthly_received = 0.0
-            all_time_sent = 0.0
-            all_time_received = 0.0
-            all_time_fees = 0.0
-            transaction_count = 0  # Compter uniquement les transactions qui concernent l'utilisateur
-            
-            today = datetime.now().date()
-            current_month = datetime.now().month
-            current_year = datetime.now().year
-            
-            for tx in real_transactions:
-                try:
-                    tx_date = datetime.fromisoformat(tx["createdAt"].replace('Z', '+00:00'))
-                    amount = tx["amount"]
-                    
-                    # Ne compter la transaction qu'UNE SEULE FOIS (soit entrante, soit sortante)
-                    if tx["fromWalletId"] == address:
-                        # Transaction sortante
-                        transaction_count += 1
-                        all_time_sent += amount
-                        
-                        if tx_date.date() == today:
-                            today_sent += amount
-                        
-                        if tx_date.month == current_month and tx_date.year == current_year:
-                            monthly_sent += amount
-                            
-                    elif tx["toWalletId"] == address:
-                        # Transaction entrante
-                        transaction_count += 1
-                        all_time_received += amount
-                        
-                        if tx_date.date() == today:
-                            today_received += amount
-                        
-                        if tx_date.month == current_month and tx_date.year == current_year:
-                            monthly_received += amount
-                    
-                    # Ajouter les frais si présents
-                    all_time_fees += tx.get("fee", 0.0)
-                except:
-                    continue
+            # ⚡ Agrégats tenus à jour par l'indexeur (jour, mois, total): lecture O(1), chiffres exacts
+            # quel que soit le nombre de transactions. Seuls les transferts visibles dans l'historique
+            # sont comptés (pas les transactions virtuelles ni les transferts masqués)
+            aggregates = self.indexer.store.get_wallet_stats(self.w3.to_checksum_address(address), day, month)
+            today_stats, monthly_stats, all_time_stats = aggregates["today"], aggregates["monthly"], aggregates["allTime"]
             
             stats = {
                 "wallet": {
@@ -846,24 +932,23 @@ class BlockchainManager:
                     "kycStatus": "verified"
                 },
                 "today": {
-                    "sent": today_sent,
-                    "received": today_received
+                    "sent": today_stats["sent"],
+                    "received": today_stats["received"]
                 },
                 "monthly": {
-                    "sent": monthly_sent,
-                    "received": monthly_received
+                    "sent": monthly_stats["sent"],
+                    "received": monthly_stats["received"]
                 },
                 "allTime": {
-                    "transactions": transaction_count,  # ⚡ Compter uniquement les transactions de l'utilisateur
-                    "sent": all_time_sent,
-                    "received": all_time_received,
-                    "fees": all_time_fees
+                    "transactions": all_time_stats["sent_count"] + all_time_stats["received_count"],
+                    "sent": all_time_stats["sent"],
+                    "received": all_time_stats["received"],
+                    "fees": 0.0  # Pas de frais sur les transferts EDU
                 }
             }
             
             # ⚡ Mettre en cache
-            self._stats_cache[user_id] = stats
-            self._stats_cache_timestamp[user_id] = time.time()
+            self._stats_cache.set(cache_key, stats, tags=[self.w3.to_checksum_address(address)])
             
             elapsed = (time.time() - start_time) * 1000
             logger.info(f"✅ [STATS] Stats calculées en {elapsed:.0f}ms pour {user_id}")
@@ -897,8 +982,7 @@ class BlockchainManager:
             return f"Wallet déjà enregistré pour l'utilisateur {user_id}"
         
         # Le owner du contrat doit appeler cette fonction
-        owner_address = self.token_contract.functions.owner().call()
-        owner_address = self.w3.to_checksum_address(owner_address)
+        owner_address = self.owner_address
         
         # Convertir l'UUID en bytes32
         user_id_bytes32 = self.uuid_to_bytes32(user_id)
@@ -910,17 +994,21 @@ class BlockchainManager:
         ).build_transaction({
             'from': owner_address,
             'gas': 200000,
-            'gasPrice': self.w3.eth.gas_price,
-            'nonce': self.w3.eth.get_transaction_count(owner_address),
+            'gasPrice': self.get_gas_price(),
         })
         
         # Utiliser send_transaction avec les comptes déverrouillés de Ganache (Docker)
         # En local npm run dev, Ganache fournit aussi des comptes déverrouillés
-        tx_hash = self.w3.eth.send_transaction(tx)
+        tx_hash = self.nonce_manager.send(tx)
         receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
         
+        # Le userId de cette adresse est maintenant connu on-chain
+        self._wallet_info_cache.delete(wallet_address)
+        self._registered_wallets.set(self.bytes32_to_uuid(user_id_bytes32), wallet_address)
+        
         # Distribuer les 500 EDUcoins
         self.distribute_initial_tokens(wallet["address"])
+        self._after_write(wallet_address)
         
         return tx_hash.hex()
     
@@ -930,8 +1018,7 @@ class BlockchainManager:
             # ✅ CORRECTION: Convertir l'adresse en checksum format
             wallet_address = self.w3.to_checksum_address(wallet_address)
             
-            owner_address = self.token_contract.functions.owner().call()
-            owner_address = self.w3.to_checksum_address(owner_address)
+            owner_address = self.owner_address
             
             # Vérifier si l'utilisateur a déjà reçu ses tokens initiaux
             has_initial = self.token_contract.functions.hasInitialBalance(wallet_address).call()
@@ -948,13 +1035,12 @@ class BlockchainManager:
             ).build_transaction({
                 'from': owner_address,
                 'gas': 100000,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(owner_address),
+                'gasPrice': self.get_gas_price(),
             })
             
             # Utiliser send_transaction avec les comptes déverrouillés de Ganache (Docker)
             # En local npm run dev, Ganache fournit aussi des comptes déverrouillés
-            tx_hash = self.w3.eth.send_transaction(tx)
+            tx_hash = self.nonce_manager.send(tx)
             receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
             
             return tx_hash.hex()
@@ -963,17 +1049,41 @@ class BlockchainManager:
             raise
     
     async def initialize_all_users_wallets(self):
-        """Initialiser les wallets pour tous les utilisateurs existants et créditer un peu d'ETH pour le gas"""
+        """Initialiser les wallets de tous les utilisateurs (dans le pool de threads, hors boucle d'événements)"""
+        return await run_blocking(self._initialize_all_users_wallets_sync)
+
+    def _initialize_all_users_wallets_sync(self):
+        """
+        Initialiser les wallets pour tous les utilisateurs existants et créditer un peu d'ETH pour le gas
+        ⚡ Initialisation groupée et reprenable:
+        - les utilisateurs déjà initialisés (progression persistée dans l'index) sont ignorés
+        - enregistrements et soldes ETH des autres lus en lots JSON-RPC
+        - transactions du owner envoyées à la suite (nonces consécutifs) par lots de WALLET_INIT_CHUNK,
+          reçus relevés en lot, progression enregistrée après chaque lot
+        """
         try:
             # Récupérer tous les utilisateurs depuis l'auth-service
-            response = requests.get(f"{self.auth_service_url}/api/users")
+            response = auth_client.get_sync("/api/users")
             
             if response.status_code != 200:
                 logger.error("Impossible de récupérer les utilisateurs")
                 return []
             
-            users = response.json().get("data", [])
+            users = [user for user in response.json().get("data", []) if user.get("id")]
             results = []
+            
+            # Reprise: ignorer les utilisateurs déjà initialisés lors d'un démarrage précédent
+            initialized = self.wallet_init_store.get_initialized_users(self.token_address)
+            pending_users = [user for user in users if user["id"] not in initialized]
+            for user in users:
+                if user["id"] in initialized:
+                    results.append({"user_id": user["id"], "email": user.get("email"), "status": "already_initialized"})
+            if not pending_users:
+                logger.info(f"⚡ [INIT] {len(users)} wallets déjà initialisés, rien à faire")
+                return results
+            
+            # ⚡ Dériver tous les wallets en une passe (pool de processus si beaucoup d'utilisateurs)
+            wallets = self.wallet_generator.derive_many([user["id"] for user in pending_users])
 
             # Utiliser le 1er compte Ganache déverrouillé (dynamique, pas hardcodé)
             # En Docker, Ganache fournit les comptes via web3.eth.accounts
@@ -982,71 +1092,257 @@ class BlockchainManager:
                 logger.error("Aucun compte Ganache disponible")
                 return []
             
-            owner_address = self.w3.to_checksum_address(ganache_accounts[0])
-            logger.info(f"Utilisation du compte Ganache: {owner_address}")
-
-            for user in users:
-                user_id = user.get("id")
-                if user_id:
-                    try:
-                        # Enregistrer le wallet sur la blockchain
-                        tx_hash = self.register_user_wallet_on_chain(user_id)
-
-                        # Récupérer le wallet
-                        wallet = self.get_user_wallet(user_id)
-
-                        # Créditer le wallet avec ETH pour le gas (0.5 ETH = plein)
-                        wallet_address = self.w3.to_checksum_address(wallet["address"])
-                        nonce = self.w3.eth.get_transaction_count(owner_address)
-                        
-                        tx = {
-                            'from': owner_address,
-                            'to': wallet_address,
-                            'value': self.w3.to_wei(0.5, 'ether'),
-                            'gas': 21000,
-                            'gasPrice': self.w3.eth.gas_price,
-                            'nonce': nonce
-                        }
-                        
-                        # Utiliser send_transaction() qui utilise les comptes déverrouillés de Ganache
-                        # (pas besoin de clé privée en Docker)
-                        tx_hash_receipt = self.w3.eth.send_transaction(tx)
-                        self.w3.eth.wait_for_transaction_receipt(tx_hash_receipt)
-
-                        results.append({
-                            "user_id": user_id,
-                            "email": user.get("email"),
-                            "wallet_address": wallet["address"],
-                            "transaction_hash": tx_hash,
-                            "balance": 600.0  # EDUcoins initiaux
-                        })
-                        
-                        logger.info(f"✅ Wallet initialisé pour {user.get('email')} : {wallet['address']}")
-
-                    except Exception as e:
-                        logger.error(f"❌ Erreur pour l'utilisateur {user_id}: {e}")
-                        results.append({
-                            "user_id": user_id,
-                            "error": str(e)
-                        })
+            funder_address = self.w3.to_checksum_address(ganache_accounts[0])
+            owner_address = self.owner_address
+            logger.info(f"Utilisation du compte Ganache: {funder_address}")
+            
+            # ⚡ État on-chain de tous les wallets restants en lots (enregistrement + ETH pour le gas)
+            addresses = [wallets[user["id"]][1] for user in pending_users]
+            registered = self.batch_call(
+                self.token_contract,
+                "getWalletAddress",
+                [(self.uuid_to_bytes32(user["id"]),) for user in pending_users]
+            )
+            eth_balances = self.batch_rpc("eth_getBalance", [[address, "latest"] for address in addresses])
+            
+            gas_price = self.get_gas_price()
+            funding_wei = self.w3.to_wei(0.5, 'ether')
+            chunk_size = int(os.getenv("WALLET_INIT_CHUNK", "200"))
+            
+            logger.info(f"🚀 [INIT] {len(pending_users)} wallets à initialiser ({len(initialized)} déjà faits)")
+            
+            for start in range(0, len(pending_users), chunk_size):
+                chunk = range(start, min(start + chunk_size, len(pending_users)))
+                sent = {idx: [] for idx in chunk}
+                errors = {}
+                
+                # Enregistrer les wallets (le contrat crédite aussi les EDU initiaux)
+                to_register = [
+                    idx for idx in chunk
+                    if registered[idx] in (None, "0x0000000000000000000000000000000000000000")
+                ]
+                # Créditer avec ETH pour le gas (0.5 ETH = plein) ceux qui n'en ont pas déjà
+                to_fund = [
+                    idx for idx in chunk
+                    if eth_balances[idx] is None or int(eth_balances[idx], 16) < funding_wei // 2
+                ]
+                
+                self._send_onboarding_transactions(
+                    to_register,
+                    sent,
+                    errors,
+                    "registerWalletsBatch(bytes32[],address[])",
+                    batch=lambda group: (
+                        self.token_contract.functions.registerWalletsBatch(
+                            [self.uuid_to_bytes32(pending_users[idx]["id"]) for idx in group],
+                            [addresses[idx] for idx in group]
+                        ),
+                        {'from': owner_address, 'gasPrice': gas_price}
+                    ),
+                    single=lambda idx: self.token_contract.functions.registerWallet(
+                        self.uuid_to_bytes32(pending_users[idx]["id"]),
+                        addresses[idx]
+                    ).build_transaction({
+                        'from': owner_address,
+                        'gas': 200000,
+                        'gasPrice': gas_price,
+                    })
+                )
+                self._send_onboarding_transactions(
+                    to_fund,
+                    sent,
+                    errors,
+                    "fundWallets(address[])",
+                    batch=lambda group: (
+                        self.token_contract.functions.fundWallets([addresses[idx] for idx in group]),
+                        {'from': owner_address, 'value': funding_wei * len(group), 'gasPrice': gas_price}
+                    ),
+                    single=lambda idx: {
+                        'from': funder_address,
+                        'to': addresses[idx],
+                        'value': funding_wei,
+                        'gas': 21000,
+                        'gasPrice': gas_price,
+                    }
+                )
+                
+                # Reçus de tout le lot relevés ensemble
+                receipts = self._wait_for_receipts([tx_hash for tx_hashes in sent.values() for tx_hash in tx_hashes])
+                
+                done = {}
+                for idx in chunk:
+                    user = pending_users[idx]
+                    failed = [
+                        tx_hash for tx_hash in sent[idx]
+                        if receipts.get(tx_hash) is None or int(receipts[tx_hash]["status"], 16) != 1
+                    ]
+                    if idx not in errors and failed:
+                        errors[idx] = f"Transaction(s) non confirmée(s): {', '.join(self.w3.to_hex(h) for h in failed)}"
+                    
+                    if idx in errors:
+                        logger.error(f"❌ Erreur pour l'utilisateur {user['id']}: {errors[idx]}")
+                        results.append({"user_id": user["id"], "error": errors[idx]})
+                        continue
+                    
+                    done[user["id"]] = addresses[idx]
+                    results.append({
+                        "user_id": user["id"],
+                        "email": user.get("email"),
+                        "wallet_address": addresses[idx],
+                        "transaction_hash": self.w3.to_hex(sent[idx][0]) if sent[idx] else None,
+                        "balance": 600.0  # EDUcoins initiaux
+                    })
+                
+                # Progression persistée: un redémarrage reprend au lot suivant
+                self.wallet_init_store.mark_users_initialized(self.token_address, done)
+                logger.info(f"✅ [INIT] Lot {start // chunk_size + 1}: {len(done)}/{len(chunk)} wallets initialisés")
             
+            self._after_write(*addresses)
             return results
 
         except Exception as e:
             logger.error(f"Erreur initialisation wallets: {e}")
             raise
 
+    def _send_onboarding_transactions(self, indexes: List[int], sent: Dict[int, list], errors: Dict[int, str],
+                                      batch_signature: str, batch, single):
+        """
+        Envoie les transactions d'onboarding: une transaction groupée par sous-lot de
+        onboarding_batch_size (batch(group) → (appel de contrat, paramètres)) si le token déployé
+        expose batch_signature, sinon une par utilisateur (single(idx) → tx).
+        Un sous-lot dont l'estimation du gas échoue (erreur passagère) est envoyé en unitaire.
+        Le hash est rattaché à chaque utilisateur concerné (sent), les erreurs d'envoi à errors.
+        """
+        singles = list(indexes)
+        if indexes and self.contract_has_function(self.token_address, batch_signature):
+            singles = []
+            for start in range(0, len(indexes), self.onboarding_batch_size):
+                group = indexes[start:start + self.onboarding_batch_size]
+                try:
+                    contract_call, params = batch(group)
+                    gas = contract_call.estimate_gas(params)
+                    tx = contract_call.build_transaction({**params, 'gas': int(gas * 1.2)})
+                except Exception as e:
+                    logger.warning(f"⚠️ [INIT] Estimation du lot impossible ({e}), {len(group)} transactions unitaires")
+                    singles.extend(group)
+                    continue
+                try:
+                    tx_hash = self.nonce_manager.send(tx)
+                    for idx in group:
+                        sent[idx].append(tx_hash)
+                except Exception as e:
+                    for idx in group:
+                        errors[idx] = str(e)
+        
+        for idx in singles:
+            try:
+                sent[idx].append(self.nonce_manager.send(single(idx)))
+            except Exception as e:
+                errors[idx] = str(e)
+    
+    def batch_rpc(self, method: str, params_list: List[list]) -> List[Optional[Any]]:
+        """Même méthode JSON-RPC pour plusieurs jeux de paramètres, en lots (résultat brut, None en cas d'erreur)"""
+        results = []
+        for start in range(0, len(params_list), self.rpc_batch_size):
+            chunk = params_list[start:start + self.rpc_batch_size]
+            try:
+                responses = self.w3.provider.make_batch_request([(method, params) for params in chunk])
+                if not isinstance(responses, list):
+                    raise ValueError(responses.get("error"))
+                results.extend(response.get("result") for response in responses)
+            except Exception as e:
+                logger.warning(f"⚠️ [BATCH] Lot {method} refusé ({e}), repli sur des appels unitaires")
+                for params in chunk:
+                    try:
+                        results.append(self.w3.provider.make_request(method, params).get("result"))
+                    except Exception:
+                        results.append(None)
+        return results
+    
+    def _wait_for_receipts(self, tx_hashes: List, timeout: float = 120, poll_interval: float = 0.2) -> Dict[Any, Optional[Dict]]:
+        """Attend les reçus de plusieurs transactions en relevant tout en lot (reçus bruts JSON-RPC)"""
+        receipts = {}
+        remaining = list(dict.fromkeys(tx_hashes))
+        deadline = time.monotonic() + timeout
+        while remaining:
+            for tx_hash, receipt in zip(remaining, self.batch_rpc("eth_getTransactionReceipt", [[self.w3.to_hex(h)] for h in remaining])):
+                if receipt is not None:
+                    receipts[tx_hash] = receipt
+            remaining = [tx_hash for tx_hash in remaining if tx_hash not in receipts]
+            if remaining:
+                if time.monotonic() > deadline:
+                    logger.warning(f"⚠️ [RECEIPTS] {len(remaining)} reçus toujours absents après {int(timeout)}s")
+                    break
+                time.sleep(poll_interval)
+        return receipts
     
     def get_token_balance(self, address: str) -> float:
-        """Obtenir le solde en tokens EDU"""
+        """Obtenir le solde en tokens EDU (⚡ caché jusqu'au prochain Transfer de l'adresse)"""
         # Convertir l'adresse en checksum
         address = self.w3.to_checksum_address(address)
+        cached = self._balance_cache.get(address)
+        if cached is not None:
+            return cached
         balance_wei = self.token_contract.functions.balanceOf(address).call()
-        return self.w3.from_wei(balance_wei, 'ether')
+        balance = self.w3.from_wei(balance_wei, 'ether')
+        self._balance_cache.set(address, balance)
+        return balance
+    
+    async def get_token_balance_async(self, address: str) -> float:
+        """Obtenir le solde en tokens EDU (version asynchrone, ne bloque pas la boucle d'événements)"""
+        address = self.w3.to_checksum_address(address)
+        cached = self._balance_cache.get(address)
+        if cached is not None:
+            return cached
+        balance_wei = await self.async_token_contract.functions.balanceOf(address).call()
+        balance = self.w3.from_wei(balance_wei, 'ether')
+        self._balance_cache.set(address, balance)
+        return balance
     
-    def transfer_tokens(self, from_user_id: str, to_address: str, amount: float, description: str = "") -> Dict:
+    def get_block_headers(self, block_numbers) -> Dict[int, Dict]:
+        """
+        En-têtes {numéro: {"hash", "timestamp"}} de plusieurs blocs.
+        ⚡ Cache borné + un seul lot eth_getBlockByNumber pour tous les blocs distincts manquants
+        """
+        headers = {}
+        missing = []
+        for block_number in dict.fromkeys(block_numbers):
+            header = self._block_headers.get(block_number)
+            if header is None:
+                missing.append(block_number)
+            else:
+                headers[block_number] = header
+        if not missing:
+            return headers
+        
+        head = self.w3.eth.block_number if self.block_finality_depth else None
+        blocks = self.batch_rpc("eth_getBlockByNumber", [[hex(block_number), False] for block_number in missing])
+        for block_number, block in zip(missing, blocks):
+            if block is None:
+                # Lot refusé ou bloc inconnu: lecture unitaire (lève une erreur si le bloc n'existe pas)
+                block = self.w3.eth.get_block(block_number)
+                header = {"hash": self.w3.to_hex(block['hash']), "timestamp": block['timestamp']}
+            else:
+                header = {"hash": block['hash'], "timestamp": int(block['timestamp'], 16)}
+            headers[block_number] = header
+            if head is None or block_number <= head - self.block_finality_depth:
+                self._block_headers.set(block_number, header)
+        return headers
+    
+    async def get_block_header_async(self, block_number: int) -> Dict:
+        """En-tête d'un bloc (version asynchrone, ⚡ cache partagé avec get_block_headers)"""
+        header = self._block_headers.get(block_number)
+        if header is None:
+            block = await self.async_w3.eth.get_block(block_number)
+            header = {"hash": self.w3.to_hex(block['hash']), "timestamp": block['timestamp']}
+            if not self.block_finality_depth:
+                self._block_headers.set(block_number, header)
+        return header
+    
+    def transfer_tokens(self, from_user_id: str, to_address: str, amount: float, description: str = "", wait: bool = True) -> Dict:
         """
         Transférer des tokens EDU de manière sécurisée.
+        wait=False: retourne dès l'envoi (job suivi par la TransactionQueue)
         """
         try:
             # Récupérer le wallet de l'expéditeur
@@ -1087,43 +1383,8 @@ class BlockchainManager:
             if balance_wei < amount_wei:
                 raise ValueError(f"Solde insuffisant. Disponible: {self.w3.from_wei(balance_wei, 'ether')} EDU, Requis: {amount} EDU")
             
-            # ✅ CRÉDITER UN PEU D'ETH SI NÉCESSAIRE
-            eth_balance = self.w3.eth.get_balance(from_address)
-            gas_price = self.w3.eth.gas_price
-            gas_needed = gas_price * 150000  # Estimation généreuse
-            
-            if eth_balance < gas_needed:
-                logger.info(f"Crédit de 0.05 ETH pour le wallet {from_address[:10]}...")
-                
-                # Récupérer l'adresse du owner
-                owner_address = self.token_contract.functions.owner().call()
-                owner_address = self.w3.to_checksum_address(owner_address)
-                
-                # Envoyer 0.05 ETH (suffisant pour plusieurs transactions)
-                transfer_eth_tx = {
-                    'from': owner_address,
-                    'to': from_address,
-                    'value': self.w3.to_wei(0.05, 'ether'),
-                    'gas': 21000,
-                    'gasPrice': gas_price,
-                    'nonce': self.w3.eth.get_transaction_count(owner_address),
-                }
-                
-                # Signer avec la clé privée du owner
-                owner_private_key = os.getenv("BLOCKCHAIN_OWNER_PRIVATE_KEY", "").strip()
-                if not owner_private_key:
-                    raise ValueError("Clé privée du owner non configurée")
-                if not owner_private_key.startswith("0x"):
-                    owner_private_key = "0x" + owner_private_key
-                
-                signed_eth_tx = self.w3.eth.account.sign_transaction(transfer_eth_tx, owner_private_key)
-                eth_tx_hash = self.w3.eth.send_raw_transaction(signed_eth_tx.raw_transaction)
-                self.w3.eth.wait_for_transaction_receipt(eth_tx_hash, timeout=30)
-                
-                logger.info(f"✅ 0.05 ETH envoyés. Tx: {eth_tx_hash.hex()}")
-            
-            # Maintenant procéder au transfert de tokens
-            gas_price = self.w3.eth.gas_price
+            # ⚡ L'ETH pour le gas est rechargé en arrière-plan par la GasStation: pas d'attente ici
+            gas_price = self.get_gas_price()
             
             # ✅ CORRECTION: Utiliser transferWithDescription pour éviter la surcharge
             tx = self.token_contract.functions.transferWithDescription(
@@ -1134,14 +1395,30 @@ class BlockchainManager:
                 'from': from_address,
                 'gas': 100000,
                 'gasPrice': gas_price,
-                'nonce': self.w3.eth.get_transaction_count(from_address),
             })
             
-            signed_tx = self.w3.eth.account.sign_transaction(tx, private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            try:
+                tx_hash = self.nonce_manager.send(tx, private_key)
+            except Exception as e:
+                if "insufficient funds" not in str(e).lower():
+                    raise
+                # Wallet pas encore rechargé par la GasStation: recharge prioritaire demandée à la station
+                # (dédoublonnée avec les recharges en vol), échec immédiat à renvoyer par le client
+                logger.info(f"⛽ Wallet {from_address[:10]}... sans ETH, recharge prioritaire demandée")
+                self.gas_station.request_top_up(from_address)
+                raise GasTopUpPending(from_address)
+            
+            if not wait:
+                return self._enqueue(tx_hash, "transfer", [from_address, to_address], {
+                    "from": from_address,
+                    "to": to_address,
+                    "amount": amount,
+                    "description": description
+                })
             
             # Attendre la confirmation
             receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=30)
+            self._after_write(from_address, to_address)
             
             return {
                 "transaction_hash": tx_hash.hex(),
@@ -1162,8 +1439,15 @@ class BlockchainManager:
     
     def create_booking(self, student_user_id: str, tutor_user_id: str,
                       amount: float, start_timestamp: int, duration: int,
-                      description: str, frontend_booking_id: str) -> Dict:
-        """Créer une réservation avec escrow - 100% on-chain"""
+                      description: str, frontend_booking_id: str, pipeline_approve: Optional[bool] = None) -> Dict:
+        """
+        Créer une réservation avec escrow - 100% on-chain
+        ⚡ pipeline_approve (par défaut BOOKING_PIPELINE_APPROVE): createBooking est envoyé sans attendre
+        le reçu de l'approve; le nœud les mine dans l'ordre des nonces, on vérifie les deux statuts à la fin
+        """
+        if pipeline_approve is None:
+            pipeline_approve = self.pipeline_booking_approve
+        
         student_wallet = self.get_user_wallet(student_user_id)
         tutor_wallet = self.get_user_wallet(tutor_user_id)
         
@@ -1177,35 +1461,27 @@ class BlockchainManager:
         # Convertir frontend_booking_id en bytes32
         frontend_id_bytes32 = self.uuid_to_bytes32(frontend_booking_id)
         
-        # 1. Approver le contrat escrow pour dépenser les tokens
-        nonce = self.w3.eth.get_transaction_count(student_address)
-        logger.info(f"[BLOCKCHAIN] Student nonce initial: {nonce}")
+        gas_price = self.get_gas_price()
         
+        # 1. Approver le contrat escrow pour dépenser les tokens
+        # (nonces attribués par le NonceManager: pas de get_transaction_count par transaction)
         approve_tx = self.token_contract.functions.approve(
             self.escrow_address,
             amount_wei
         ).build_transaction({
             'from': student_address,
             'gas': 100000,
-            'gasPrice': self.w3.eth.gas_price,
-            'nonce': nonce,
+            'gasPrice': gas_price,
         })
         
-        signed_approve_tx = self.w3.eth.account.sign_transaction(approve_tx, student_wallet["private_key"])
-        approve_hash = self.w3.eth.send_raw_transaction(signed_approve_tx.raw_transaction)
+        approve_hash = self.nonce_manager.send(approve_tx, student_wallet["private_key"])
         logger.info(f"[BLOCKCHAIN] Approve TX sent: {approve_hash.hex()}")
         
-        approve_receipt = self.w3.eth.wait_for_transaction_receipt(approve_hash, timeout=30)
-        logger.info(f"[BLOCKCHAIN] Approve TX status: {approve_receipt.status} (1=success, 0=failed)")
-        logger.info(f"[BLOCKCHAIN] Approve TX gas used: {approve_receipt.gasUsed}")
-        if approve_receipt.status != 1:
-            raise ValueError(f"Approve transaction failed: {approve_hash.hex()}")
+        if not pipeline_approve:
+            self._check_approve_receipt(approve_hash)
         
         # 2. Créer la réservation sur le contrat escrow
-        # ⚠️ IMPORTANT: Le nonce doit être incrémenté car la TX précédente est confirmée
-        nonce_for_booking = nonce + 1
-        logger.info(f"[BLOCKCHAIN] Creating booking with nonce: {nonce_for_booking}")
-        
+        # (gas fixe: pas d'estimation, qui échouerait tant que l'approve n'est pas miné)
         booking_tx = self.escrow_contract.functions.createBooking(
             tutor_address,
             amount_wei,
@@ -1216,15 +1492,16 @@ class BlockchainManager:
         ).build_transaction({
             'from': student_address,
             'gas': 800000,  # Augmenté pour gérer string storage + transferFrom + struct
-            'gasPrice': self.w3.eth.gas_price,
-            'nonce': nonce_for_booking,
+            'gasPrice': gas_price,
         })
         
-        signed_booking_tx = self.w3.eth.account.sign_transaction(booking_tx, student_wallet["private_key"])
-        booking_hash = self.w3.eth.send_raw_transaction(signed_booking_tx.raw_transaction)
+        booking_hash = self.nonce_manager.send(booking_tx, student_wallet["private_key"])
         logger.info(f"[BLOCKCHAIN] Booking TX sent: {booking_hash.hex()}")
         
         booking_receipt = self.w3.eth.wait_for_transaction_receipt(booking_hash, timeout=30)
+        if pipeline_approve:
+            # Nonce inférieur: l'approve est forcément miné quand createBooking l'est
+            self._check_approve_receipt(approve_hash)
         logger.info(f"[BLOCKCHAIN] Booking TX status: {booking_receipt.status} (1=success, 0=failed)")
         logger.info(f"[BLOCKCHAIN] Booking TX gas used: {booking_receipt.gasUsed}")
         if booking_receipt.status != 1:
@@ -1234,6 +1511,8 @@ class BlockchainManager:
                 error_reason = "Le créneau est probablement dans le passé ou les conditions du contrat ne sont pas remplies"
             raise ValueError(f"Erreur blockchain: {error_reason}. TX: {booking_hash.hex()}")
         
+        self._after_write(student_address, tutor_address)
+        
         # Extraire l'ID de la réservation depuis les événements
         booking_id = None
         logger.info(f"[BLOCKCHAIN] Receipt logs count: {len(booking_receipt.logs)}")
@@ -1265,6 +1544,117 @@ class BlockchainManager:
             "status": "PENDING"
         }
     
+    def create_bookings_batch(self, student_user_id: str, tutor_user_id: str, slots: List[Dict]) -> List[Dict]:
+        """
+        ⚡ Plusieurs réservations pour le même étudiant / tuteur en un seul pipeline:
+        un approve pour la somme des montants, tous les createBooking envoyés à la suite
+        (nonces consécutifs), reçus attendus en parallèle, ids lus dans BookingCreated.
+        slots: [{amount, start_timestamp, duration, description, frontend_booking_id}]
+        Retourne un résultat par slot (booking_id, transaction_hash, created_at... ou error)
+        """
+        if not slots:
+            return []
+        
+        student_wallet = self.get_user_wallet(student_user_id)
+        tutor_wallet = self.get_user_wallet(tutor_user_id)
+        student_address = self.w3.to_checksum_address(student_wallet["address"])
+        tutor_address = self.w3.to_checksum_address(tutor_wallet["address"])
+        private_key = student_wallet["private_key"]
+        gas_price = self.get_gas_price()
+        
+        amounts_wei = [self.w3.to_wei(slot["amount"], 'ether') for slot in slots]
+        
+        # 1. Un seul approve pour le total (chaque createBooking consomme sa part de l'allowance)
+        approve_tx = self.token_contract.functions.approve(
+            self.escrow_address,
+            sum(amounts_wei)
+        ).build_transaction({
+            'from': student_address,
+            'gas': 100000,
+            'gasPrice': gas_price,
+        })
+        approve_hash = self.nonce_manager.send(approve_tx, private_key)
+        logger.info(f"[BLOCKCHAIN] Batch approve TX sent: {approve_hash.hex()} ({len(slots)} réservations)")
+        
+        # 2. Tous les createBooking à la suite, sans attendre de reçu
+        results = [{"frontend_id": slot["frontend_booking_id"]} for slot in slots]
+        pending = {}
+        for idx, (slot, amount_wei) in enumerate(zip(slots, amounts_wei)):
+            try:
+                booking_tx = self.escrow_contract.functions.createBooking(
+                    tutor_address,
+                    amount_wei,
+                    slot["start_timestamp"],
+                    slot["duration"],
+                    slot["description"],
+                    self.uuid_to_bytes32(slot["frontend_booking_id"])
+                ).build_transaction({
+                    'from': student_address,
+                    'gas': 800000,
+                    'gasPrice': gas_price,
+                })
+                pending[idx] = self.nonce_manager.send(booking_tx, private_key)
+            except Exception as e:
+                logger.error(f"[BLOCKCHAIN] Envoi createBooking (slot {idx+1}) impossible: {e}")
+                results[idx]["error"] = str(e)
+        
+        # 3. Reçus attendus en parallèle
+        receipts = {}
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(len(pending), 10)) as pool:
+                futures = {
+                    idx: pool.submit(self.w3.eth.wait_for_transaction_receipt, tx_hash, timeout=30)
+                    for idx, tx_hash in pending.items()
+                }
+                for idx, future in futures.items():
+                    try:
+                        receipts[idx] = future.result()
+                    except Exception as e:
+                        results[idx]["error"] = f"Reçu introuvable: {e}"
+        
+        approve_error = None
+        try:
+            self._check_approve_receipt(approve_hash)
+        except Exception as e:
+            approve_error = str(e)
+        
+        # created_at = timestamp du bloc (⚡ en-têtes de tous les blocs lus en un lot)
+        headers = self.get_block_headers(
+            receipt.blockNumber for receipt in receipts.values() if receipt.status == 1
+        )
+        for idx, receipt in receipts.items():
+            tx_hash = pending[idx].hex()
+            if receipt.status != 1:
+                results[idx]["error"] = approve_error or f"Transaction échouée. TX: {tx_hash}"
+                continue
+            
+            booking_id = None
+            for event in self.escrow_contract.events.BookingCreated().process_receipt(receipt, errors=DISCARD):
+                booking_id = event['args']['bookingId']
+                break
+            if booking_id is None:
+                results[idx]["error"] = f"Événement BookingCreated introuvable. TX: {tx_hash}"
+                continue
+            
+            results[idx].update({
+                "booking_id": booking_id,
+                "transaction_hash": tx_hash,
+                "block_number": receipt.blockNumber,
+                "created_at": headers[receipt.blockNumber]["timestamp"],
+                "status": "PENDING"
+            })
+        
+        self._after_write(student_address, tutor_address)
+        return results
+    
+    def _check_approve_receipt(self, approve_hash):
+        approve_receipt = self.w3.eth.wait_for_transaction_receipt(approve_hash, timeout=30)
+        logger.info(f"[BLOCKCHAIN] Approve TX status: {approve_receipt.status} (1=success, 0=failed)")
+        logger.info(f"[BLOCKCHAIN] Approve TX gas used: {approve_receipt.gasUsed}")
+        if approve_receipt.status != 1:
+            raise ValueError(f"Approve transaction failed: {approve_hash.hex()}")
+        return approve_receipt
+    
     def get_booking_status(self, booking_id: int) -> Dict:
         """Récupérer le statut d'une réservation depuis la blockchain"""
         try:
@@ -1292,7 +1682,7 @@ class BlockchainManager:
             logger.error(f"Erreur récupération booking {booking_id}: {e}")
             raise ValueError(f"Réservation {booking_id} non trouvée")
     
-    def confirm_booking(self, booking_id: int, tutor_user_id: str) -> Dict:
+    def confirm_booking(self, booking_id: int, tutor_user_id: str, wait: bool = True) -> Dict:
         """Confirmer une réservation (tutor)"""
         tutor_wallet = self.get_user_wallet(tutor_user_id)
         
@@ -1302,13 +1692,14 @@ class BlockchainManager:
         tx = self.escrow_contract.functions.confirmBooking(booking_id).build_transaction({
             'from': tutor_address,
             'gas': 200000,
-            'gasPrice': self.w3.eth.gas_price,
-            'nonce': self.w3.eth.get_transaction_count(tutor_address),
+            'gasPrice': self.get_gas_price(),
         })
         
-        signed_tx = self.w3.eth.account.sign_transaction(tx, tutor_wallet["private_key"])
-        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        tx_hash = self.nonce_manager.send(tx, tutor_wallet["private_key"])
+        if not wait:
+            return self._enqueue(tx_hash, "confirm_booking", [tutor_address], {"booking_id": booking_id})
         receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        self._after_write(tutor_address)
         
         return {
             "booking_id": booking_id,
@@ -1317,7 +1708,7 @@ class BlockchainManager:
             "block_number": receipt.blockNumber
         }
     
-    def reject_booking(self, booking_id: int, tutor_user_id: str) -> Dict:
+    def reject_booking(self, booking_id: int, tutor_user_id: str, wait: bool = True) -> Dict:
         """Rejeter une réservation (tutor)"""
         tutor_wallet = self.get_user_wallet(tutor_user_id)
         
@@ -1327,13 +1718,14 @@ class BlockchainManager:
         tx = self.escrow_contract.functions.rejectBooking(booking_id).build_transaction({
             'from': tutor_address,
             'gas': 200000,
-            'gasPrice': self.w3.eth.gas_price,
-            'nonce': self.w3.eth.get_transaction_count(tutor_address),
+            'gasPrice': self.get_gas_price(),
         })
         
-        signed_tx = self.w3.eth.account.sign_transaction(tx, tutor_wallet["private_key"])
-        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        tx_hash = self.nonce_manager.send(tx, tutor_wallet["private_key"])
+        if not wait:
+            return self._enqueue(tx_hash, "reject_booking", [tutor_address], {"booking_id": booking_id})
         receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        self._after_write(tutor_address)
         
         return {
             "booking_id": booking_id,
@@ -1342,7 +1734,7 @@ class BlockchainManager:
             "block_number": receipt.blockNumber
         }
     
-    def confirm_course_outcome(self, booking_id: int, user_id: str, course_held: bool) -> Dict:
+    def confirm_course_outcome(self, booking_id: int, user_id: str, course_held: bool, wait: bool = True) -> Dict:
         """Confirmer l'issue d'un cours"""
         user_wallet = self.get_user_wallet(user_id)
         
@@ -1355,13 +1747,14 @@ class BlockchainManager:
         ).build_transaction({
             'from': user_address,
             'gas': 200000,
-            'gasPrice': self.w3.eth.gas_price,
-            'nonce': self.w3.eth.get_transaction_count(user_address),
+            'gasPrice': self.get_gas_price(),
         })
         
-        signed_tx = self.w3.eth.account.sign_transaction(tx, user_wallet["private_key"])
-        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        tx_hash = self.nonce_manager.send(tx, user_wallet["private_key"])
+        if not wait:
+            return self._enqueue(tx_hash, "confirm_course_outcome", [user_address], {"booking_id": booking_id, "course_held": course_held})
         receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        self._after_write(user_address)
         
         return {
             "booking_id": booking_id,
@@ -1370,73 +1763,61 @@ class BlockchainManager:
             "block_number": receipt.blockNumber
         }
     
+    def _format_indexed_booking(self, row: Dict) -> Dict:
+        """Convertit une ligne de l'index des réservations au format renvoyé par l'API"""
+        frontend_id_str = self.bytes32_to_uuid(bytes.fromhex(row["frontend_id"])) or row["frontend_id"]
+        status_map = {0: "PENDING", 1: "CONFIRMED", 2: "CANCELLED", 3: "COMPLETED", 4: "DISPUTED"}
+        
+        return {
+            "id": frontend_id_str,
+            "blockchainId": row["booking_id"],
+            "studentAddress": row["student"],
+            "tutorAddress": row["tutor"],
+            "amount": row["amount"],
+            "startTime": row["start_time"],
+            "duration": row["duration"],
+            "status": status_map.get(row["status"], "UNKNOWN"),
+            "outcome": row["outcome"],
+            "createdAt": row["created_at"],
+            "studentConfirmed": bool(row["student_confirmed"]),
+            "tutorConfirmed": bool(row["tutor_confirmed"]),
+            "description": row["description"],
+            "frontendId": frontend_id_str
+        }
+    
+    def get_booking_stats(self, user_id: str) -> Dict[str, Any]:
+        """
+        Statistiques de réservation d'un utilisateur (étudiant et tuteur confondus).
+        ⚡ Compteurs tenus à jour par l'indexeur à chaque événement de l'escrow: lecture en temps constant
+        """
+        wallet = self.get_user_wallet(user_id)
+        # Rattraper les derniers blocs: une réservation tout juste créée doit être comptée
+        self.indexer.sync()
+        counters = self.indexer.store.get_booking_stats(self.w3.to_checksum_address(wallet["address"]))
+        status_map = {0: "PENDING", 1: "CONFIRMED", 2: "CANCELLED", 3: "COMPLETED", 4: "DISPUTED"}
+        
+        stats = {"total": 0, "totalAmount": 0.0, "pendingAmount": 0.0}
+        for status, name in status_map.items():
+            counter = counters.get(status, {"count": 0, "amount": 0.0})
+            stats[name.lower()] = counter["count"]
+            stats["total"] += counter["count"]
+            # Une réservation annulée a été remboursée: elle n'entre pas dans le montant total
+            if name != "CANCELLED":
+                stats["totalAmount"] += counter["amount"]
+            # Montant encore en escrow: réservations en attente ou confirmées (cours pas encore validé)
+            if name in ("PENDING", "CONFIRMED"):
+                stats["pendingAmount"] += counter["amount"]
+        return stats
+    
     def get_tutor_bookings(self, tutor_user_id: str) -> List[Dict]:
-        """Récupérer toutes les réservations pour un tuteur (100% on-chain)"""
+        """Récupérer toutes les réservations pour un tuteur (index des événements de l'escrow)"""
         tutor_wallet = self.get_user_wallet(tutor_user_id)
         tutor_address = self.w3.to_checksum_address(tutor_wallet["address"])
         
-        bookings = []
-        
         try:
-            # Récupérer le nombre total de réservations
-            booking_count = self.escrow_contract.functions.getBookingCount().call()
-            logger.info(f"[GET_TUTOR_BOOKINGS] Total bookings in contract: {booking_count}")
-            
-            # Parcourir toutes les réservations et filtrer pour ce tuteur
-            for booking_id in range(booking_count):
-                try:
-                    # Récupérer la réservation
-                    booking_data = self.escrow_contract.functions.getBooking(booking_id).call()
-                    
-                    # Unpack les données
-                    (
-                        id_,
-                        student,
-                        tutor,
-                        amount,
-                        start_time,
-                        duration,
-                        status,
-                        outcome,
-                        created_at,
-                        student_confirmed,
-                        tutor_confirmed,
-                        description,
-                        frontend_id
-                    ) = booking_data
-                    
-                    # Vérifier si ce tuteur correspond
-                    if self.w3.to_checksum_address(tutor) == tutor_address:
-                        logger.info(f"[GET_TUTOR_BOOKINGS] Booking {booking_id} is for this tutor")
-                        
-                        # Convertir le frontend_id en UUID
-                        frontend_id_str = self.bytes32_to_uuid(frontend_id) or frontend_id.hex()
-                        
-                        # Mapper le statut
-                        status_map = {0: "PENDING", 1: "CONFIRMED", 2: "CANCELLED", 3: "COMPLETED", 4: "DISPUTED"}
-                        
-                        booking_dict = {
-                            "id": frontend_id_str,
-                            "blockchainId": booking_id,
-                            "studentAddress": student,
-                            "tutorAddress": tutor,
-                            "amount": float(self.w3.from_wei(amount, 'ether')),
-                            "startTime": start_time,
-                            "duration": duration,
-                            "status": status_map.get(status, "UNKNOWN"),
-                            "outcome": outcome,
-                            "createdAt": created_at,
-                            "studentConfirmed": student_confirmed,
-                            "tutorConfirmed": tutor_confirmed,
-                            "description": description,
-                            "frontendId": frontend_id_str
-                        }
-                        
-                        bookings.append(booking_dict)
-                        
-                except Exception as e:
-                    logger.debug(f"[GET_TUTOR_BOOKINGS] Error reading booking {booking_id}: {e}")
-                    continue
+            self.indexer.sync()
+            rows = self.indexer.store.get_bookings_by_tutor(tutor_address)
+            bookings = [self._format_indexed_booking(row) for row in rows]
             
             logger.info(f"[GET_TUTOR_BOOKINGS] Found {len(bookings)} bookings for tutor {tutor_user_id}")
             return bookings
@@ -1446,72 +1827,14 @@ class BlockchainManager:
             raise
 
     def get_student_bookings(self, student_user_id: str) -> List[Dict]:
-        """Récupérer toutes les réservations pour un étudiant (100% on-chain)"""
+        """Récupérer toutes les réservations pour un étudiant (index des événements de l'escrow)"""
         student_wallet = self.get_user_wallet(student_user_id)
         student_address = self.w3.to_checksum_address(student_wallet["address"])
         
-        bookings = []
-        
         try:
-            # Récupérer le nombre total de réservations
-            booking_count = self.escrow_contract.functions.getBookingCount().call()
-            logger.info(f"[GET_STUDENT_BOOKINGS] Total bookings in contract: {booking_count}")
-            
-            # Parcourir toutes les réservations et filtrer pour cet étudiant
-            for booking_id in range(booking_count):
-                try:
-                    # Récupérer la réservation
-                    booking_data = self.escrow_contract.functions.getBooking(booking_id).call()
-                    
-                    # Unpack les données
-                    (
-                        id_,
-                        student,
-                        tutor,
-                        amount,
-                        start_time,
-                        duration,
-                        status,
-                        outcome,
-                        created_at,
-                        student_confirmed,
-                        tutor_confirmed,
-                        description,
-                        frontend_id
-                    ) = booking_data
-                    
-                    # Vérifier si cet étudiant correspond
-                    if self.w3.to_checksum_address(student) == student_address:
-                        logger.info(f"[GET_STUDENT_BOOKINGS] Booking {booking_id} is for this student")
-                        
-                        # Convertir le frontend_id en UUID
-                        frontend_id_str = self.bytes32_to_uuid(frontend_id) or frontend_id.hex()
-                        
-                        # Mapper le statut
-                        status_map = {0: "PENDING", 1: "CONFIRMED", 2: "CANCELLED", 3: "COMPLETED", 4: "DISPUTED"}
-                        
-                        booking_dict = {
-                            "id": frontend_id_str,
-                            "blockchainId": booking_id,
-                            "studentAddress": student,
-                            "tutorAddress": tutor,
-                            "amount": float(self.w3.from_wei(amount, 'ether')),
-                            "startTime": start_time,
-                            "duration": duration,
-                            "status": status_map.get(status, "UNKNOWN"),
-                            "outcome": outcome,
-                            "createdAt": created_at,
-                            "studentConfirmed": student_confirmed,
-                            "tutorConfirmed": tutor_confirmed,
-                            "description": description,
-                            "frontendId": frontend_id_str
-                        }
-                        
-                        bookings.append(booking_dict)
-                        
-                except Exception as e:
-                    logger.debug(f"[GET_STUDENT_BOOKINGS] Error reading booking {booking_id}: {e}")
-                    continue
+            self.indexer.sync()
+            rows = self.indexer.store.get_bookings_by_student(student_address)
+            bookings = [self._format_indexed_booking(row) for row in rows]
             
             logger.info(f"[GET_STUDENT_BOOKINGS] Found {len(bookings)} bookings for student {student_user_id}")
             return bookings
@@ -1547,9 +1870,6 @@ class BlockchainManager:
             tutor_id_bytes32 = self.uuid_to_bytes32(tutor_user_id)
             frontend_id_bytes32 = self.uuid_to_bytes32(frontend_exchange_id)
             
-            # Créer la transaction
-            nonce = self.w3.eth.get_transaction_count(student_address)
-            
             logger.info(f"[CREATE_SKILL_EXCHANGE] studentId (bytes32): {student_id_bytes32.hex()}")
             logger.info(f"[CREATE_SKILL_EXCHANGE] tutorId (bytes32): {tutor_id_bytes32.hex()}")
             logger.info(f"[CREATE_SKILL_EXCHANGE] frontendId (bytes32): {frontend_id_bytes32.hex()}")
@@ -1575,14 +1895,12 @@ class BlockchainManager:
                 frontend_id_bytes32
             ).build_transaction({
                 'from': student_address,
-                'nonce': nonce,
                 'gas': gas_limit,
-                'gasPrice': self.w3.eth.gas_price
+                'gasPrice': self.get_gas_price()
             })
             
             # Signer et envoyer
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, student_private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            tx_hash = self.nonce_manager.send(transaction, student_private_key)
             logger.info(f"[CREATE_SKILL_EXCHANGE] Transaction sent: {tx_hash.hex()}")
             receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
             
@@ -1618,6 +1936,7 @@ class BlockchainManager:
             ).call()
             
             logger.info(f"[CREATE_SKILL_EXCHANGE] Exchange créé avec ID: {exchange_id}")
+            self.invalidate_addresses([student_address, tutor_address])
             
             # Créer une transaction +0 -0 pour l'historique
             try:
@@ -1655,25 +1974,23 @@ class BlockchainManager:
             tutor_private_key = tutor_wallet["private_key"]
             tutor_id_bytes32 = self.uuid_to_bytes32(tutor_user_id)
             
-            nonce = self.w3.eth.get_transaction_count(tutor_address)
-            
             transaction = self.skill_exchange_contract.functions.acceptExchange(
                 exchange_id,
                 tutor_id_bytes32
             ).build_transaction({
                 'from': tutor_address,
-                'nonce': nonce,
                 'gas': 200000,
-                'gasPrice': self.w3.eth.gas_price
+                'gasPrice': self.get_gas_price()
             })
             
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, tutor_private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            tx_hash = self.nonce_manager.send(transaction, tutor_private_key)
             receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
             
             if receipt['status'] != 1:
                 raise Exception("Transaction failed")
             
+            self._after_exchange_write(exchange_id)
+            
             logger.info(f"[ACCEPT_SKILL_EXCHANGE] Exchange {exchange_id} accepted")
             
             return {
@@ -1696,25 +2013,23 @@ class BlockchainManager:
             tutor_private_key = tutor_wallet["private_key"]
             tutor_id_bytes32 = self.uuid_to_bytes32(tutor_user_id)
             
-            nonce = self.w3.eth.get_transaction_count(tutor_address)
-            
             transaction = self.skill_exchange_contract.functions.rejectExchange(
                 exchange_id,
                 tutor_id_bytes32
             ).build_transaction({
                 'from': tutor_address,
-                'nonce': nonce,
                 'gas': 200000,
-                'gasPrice': self.w3.eth.gas_price
+                'gasPrice': self.get_gas_price()
             })
             
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, tutor_private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            tx_hash = self.nonce_manager.send(transaction, tutor_private_key)
             receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
             
             if receipt['status'] != 1:
                 raise Exception("Transaction failed")
             
+            self._after_exchange_write(exchange_id)
+            
             logger.info(f"[REJECT_SKILL_EXCHANGE] Exchange {exchange_id} rejected")
             
             return {
@@ -1736,24 +2051,22 @@ class BlockchainManager:
             user_address = user_wallet["address"]
             user_private_key = user_wallet["private_key"]
             
-            nonce = self.w3.eth.get_transaction_count(user_address)
-            
             transaction = self.skill_exchange_contract.functions.completeExchange(
                 exchange_id
             ).build_transaction({
                 'from': user_address,
-                'nonce': nonce,
                 'gas': 200000,
-                'gasPrice': self.w3.eth.gas_price
+                'gasPrice': self.get_gas_price()
             })
             
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, user_private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            tx_hash = self.nonce_manager.send(transaction, user_private_key)
             receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
             
             if receipt['status'] != 1:
                 raise Exception("Transaction failed")
             
+            self._after_exchange_write(exchange_id)
+            
             logger.info(f"[COMPLETE_SKILL_EXCHANGE] Exchange {exchange_id} completed")
             
             return {
@@ -1804,54 +2117,16 @@ class BlockchainManager:
             raise
     
     def get_user_skill_exchanges(self, user_id: str) -> List[Dict]:
-        """Récupérer tous les échanges d'un utilisateur (as student or tutor)"""
+        """
+        Récupérer tous les échanges d'un utilisateur (as student or tutor)
+        ⚡ Lus dans l'index des événements du contrat SkillExchange (plus de relecture de tous les échanges)
+        """
         try:
             logger.info(f"[GET_USER_SKILL_EXCHANGES] User: {user_id}")
             
-            user_id_bytes32 = self.uuid_to_bytes32(user_id)
-            exchanges = []
-            
-            # Récupérer le nombre total d'échanges
-            exchange_count = self.skill_exchange_contract.functions.getExchangeCount().call()
-            logger.info(f"[GET_USER_SKILL_EXCHANGES] Total exchanges in contract: {exchange_count}")
-            
-            # Parcourir tous les échanges
-            for exchange_id in range(1, exchange_count + 1):
-                try:
-                    exchange_data = self.skill_exchange_contract.functions.getExchange(exchange_id).call()
-                    
-                    (
-                        student_id_bytes32,
-                        tutor_id_bytes32,
-                        skill_offered,
-                        skill_requested,
-                        status,
-                        created_at,
-                        frontend_id_bytes32
-                    ) = exchange_data
-                    
-                    # Vérifier si cet utilisateur est impliqué
-                    if student_id_bytes32 == user_id_bytes32 or tutor_id_bytes32 == user_id_bytes32:
-                        student_id = self.bytes32_to_uuid(student_id_bytes32)
-                        tutor_id = self.bytes32_to_uuid(tutor_id_bytes32)
-                        frontend_id = self.bytes32_to_uuid(frontend_id_bytes32)
-                        
-                        status_map = {0: "PENDING", 1: "ACCEPTED", 2: "REJECTED", 3: "COMPLETED"}
-                        
-                        exchanges.append({
-                            "id": exchange_id,
-                            "studentId": student_id,
-                            "tutorId": tutor_id,
-                            "skillOffered": skill_offered,
-                            "skillRequested": skill_requested,
-                            "status": status_map.get(status, "UNKNOWN"),
-                            "createdAt": created_at,
-                            "frontendId": frontend_id
-                        })
-                        
-                except Exception as e:
-                    logger.debug(f"[GET_USER_SKILL_EXCHANGES] Error reading exchange {exchange_id}: {e}")
-                    continue
+            self.indexer.sync()
+            rows = self.indexer.store.get_skill_exchanges_for_user(self.uuid_to_bytes32(user_id).hex())
+            exchanges = [self._format_indexed_exchange(row) for row in rows]
             
             logger.info(f"[GET_USER_SKILL_EXCHANGES] Found {len(exchanges)} exchanges for user {user_id}")
             return exchanges
@@ -1859,6 +2134,20 @@ class BlockchainManager:
         except Exception as e:
             logger.error(f"[GET_USER_SKILL_EXCHANGES] Error: {e}")
             raise
+    
+    def _format_indexed_exchange(self, row: Dict) -> Dict:
+        """Convertit une ligne de l'index des échanges au format renvoyé par l'API"""
+        status_map = {0: "PENDING", 1: "ACCEPTED", 2: "REJECTED", 3: "COMPLETED"}
+        return {
+            "id": row["exchange_id"],
+            "studentId": self.bytes32_to_uuid(bytes.fromhex(row["student_id"])),
+            "tutorId": self.bytes32_to_uuid(bytes.fromhex(row["tutor_id"])),
+            "skillOffered": row["skill_offered"],
+            "skillRequested": row["skill_requested"],
+            "status": status_map.get(row["status"], "UNKNOWN"),
+            "createdAt": row["created_at"],
+            "frontendId": self.bytes32_to_uuid(bytes.fromhex(row["frontend_id"]))
+        }
 
 # Instance globale
 blockchain_manager = BlockchainManager()
\ No newline at end of file
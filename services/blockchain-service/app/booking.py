@@ -2,20 +2,22 @@ from fastapi import APIRouter, HTTPException, Query, Header, Depends
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import uuid
-import requests
 import logging
 import jwt
 import traceback
 
 from .blockchain import blockchain_manager
+from .concurrency import run_blocking, gather_bounded
+from .auth_client import auth_client
+from .annonce_store import BookingAnnonceStore
 from .models import CreateBookingData, Booking, BookingStats, CreateBatchBookingData
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# ⚡ Mapping en mémoire pour stocker annonceId par frontend_id
-# Format: {frontend_id: annonceId}
-BOOKING_ANNONCE_MAP: Dict[str, str] = {}
+# ⚡ Mapping persistant (SQLite + cache LRU) pour stocker annonceId par frontend_id
+# Format: {frontend_id: annonceId} - partagé entre workers et conservé au redémarrage
+BOOKING_ANNONCE_MAP = BookingAnnonceStore()
 async def get_current_user(authorization: Optional[str] = Header(None)) -> str:
     """Extraire l'ID utilisateur du token JWT"""
     if not authorization or not authorization.startswith("Bearer "):
@@ -46,15 +48,14 @@ async def get_user_by_wallet(wallet_address: str, authorization: Optional[str] =
         
         # Essayer d'abord via blockchain pour retrouver l'userId
         try:
-            wallet_info = blockchain_manager._get_wallet_info_sync(wallet_address)
+            wallet_info = await run_blocking(blockchain_manager._get_wallet_info_sync, wallet_address)
             if wallet_info and wallet_info.get("id"):
                 user_id = wallet_info.get("id")
                 
                 # Récupérer les infos complètes de l'user
-                resp = requests.get(
-                    f"{blockchain_manager.auth_service_url}/api/users/{user_id}",
-                    headers=headers,
-                    timeout=5
+                resp = await auth_client.get(
+                    f"/api/users/{user_id}",
+                    headers=headers
                 )
                 
                 if resp.status_code == 200:
@@ -64,10 +65,9 @@ async def get_user_by_wallet(wallet_address: str, authorization: Optional[str] =
         
         # Fallback: appeler l'auth-service directement (si endpoint existe)
         try:
-            resp = requests.get(
-                f"{blockchain_manager.auth_service_url}/api/users/wallet/{wallet_address}",
-                headers=headers,
-                timeout=5
+            resp = await auth_client.get(
+                f"/api/users/wallet/{wallet_address}",
+                headers=headers
             )
             
             if resp.status_code == 200:
@@ -80,6 +80,13 @@ async def get_user_by_wallet(wallet_address: str, authorization: Optional[str] =
         logger.warning(f"Erreur retrouver user par wallet {wallet_address}: {e}")
         return None
 
+async def get_users_by_wallets(wallet_addresses: List[str], authorization: Optional[str] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Version groupée de get_user_by_wallet: une résolution par adresse distincte, fan-out borné"""
+    return await gather_bounded(
+        lambda wallet_address: get_user_by_wallet(wallet_address, authorization),
+        wallet_addresses
+    )
+
 async def verify_user_and_get_role(user_id: str, authorization: Optional[str] = None) -> Tuple[str, str]:
     """Vérifier un utilisateur et renvoyer (user_id, role).
 
@@ -89,10 +96,9 @@ async def verify_user_and_get_role(user_id: str, authorization: Optional[str] =
     headers = {"Authorization": authorization} if authorization else {}
 
     try:
-        user_resp = requests.get(
-            f"{blockchain_manager.auth_service_url}/api/users/{user_id}",
-            headers=headers,
-            timeout=5
+        user_resp = await auth_client.get(
+            f"/api/users/{user_id}",
+            headers=headers
         )
 
         if user_resp.status_code == 200:
@@ -100,10 +106,9 @@ async def verify_user_and_get_role(user_id: str, authorization: Optional[str] =
             return str(user_data.get("id", user_id)), user_data.get("role", "student")
 
         # Si non trouvé, tenter comme profil tuteur
-        profile_tutor_resp = requests.get(
-            f"{blockchain_manager.auth_service_url}/api/profile/tutors/{user_id}",
-            headers=headers,
-            timeout=5
+        profile_tutor_resp = await auth_client.get(
+            f"/api/profile/tutors/{user_id}",
+            headers=headers
         )
         if profile_tutor_resp.status_code == 200:
             tutor_data = profile_tutor_resp.json().get("data", {})
@@ -113,10 +118,9 @@ async def verify_user_and_get_role(user_id: str, authorization: Optional[str] =
                 return str(resolved_id), tutor_user.get("role", "tutor")
 
         # Si non trouvé, tenter comme profil étudiant
-        profile_student_resp = requests.get(
-            f"{blockchain_manager.auth_service_url}/api/profile/students/{user_id}",
-            headers=headers,
-            timeout=5
+        profile_student_resp = await auth_client.get(
+            f"/api/profile/students/{user_id}",
+            headers=headers
         )
         if profile_student_resp.status_code == 200:
             student_data = profile_student_resp.json().get("data", {})
@@ -168,10 +172,9 @@ async def create_booking(
         if booking_data.annonceId:
             try:
                 # Essayer de récupérer l'annonce
-                annonce_resp = requests.get(
-                    f"{blockchain_manager.auth_service_url}/api/annonces/{booking_data.annonceId}",
-                    headers={"Authorization": authorization} if authorization else {},
-                    timeout=5
+                annonce_resp = await auth_client.get(
+                    f"/api/annonces/{booking_data.annonceId}",
+                    headers={"Authorization": authorization} if authorization else {}
                 )
                 logger.info(f"[CREATE_BOOKING] Réponse annonce: status={annonce_resp.status_code}")
                 
@@ -199,7 +202,7 @@ async def create_booking(
         
         # Créer la réservation sur la blockchain
         logger.info(f"[CREATE_BOOKING] Appel blockchain.create_booking...")
-        blockchain_result = blockchain_manager.create_booking(
+        blockchain_result = await run_blocking(blockchain_manager.create_booking,
             student_user_id=student_user_id,
             tutor_user_id=tutor_user_id,
             amount=booking_data.amount,
@@ -213,7 +216,7 @@ async def create_booking(
         
         # Récupérer le statut depuis la blockchain
         logger.info(f"[CREATE_BOOKING] Récupération du statut...")
-        booking_status = blockchain_manager.get_booking_status(blockchain_result["booking_id"])
+        booking_status = await run_blocking(blockchain_manager.get_booking_status, blockchain_result["booking_id"])
         
         logger.info(f"[CREATE_BOOKING] Statut récupéré: {booking_status.get('status')}")
         
@@ -275,7 +278,7 @@ async def create_batch_bookings(
     Chaque réservation est créée mais avec une logique optimisée:
     - Les verifications utilisateur sont faites une seule fois
     - Les montants sont validés ensemble
-    - Les approbations sont consolidées si possible
+    - Un seul approve pour le total, createBooking envoyés en pipeline (voir create_bookings_batch)
     """
     print(f"\n{'='*80}")
     print(f"[CREATE_BATCH_BOOKING] Nouvelles {len(batch_data.bookings)} réservations demandées")
@@ -303,10 +306,9 @@ async def create_batch_bookings(
         # Récupérer le titre de l'annonce UNE SEULE FOIS
         course_title = batch_data.description or "Session de tutorat"
         try:
-            annonce_resp = requests.get(
-                f"{blockchain_manager.auth_service_url}/api/annonces/{batch_data.annonceId}",
-                headers={"Authorization": authorization} if authorization else {},
-                timeout=5
+            annonce_resp = await auth_client.get(
+                f"/api/annonces/{batch_data.annonceId}",
+                headers={"Authorization": authorization} if authorization else {}
             )
             if annonce_resp.status_code == 200:
                 annonce_data = annonce_resp.json().get("data", {})
@@ -315,77 +317,84 @@ async def create_batch_bookings(
         except Exception as e:
             logger.warning(f"[CREATE_BATCH_BOOKING] Impossible de récupérer l'annonce: {e}")
         
-        # Créer toutes les réservations en boucle
+        # Préparer les slots (les slots invalides échouent sans bloquer les autres)
         results = []
         failed_bookings = []
+        slots = []
         
         for idx, booking_slot in enumerate(batch_data.bookings):
-            logger.info(f"[CREATE_BATCH_BOOKING] Création réservation {idx+1}/{len(batch_data.bookings)}")
-            logger.info(f"[CREATE_BATCH_BOOKING] Slot: date={booking_slot.get('date')}, time={booking_slot.get('time')}, amount={booking_slot.get('amount')}, duration={booking_slot.get('duration')}")
-            
+            logger.info(f"[CREATE_BATCH_BOOKING] Slot {idx+1}/{len(batch_data.bookings)}: date={booking_slot.get('date')}, time={booking_slot.get('time')}, amount={booking_slot.get('amount')}, duration={booking_slot.get('duration')}")
             try:
-                # Convertir la date/heure en timestamp
                 slot_date = booking_slot.get('date')
                 slot_time = booking_slot.get('time')
                 if not slot_date or not slot_time:
                     raise ValueError(f"Date ou heure manquante: date={slot_date}, time={slot_time}")
                 
                 start_datetime = datetime.fromisoformat(f"{slot_date}T{slot_time}:00")
-                start_timestamp = int(start_datetime.timestamp())
-                
-                # Générer un ID frontend unique
-                frontend_booking_id = str(uuid.uuid4())
-                logger.info(f"[CREATE_BATCH_BOOKING] Frontend ID: {frontend_booking_id}")
-                
-                # Créer la réservation
-                logger.info(f"[CREATE_BATCH_BOOKING] Appel blockchain.create_booking (slot {idx+1})")
-                blockchain_result = blockchain_manager.create_booking(
-                    student_user_id=student_user_id,
-                    tutor_user_id=tutor_user_id,
-                    amount=booking_slot['amount'],
-                    start_timestamp=start_timestamp,
-                    duration=booking_slot.get('duration', 60),
-                    description=course_title,
-                    frontend_booking_id=frontend_booking_id
-                )
-                
-                logger.info(f"[CREATE_BATCH_BOOKING] Blockchain result: booking_id={blockchain_result.get('booking_id')}")
-                
-                # Récupérer le statut
-                booking_status = blockchain_manager.get_booking_status(blockchain_result["booking_id"])
-                logger.info(f"[CREATE_BATCH_BOOKING] Booking status: {booking_status.get('status')}")
-                
-                # Construire la réponse pour ce slot
-                booking = Booking(
-                    id=frontend_booking_id,
-                    tutorId=tutor_user_id,
-                    studentId=student_user_id,
-                    annonceId=batch_data.annonceId,
-                    date=booking_slot['date'],
-                    time=booking_slot['time'],
-                    duration=booking_slot.get('duration', 60),
-                    status=booking_status["status"],
-                    amount=booking_slot['amount'],
-                    transactionHash=blockchain_result.get("transaction_hash", ""),
-                    blockchainStatus=booking_status["status"],
-                    blockchainTransactionId=str(blockchain_result.get("booking_id", "")),
-                    description=course_title,
-                    studentNotes=batch_data.studentNotes,
-                    createdAt=datetime.fromtimestamp(booking_status.get("created_at", int(datetime.now().timestamp()))).isoformat(),
-                    updatedAt=datetime.fromtimestamp(booking_status.get("created_at", int(datetime.now().timestamp()))).isoformat()
-                )
-                
-                results.append(booking.dict())
-                logger.info(f"[CREATE_BATCH_BOOKING] ✅ Réservation {idx+1} créée avec succès")
-                
+                slots.append((idx, booking_slot, {
+                    "amount": booking_slot['amount'],
+                    "start_timestamp": int(start_datetime.timestamp()),
+                    "duration": booking_slot.get('duration', 60),
+                    "description": course_title,
+                    "frontend_booking_id": str(uuid.uuid4())
+                }))
             except Exception as e:
-                logger.error(f"[CREATE_BATCH_BOOKING] ❌ Erreur réservation {idx+1}: {type(e).__name__}: {str(e)}", exc_info=True)
+                logger.error(f"[CREATE_BATCH_BOOKING] ❌ Slot {idx+1} invalide: {type(e).__name__}: {str(e)}")
                 failed_bookings.append({
                     "index": idx+1,
                     "slot": {k: v for k, v in booking_slot.items() if k in ['date', 'time', 'amount', 'duration']},
                     "error": str(e)
                 })
         
+        # ⚡ Un approve pour le total, tous les createBooking en pipeline, reçus attendus en parallèle
+        logger.info(f"[CREATE_BATCH_BOOKING] Appel blockchain.create_bookings_batch ({len(slots)} slots)")
+        blockchain_results = await run_blocking(
+            blockchain_manager.create_bookings_batch,
+            student_user_id,
+            tutor_user_id,
+            [slot for _, _, slot in slots]
+        ) if slots else []
+        
+        created_mapping = {}
+        for (idx, booking_slot, slot), blockchain_result in zip(slots, blockchain_results):
+            if blockchain_result.get("error"):
+                logger.error(f"[CREATE_BATCH_BOOKING] ❌ Erreur réservation {idx+1}: {blockchain_result['error']}")
+                failed_bookings.append({
+                    "index": idx+1,
+                    "slot": {k: v for k, v in booking_slot.items() if k in ['date', 'time', 'amount', 'duration']},
+                    "error": blockchain_result["error"]
+                })
+                continue
+            
+            frontend_booking_id = slot["frontend_booking_id"]
+            created_at = datetime.fromtimestamp(blockchain_result["created_at"]).isoformat()
+            booking = Booking(
+                id=frontend_booking_id,
+                tutorId=tutor_user_id,
+                studentId=student_user_id,
+                annonceId=batch_data.annonceId,
+                date=booking_slot['date'],
+                time=booking_slot['time'],
+                duration=slot["duration"],
+                status=blockchain_result["status"],
+                amount=booking_slot['amount'],
+                transactionHash=blockchain_result.get("transaction_hash", ""),
+                blockchainStatus=blockchain_result["status"],
+                blockchainTransactionId=str(blockchain_result["booking_id"]),
+                description=course_title,
+                studentNotes=batch_data.studentNotes,
+                createdAt=created_at,
+                updatedAt=created_at
+            )
+            results.append(booking.dict())
+            if batch_data.annonceId:
+                created_mapping[frontend_booking_id] = batch_data.annonceId
+            logger.info(f"[CREATE_BATCH_BOOKING] ✅ Réservation {idx+1} créée (booking_id={blockchain_result['booking_id']})")
+        
+        # ⚡ Mapping frontend_id → annonceId écrit en une transaction SQLite
+        BOOKING_ANNONCE_MAP.set_many(created_mapping)
+        failed_bookings.sort(key=lambda failure: failure["index"])
+        
         # Déterminer le statut global
         success = len(results) > 0
         message = f"{len(results)} réservation(s) créée(s) avec succès"
@@ -428,11 +437,26 @@ async def create_batch_bookings(
 
 
 
+def _submitted_response(id: str, booking_id: int, blockchain_result: Dict[str, Any], message: str) -> Dict[str, Any]:
+    """Réponse du mode asynchrone (?wait=false): l'issue se consulte sur /tx/{jobId}"""
+    return {
+        "success": True,
+        "message": message,
+        "data": {
+            "id": id,
+            "blockchainId": booking_id,
+            "status": "SUBMITTED",
+            "jobId": blockchain_result["job_id"],
+            "blockchain": blockchain_result
+        }
+    }
+
 @router.patch("/booking/{id}/confirm")
 async def confirm_booking(
     id: str,
     body: dict = None,
-    tutor_user_id: str = Depends(get_current_user)
+    tutor_user_id: str = Depends(get_current_user),
+    wait: bool = Query(True, description="false: retour immédiat avec un jobId (voir /tx/{jobId})")
 ) -> Dict[str, Any]:
     """Confirmer une réservation (tutor) - L'argent reste en attente jusqu'après la date du cours"""
     try:
@@ -443,14 +467,14 @@ async def confirm_booking(
         
         # Récupérer l'ID blockchain depuis l'ID frontend
         try:
-            booking_id = blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
+            booking_id = await run_blocking(blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
                 blockchain_manager.uuid_to_bytes32(id)
-            ).call()
+            ).call)
         except Exception as e:
             raise HTTPException(status_code=404, detail=f"Réservation non trouvée: {str(e)}")
         
         # Bloquer la confirmation si la date du cours est depassee
-        booking_status = blockchain_manager.get_booking_status(booking_id)
+        booking_status = await run_blocking(blockchain_manager.get_booking_status, booking_id)
         current_time = datetime.now().timestamp()
         if current_time >= booking_status["start_time"]:
             raise HTTPException(
@@ -459,10 +483,12 @@ async def confirm_booking(
             )
 
         # Confirmer sur la blockchain
-        blockchain_result = blockchain_manager.confirm_booking(booking_id, tutor_user_id)
+        blockchain_result = await run_blocking(blockchain_manager.confirm_booking, booking_id, tutor_user_id, wait=wait)
+        if not wait:
+            return _submitted_response(id, booking_id, blockchain_result, "Confirmation envoyée - En attente de minage")
         
         # Récupérer le statut mis à jour
-        booking_status = blockchain_manager.get_booking_status(booking_id)
+        booking_status = await run_blocking(blockchain_manager.get_booking_status, booking_id)
         
         return {
             "success": True,
@@ -485,23 +511,26 @@ async def confirm_booking(
 @router.patch("/booking/{id}/cancel")
 async def cancel_booking(
     id: str,
-    tutor_user_id: str = Depends(get_current_user)
+    tutor_user_id: str = Depends(get_current_user),
+    wait: bool = Query(True, description="false: retour immédiat avec un jobId (voir /tx/{jobId})")
 ) -> Dict[str, Any]:
     """Annuler une réservation (tuteur) - Remboursement immédiat de l'étudiant"""
     try:
         # Récupérer l'ID blockchain
         try:
-            booking_id = blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
+            booking_id = await run_blocking(blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
                 blockchain_manager.uuid_to_bytes32(id)
-            ).call()
+            ).call)
         except Exception as e:
             raise HTTPException(status_code=404, detail=f"Réservation non trouvée: {str(e)}")
         
         # Rejeter sur la blockchain (remboursement automatique)
-        blockchain_result = blockchain_manager.reject_booking(booking_id, tutor_user_id)
+        blockchain_result = await run_blocking(blockchain_manager.reject_booking, booking_id, tutor_user_id, wait=wait)
+        if not wait:
+            return _submitted_response(id, booking_id, blockchain_result, "Annulation envoyée - En attente de minage")
         
         # Récupérer le statut mis à jour
-        booking_status = blockchain_manager.get_booking_status(booking_id)
+        booking_status = await run_blocking(blockchain_manager.get_booking_status, booking_id)
         
         return {
             "success": True,
@@ -538,7 +567,8 @@ async def complete_booking(id: str) -> Dict[str, Any]:
 async def confirm_booking_outcome(
     id: str,
     course_held: bool,
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    wait: bool = Query(True, description="false: retour immédiat avec un jobId (voir /tx/{jobId})")
 ) -> Dict[str, Any]:
     """
     Confirmer si un cours a eu lieu ou non (après la date du cours)
@@ -551,14 +581,14 @@ async def confirm_booking_outcome(
     try:
         # Récupérer l'ID blockchain
         try:
-            booking_id = blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
+            booking_id = await run_blocking(blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
                 blockchain_manager.uuid_to_bytes32(id)
-            ).call()
+            ).call)
         except Exception as e:
             raise HTTPException(status_code=404, detail=f"Réservation non trouvée: {str(e)}")
         
         # Vérifier que le cours a commencé
-        booking_status = blockchain_manager.get_booking_status(booking_id)
+        booking_status = await run_blocking(blockchain_manager.get_booking_status, booking_id)
         current_time = datetime.now().timestamp()
         
         if current_time < booking_status["start_time"]:
@@ -568,14 +598,17 @@ async def confirm_booking_outcome(
             )
         
         # Confirmer l'issue sur la blockchain
-        blockchain_result = blockchain_manager.confirm_course_outcome(
+        blockchain_result = await run_blocking(blockchain_manager.confirm_course_outcome,
             booking_id,
             user_id,
-            course_held
+            course_held,
+            wait=wait
         )
+        if not wait:
+            return _submitted_response(id, booking_id, blockchain_result, "Confirmation de l'issue envoyée - En attente de minage")
         
         # Récupérer le statut mis à jour
-        updated_status = blockchain_manager.get_booking_status(booking_id)
+        updated_status = await run_blocking(blockchain_manager.get_booking_status, booking_id)
         
         # Déterminer le message basé sur le nouvel état
         if updated_status["status"] == "COMPLETED":
@@ -617,82 +650,26 @@ async def get_bookings_by_user(
         # Vérifier que l'utilisateur existe
         await verify_user_and_get_role(userId)
         
-        # Récupérer le wallet de l'étudiant
-        user_wallet = blockchain_manager.get_user_wallet(userId)
-        student_address = blockchain_manager.w3.to_checksum_address(user_wallet["address"])
-        
         bookings = []
         
         try:
-            # Récupérer le nombre total de réservations
-            booking_count = blockchain_manager.escrow_contract.functions.getBookingCount().call()
-            logger.info(f"[GET_USER_BOOKINGS] Total bookings in contract: {booking_count}")
+            # ⚡ Réservations lues depuis l'index (plus de getBooking sur tout le contrat)
+            student_bookings = await run_blocking(blockchain_manager.get_student_bookings, userId)
             
-            # Parcourir toutes les réservations et filtrer pour cet étudiant
-            for booking_id in range(booking_count):
-                try:
-                    # Récupérer la réservation
-                    booking_data = blockchain_manager.escrow_contract.functions.getBooking(booking_id).call()
-                    
-                    # Unpack les données
-                    (
-                        id_,
-                        student,
-                        tutor,
-                        amount,
-                        start_time,
-                        duration,
-                        status_,
-                        outcome,
-                        created_at,
-                        student_confirmed,
-                        tutor_confirmed,
-                        description,
-                        frontend_id
-                    ) = booking_data
-                    
-                    # Vérifier si cet étudiant correspond
-                    if blockchain_manager.w3.to_checksum_address(student) == student_address:
-                        logger.info(f"[GET_USER_BOOKINGS] Booking {booking_id} is for this student")
-                        
-                        # Convertir le frontend_id en UUID
-                        frontend_id_str = blockchain_manager.bytes32_to_uuid(frontend_id) or frontend_id.hex()
-                        
-                        # Mapper le statut
-                        status_map = {0: "PENDING", 1: "CONFIRMED", 2: "CANCELLED", 3: "COMPLETED", 4: "DISPUTED"}
-                        
-                        booking_dict = {
-                            "id": frontend_id_str,
-                            "blockchainId": booking_id,
-                            "studentAddress": student,
-                            "tutorAddress": tutor,
-                            "amount": float(blockchain_manager.w3.from_wei(amount, 'ether')),
-                            "startTime": start_time,
-                            "duration": duration,
-                            "status": status_map.get(status_, "UNKNOWN"),
-                            "outcome": outcome,
-                            "createdAt": created_at,
-                            "studentConfirmed": student_confirmed,
-                            "tutorConfirmed": tutor_confirmed,
-                            "description": description,
-                            "frontendId": frontend_id_str
-                        }
-                        
-                        # Essayer d'enrichir avec les infos du tuteur
-                        try:
-                            tutor_user = await get_user_by_wallet(tutor, None)
-                            if tutor_user:
-                                booking_dict["tutor"] = tutor_user
-                        except Exception as e:
-                            logger.debug(f"[GET_USER_BOOKINGS] Could not fetch tutor info: {e}")
-                        
-                        # Filtrer par statut si demandé
-                        if status is None or booking_dict.get("status") == status:
-                            bookings.append(booking_dict)
-                        
-                except Exception as e:
-                    logger.debug(f"[GET_USER_BOOKINGS] Error reading booking {booking_id}: {e}")
-                    continue
+            # Filtrer par statut si demandé
+            if status is not None:
+                student_bookings = [b for b in student_bookings if b.get("status") == status]
+            
+            # ⚡ Infos des tuteurs: une résolution par tuteur distinct
+            tutors = await get_users_by_wallets([b["tutorAddress"] for b in student_bookings])
+            
+            for booking_dict in student_bookings:
+                # Essayer d'enrichir avec les infos du tuteur
+                tutor_user = tutors.get(booking_dict["tutorAddress"])
+                if tutor_user:
+                    booking_dict["tutor"] = tutor_user
+                
+                bookings.append(booking_dict)
             
             logger.info(f"[GET_USER_BOOKINGS] Found {len(bookings)} bookings for student {userId}")
             
@@ -728,142 +705,96 @@ async def get_student_courses(
         # Vérifier que l'utilisateur existe
         await verify_user_and_get_role(userId)
         
-        # Récupérer le wallet de l'étudiant
-        user_wallet = blockchain_manager.get_user_wallet(userId)
-        student_address = blockchain_manager.w3.to_checksum_address(user_wallet["address"])
-        
         courses = []
         
         try:
-            # Récupérer le nombre total de réservations
-            booking_count = blockchain_manager.escrow_contract.functions.getBookingCount().call()
-            logger.info(f"[GET_STUDENT_COURSES] Total bookings in contract: {booking_count}")
+            # ⚡ Réservations lues depuis l'index (plus de getBooking sur tout le contrat)
+            student_bookings = await run_blocking(blockchain_manager.get_student_bookings, userId)
             
-            # Parcourir toutes les réservations et filtrer pour cet étudiant
-            for booking_id in range(booking_count):
+            # Filtrer uniquement les cours acceptés (CONFIRMED) ou terminés (COMPLETED)
+            student_bookings = [b for b in student_bookings if b["status"] in ["CONFIRMED", "COMPLETED"]]
+            
+            # ⚡ Tuteurs et annonces distincts résolus en une passe (au lieu de 3 appels par cours)
+            annonce_ids = BOOKING_ANNONCE_MAP.get_many(b["frontendId"] for b in student_bookings)
+            tutors = await get_users_by_wallets([b["tutorAddress"] for b in student_bookings])
+            annonces = await auth_client.get_annonces_many(annonce_ids.values())
+            
+            # Fallback: une recherche par tutorId pour les annonces introuvables via le mapping
+            missing_tutor_ids = [
+                tutors[b["tutorAddress"]].get("id")
+                for b in student_bookings
+                if tutors.get(b["tutorAddress"])
+                and annonce_ids.get(b["frontendId"])
+                and not annonces.get(annonce_ids.get(b["frontendId"]))
+            ]
+            
+            async def _first_tutor_annonce(tutor_user_id):
+                annonce_resp = await auth_client.get(f"/api/annonces?tutorId={tutor_user_id}")
+                if annonce_resp.status_code == 200:
+                    annonces_data = annonce_resp.json().get("data", [])
+                    if isinstance(annonces_data, list) and len(annonces_data) > 0:
+                        return annonces_data[0]
+                return None
+            
+            fallback_annonces = await gather_bounded(_first_tutor_annonce, missing_tutor_ids)
+            
+            for booking in student_bookings:
+                booking_id = booking.get("blockchainId")
                 try:
-                    # Récupérer la réservation
-                    booking_data = blockchain_manager.escrow_contract.functions.getBooking(booking_id).call()
+                    tutor = booking["tutorAddress"]
+                    start_time = booking["startTime"]
+                    booking_status = booking["status"]
                     
-                    # Unpack les données
-                    (
-                        id_,
-                        student,
-                        tutor,
-                        amount,
-                        start_time,
-                        duration,
-                        status_,
-                        outcome,
-                        created_at,
-                        student_confirmed,
-                        tutor_confirmed,
-                        description,
-                        frontend_id
-                    ) = booking_data
+                    frontend_id_str = booking["frontendId"]
+                    
+                    # Infos du tuteur
+                    tutor_user = tutors.get(tutor)
+                    tutor_user_id = tutor_user.get("id") if tutor_user else None
+                    
+                    # Récupérer les infos de l'annonce
+                    annonce_info = None
+                    # ⚡ Récupérer l'annonceId depuis le mapping
+                    annonce_id = annonce_ids.get(frontend_id_str)
+                    
+                    if annonce_id and tutor_user_id:
+                        # Annonce spécifique par ID, sinon première annonce du tuteur
+                        annonce_data = annonces.get(annonce_id) or fallback_annonces.get(tutor_user_id)
+                        if annonce_data:
+                            annonce_info = {
+                                "id": annonce_data.get("id"),
+                                "title": annonce_data.get("title"),
+                                "subject": annonce_data.get("subject"),
+                                "description": annonce_data.get("description"),
+                                "level": annonce_data.get("level"),
+                                "teachingMode": annonce_data.get("teachingMode")
+                            }
+                    
+                    # Déterminer si le cours est passé
+                    current_time = datetime.now().timestamp()
+                    course_passed = current_time >= start_time
+                    
+                    course_dict = {
+                        "id": frontend_id_str,
+                        "blockchainId": booking_id,
+                        "studentAddress": booking["studentAddress"],
+                        "tutorAddress": tutor,
+                        "tutorId": tutor_user.get("id") if tutor_user else None,
+                        "tutor": tutor_user,
+                        "amount": booking["amount"],
+                        "startTime": start_time,
+                        "duration": booking["duration"],
+                        "status": booking_status,
+                        "createdAt": booking["createdAt"],
+                        "studentConfirmed": booking["studentConfirmed"],
+                        "tutorConfirmed": booking["tutorConfirmed"],
+                        "description": booking["description"],
+                        "annonce": annonce_info,
+                        "coursePassed": course_passed,
+                        "frontendId": frontend_id_str
+                    }
+                    
+                    courses.append(course_dict)
                     
-                    # Vérifier si cet étudiant correspond
-                    if blockchain_manager.w3.to_checksum_address(student) == student_address:
-                        # Mapper le statut
-                        status_map = {0: "PENDING", 1: "CONFIRMED", 2: "CANCELLED", 3: "COMPLETED", 4: "DISPUTED"}
-                        booking_status = status_map.get(status_, "UNKNOWN")
-                        
-                        # Filtrer uniquement les cours acceptés (CONFIRMED) ou terminés (COMPLETED)
-                        if booking_status not in ["CONFIRMED", "COMPLETED"]:
-                            continue
-                        
-                        # Convertir le frontend_id en UUID
-                        frontend_id_str = blockchain_manager.bytes32_to_uuid(frontend_id) or frontend_id.hex()
-                        
-                        # Récupérer les infos du tuteur
-                        tutor_user = None
-                        tutor_user_id = None
-                        try:
-                            tutor_user_id_bytes = blockchain_manager.token_contract.functions.getUserId(tutor).call()
-                            tutor_user_id = blockchain_manager.bytes32_to_uuid(tutor_user_id_bytes)
-                            
-                            if tutor_user_id:
-                                tutor_resp = requests.get(
-                                    f"{blockchain_manager.auth_service_url}/api/users/{tutor_user_id}",
-                                    timeout=5
-                                )
-                                if tutor_resp.status_code == 200:
-                                    tutor_user = tutor_resp.json().get("data", {})
-                        except Exception as e:
-                            logger.warning(f"[GET_STUDENT_COURSES] Erreur récupération tuteur: {e}")
-                        
-                        # Récupérer les infos de l'annonce
-                        annonce_info = None
-                        # ⚡ Récupérer l'annonceId depuis le mapping
-                        annonce_id = BOOKING_ANNONCE_MAP.get(frontend_id_str)
-                        
-                        if annonce_id and tutor_user_id:
-                            try:
-                                # Récupérer l'annonce spécifique par ID
-                                annonce_resp = requests.get(
-                                    f"{blockchain_manager.auth_service_url}/api/annonces/{annonce_id}",
-                                    timeout=5
-                                )
-                                if annonce_resp.status_code == 200:
-                                    annonce_data = annonce_resp.json().get("data", {})
-                                    if annonce_data:
-                                        annonce_info = {
-                                            "id": annonce_data.get("id"),
-                                            "title": annonce_data.get("title"),
-                                            "subject": annonce_data.get("subject"),
-                                            "description": annonce_data.get("description"),
-                                            "level": annonce_data.get("level"),
-                                            "teachingMode": annonce_data.get("teachingMode")
-                                        }
-                            except Exception as e:
-                                logger.warning(f"[GET_STUDENT_COURSES] Erreur récupération annonce: {e}")
-                                # Fallback: chercher une annonce du tuteur si le mapping échoue
-                                try:
-                                    annonce_resp = requests.get(
-                                        f"{blockchain_manager.auth_service_url}/api/annonces?tutorId={tutor_user_id}",
-                                        timeout=5
-                                    )
-                                    if annonce_resp.status_code == 200:
-                                        annonces_data = annonce_resp.json().get("data", [])
-                                        if isinstance(annonces_data, list) and len(annonces_data) > 0:
-                                            first_annonce = annonces_data[0]
-                                            annonce_info = {
-                                                "id": first_annonce.get("id"),
-                                                "title": first_annonce.get("title"),
-                                                "subject": first_annonce.get("subject"),
-                                                "description": first_annonce.get("description"),
-                                                "level": first_annonce.get("level"),
-                                                "teachingMode": first_annonce.get("teachingMode")
-                                            }
-                                except Exception as e2:
-                                    logger.warning(f"[GET_STUDENT_COURSES] Fallback annonce échoué: {e2}")
-                        
-                        # Déterminer si le cours est passé
-                        current_time = datetime.now().timestamp()
-                        course_passed = current_time >= start_time
-                        
-                        course_dict = {
-                            "id": frontend_id_str,
-                            "blockchainId": booking_id,
-                            "studentAddress": student,
-                            "tutorAddress": tutor,
-                            "tutorId": tutor_user.get("id") if tutor_user else None,
-                            "tutor": tutor_user,
-                            "amount": float(blockchain_manager.w3.from_wei(amount, 'ether')),
-                            "startTime": start_time,
-                            "duration": duration,
-                            "status": booking_status,
-                            "createdAt": created_at,
-                            "studentConfirmed": student_confirmed,
-                            "tutorConfirmed": tutor_confirmed,
-                            "description": description,
-                            "annonce": annonce_info,
-                            "coursePassed": course_passed,
-                            "frontendId": frontend_id_str
-                        }
-                        
-                        courses.append(course_dict)
-                        
                 except Exception as e:
                     logger.debug(f"[GET_STUDENT_COURSES] Error reading booking {booking_id}: {e}")
                     continue
@@ -892,14 +823,14 @@ async def get_booking_details(id: str) -> Dict[str, Any]:
     try:
         # Récupérer l'ID blockchain depuis l'ID frontend
         try:
-            booking_id = blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
+            booking_id = await run_blocking(blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
                 blockchain_manager.uuid_to_bytes32(id)
-            ).call()
+            ).call)
         except Exception as e:
             raise HTTPException(status_code=404, detail=f"Réservation non trouvée: {str(e)}")
         
         # Récupérer depuis la blockchain
-        booking_status = blockchain_manager.get_booking_status(booking_id)
+        booking_status = await run_blocking(blockchain_manager.get_booking_status, booking_id)
         
         # Déterminer les actions possibles basées sur le statut
         current_time = datetime.now().timestamp()
@@ -953,65 +884,60 @@ async def get_bookings_by_tutor(
         await verify_user_and_get_role(tutorId)
         
         # Récupérer toutes les réservations du tuteur depuis la blockchain
-        bookings = blockchain_manager.get_tutor_bookings(tutorId)
+        bookings = await run_blocking(blockchain_manager.get_tutor_bookings, tutorId)
+        
+        # ⚡ Résoudre en une passe les étudiants et annonces distincts (au lieu d'appels par réservation)
+        mapped_annonce_ids = BOOKING_ANNONCE_MAP.get_many(booking.get('id') for booking in bookings)
+        annonce_ids = {
+            booking.get('id'): booking.get('annonceId') or mapped_annonce_ids.get(booking.get('id'))
+            for booking in bookings
+        }
+        students = await get_users_by_wallets([booking.get('studentAddress') for booking in bookings], authorization)
+        annonces = await auth_client.get_annonces_many(annonce_ids.values())
+        
+        # Annonces introuvables individuellement: une seule recherche par tutorId
+        tutor_annonces = None
+        if any(annonce_id and not annonces.get(annonce_id) for annonce_id in annonce_ids.values()):
+            try:
+                annonce_resp = await auth_client.get(f"/api/annonces?tutorId={tutorId}")
+                if annonce_resp.status_code == 200:
+                    tutor_annonces = {ann.get("id"): ann for ann in annonce_resp.json().get("data", [])}
+            except:
+                pass
         
         # Enrichir les réservations avec les données utilisateurs et annonces
         enriched_bookings = []
         
         for booking in bookings:
             try:
-                # Essayer de récupérer les infos de l'étudiant via son wallet
-                student_info = None
-                student_user = await get_user_by_wallet(booking.get('studentAddress'), authorization)
-                
-                if student_user:
-                    student_info = student_user
-                # Si pas trouvé, on laisse student_info comme None (graceful fallback)
+                # Infos de l'étudiant via son wallet (None si pas trouvé: graceful fallback)
+                student_info = students.get(booking.get('studentAddress'))
                 
                 # Essayer de récupérer les infos de l'annonce
                 annonce_info = None
                 # ⚡ Récupérer l'annonceId depuis le mapping ou depuis le booking
-                annonce_id = booking.get('annonceId') or BOOKING_ANNONCE_MAP.get(booking.get('id'))
+                annonce_id = annonce_ids.get(booking.get('id'))
                 
                 if annonce_id:
-                    try:
-                        annonce_resp = requests.get(
-                            f"{blockchain_manager.auth_service_url}/api/annonces/{annonce_id}",
-                            timeout=5
-                        )
-                        if annonce_resp.status_code == 200:
-                            annonce_data = annonce_resp.json().get("data")
-                            if annonce_data:
-                                # Extraire TOUS les champs nécessaires de l'annonce
-                                annonce_info = {
-                                    "id": annonce_data.get("id"),
-                                    "title": annonce_data.get("title"),  # Le vrai titre
-                                    "subject": annonce_data.get("subject"),
-                                    "description": annonce_data.get("description"),  # La vraie description
-                                    "level": annonce_data.get("level"),
-                                    "teachingMode": annonce_data.get("teachingMode")
-                                }
-                    except:
-                        # Essayer avec tutorId
-                        try:
-                            annonce_resp = requests.get(
-                                f"{blockchain_manager.auth_service_url}/api/annonces?tutorId={tutorId}",
-                                timeout=5
-                            )
-                            if annonce_resp.status_code == 200:
-                                annonces = annonce_resp.json().get("data", [])
-                                # Chercher l'annonce par ID dans les réservations
-                                for ann in annonces:
-                                    if ann.get("id") == annonce_id:
-                                        annonce_info = {
-                                            "id": ann.get("id"),
-                                            "title": ann.get("title"),
-                                            "subject": ann.get("subject"),
-                                            "description": ann.get("description")
-                                        }
-                                        break
-                        except:
-                            pass
+                    annonce_data = annonces.get(annonce_id)
+                    if annonce_data:
+                        # Extraire TOUS les champs nécessaires de l'annonce
+                        annonce_info = {
+                            "id": annonce_data.get("id"),
+                            "title": annonce_data.get("title"),  # Le vrai titre
+                            "subject": annonce_data.get("subject"),
+                            "description": annonce_data.get("description"),  # La vraie description
+                            "level": annonce_data.get("level"),
+                            "teachingMode": annonce_data.get("teachingMode")
+                        }
+                    elif tutor_annonces and annonce_id in tutor_annonces:
+                        ann = tutor_annonces[annonce_id]
+                        annonce_info = {
+                            "id": ann.get("id"),
+                            "title": ann.get("title"),
+                            "subject": ann.get("subject"),
+                            "description": ann.get("description")
+                        }
                 
                 # Enrichir la réservation
                 booking_enriched = {
@@ -1059,44 +985,36 @@ async def get_bookings_by_student(
         await verify_user_and_get_role(studentId)
         
         # Récupérer toutes les réservations de l'étudiant depuis la blockchain
-        bookings = blockchain_manager.get_student_bookings(studentId)
+        bookings = await run_blocking(blockchain_manager.get_student_bookings, studentId)
+        
+        # ⚡ Résoudre en une passe les tuteurs et annonces distincts (au lieu d'appels par réservation)
+        annonce_ids = BOOKING_ANNONCE_MAP.get_many(booking.get('id') for booking in bookings)
+        tutors = await get_users_by_wallets([booking.get('tutorAddress') for booking in bookings], authorization)
+        annonces = await auth_client.get_annonces_many(annonce_ids.values())
         
         # Enrichir les réservations avec les données tuteur et annonces
         enriched_bookings = []
         
         for booking in bookings:
             try:
-                # Essayer de récupérer les infos du tuteur
-                tutor_info = None
-                tutor_user = await get_user_by_wallet(booking.get('tutorAddress'), authorization)
-                
-                if tutor_user:
-                    tutor_info = tutor_user
+                # Infos du tuteur
+                tutor_info = tutors.get(booking.get('tutorAddress'))
                 
                 # Essayer de récupérer les infos de l'annonce
                 annonce_info = None
                 # ⚡ Récupérer l'annonceId depuis le mapping
-                annonce_id = BOOKING_ANNONCE_MAP.get(booking.get('id'))
+                annonce_id = annonce_ids.get(booking.get('id'))
+                annonce_data = annonces.get(annonce_id) if annonce_id else None
                 
-                if annonce_id:
-                    try:
-                        annonce_resp = requests.get(
-                            f"{blockchain_manager.auth_service_url}/api/annonces/{annonce_id}",
-                            timeout=5
-                        )
-                        if annonce_resp.status_code == 200:
-                            annonce_data = annonce_resp.json().get("data")
-                            if annonce_data:
-                                annonce_info = {
-                                    "id": annonce_data.get("id"),
-                                    "title": annonce_data.get("title"),
-                                    "subject": annonce_data.get("subject"),
-                                    "description": annonce_data.get("description"),
-                                    "level": annonce_data.get("level"),
-                                    "teachingMode": annonce_data.get("teachingMode")
-                                }
-                    except:
-                        pass
+                if annonce_data:
+                    annonce_info = {
+                        "id": annonce_data.get("id"),
+                        "title": annonce_data.get("title"),
+                        "subject": annonce_data.get("subject"),
+                        "description": annonce_data.get("description"),
+                        "level": annonce_data.get("level"),
+                        "teachingMode": annonce_data.get("teachingMode")
+                    }
                 
                 # Enrichir la réservation
                 booking_enriched = {
@@ -1144,17 +1062,23 @@ async def get_all_bookings_for_user(
         logger.info(f"[GET_ALL_BOOKINGS] Récupération pour user: {userId}")
         
         # Récupérer les bookings où l'utilisateur est STUDENT
-        student_bookings = blockchain_manager.get_student_bookings(userId)
+        student_bookings = await run_blocking(blockchain_manager.get_student_bookings, userId)
         logger.info(f"[GET_ALL_BOOKINGS] Found {len(student_bookings)} bookings as student")
         
         # Récupérer les bookings où l'utilisateur est TUTOR
-        tutor_bookings = blockchain_manager.get_tutor_bookings(userId)
+        tutor_bookings = await run_blocking(blockchain_manager.get_tutor_bookings, userId)
         logger.info(f"[GET_ALL_BOOKINGS] Found {len(tutor_bookings)} bookings as tutor")
         
-        # Enrichir avec les infos utilisateur
+        # ⚡ Enrichir avec les infos utilisateur (une résolution par adresse distincte)
+        users = await get_users_by_wallets(
+            [booking.get("tutorAddress") for booking in student_bookings]
+            + [booking.get("studentAddress") for booking in tutor_bookings],
+            authorization
+        )
+        
         enriched_student_bookings = []
         for booking in student_bookings:
-            tutor_info = await get_user_by_wallet(booking.get("tutorAddress"), authorization)
+            tutor_info = users.get(booking.get("tutorAddress"))
             booking["tutor"] = {
                 "firstName": tutor_info.get("firstName", "Inconnu") if tutor_info else "Inconnu",
                 "lastName": tutor_info.get("lastName", "") if tutor_info else "",
@@ -1165,7 +1089,7 @@ async def get_all_bookings_for_user(
         
         enriched_tutor_bookings = []
         for booking in tutor_bookings:
-            student_info = await get_user_by_wallet(booking.get("studentAddress"), authorization)
+            student_info = users.get(booking.get("studentAddress"))
             booking["student"] = {
                 "firstName": student_info.get("firstName", "Inconnu") if student_info else "Inconnu",
                 "lastName": student_info.get("lastName", "") if student_info else "",
@@ -1204,22 +1128,17 @@ async def get_booking_stats(userId: str) -> Dict[str, Any]:
         # Vérifier que l'utilisateur existe
         await verify_user_and_get_role(userId)
         
-        # Dans une vraie implémentation, vous calculerez depuis la blockchain
-        # Pour la démo, nous retournons des stats vides
+        # ⚡ Compteurs de l'index (mis à jour par les événements de l'escrow), sans parcourir le contrat
+        stats = await run_blocking(blockchain_manager.get_booking_stats, userId)
+        
         return {
             "success": True,
             "message": "Statistiques récupérées",
-            "data": {
-                "total": 0,
-                "pending": 0,
-                "confirmed": 0,
-                "cancelled": 0,
-                "completed": 0,
-                "totalAmount": 0,
-                "pendingAmount": 0
-            }
+            "data": BookingStats(**stats).dict()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur récupération statistiques: {str(e)}")
 
@@ -1247,15 +1166,15 @@ async def submit_review(
         
         # Récupérer le booking ID depuis la blockchain
         try:
-            blockchain_booking_id = blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
+            blockchain_booking_id = await run_blocking(blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
                 blockchain_manager.uuid_to_bytes32(bookingId)
-            ).call()
+            ).call)
         except Exception as e:
             raise HTTPException(status_code=404, detail=f"Réservation non trouvée: {str(e)}")
         
         # Récupérer les données du booking
         try:
-            booking_data = blockchain_manager.escrow_contract.functions.getBooking(blockchain_booking_id).call()
+            booking_data = await run_blocking(blockchain_manager.escrow_contract.functions.getBooking(blockchain_booking_id).call)
         except Exception as e:
             raise HTTPException(status_code=404, detail=f"Données booking non trouvées: {str(e)}")
         
@@ -1265,7 +1184,7 @@ async def submit_review(
         
         # Convert user_id to wallet address for comparison
         try:
-            user_wallet_info = blockchain_manager.get_user_wallet(user_id)
+            user_wallet_info = await run_blocking(blockchain_manager.get_user_wallet, user_id)
             user_wallet = str(user_wallet_info.get('address', '')).lower()
         except Exception as e:
             logger.error(f"Erreur conversion user_id to wallet: {str(e)}")
@@ -1297,11 +1216,10 @@ async def submit_review(
         
         # Appeler authservice pour créer/mettre à jour l'avis
         headers = {"Authorization": authorization} if authorization else {}
-        response = requests.post(
-            f"{blockchain_manager.auth_service_url}/api/reviews",
+        response = await auth_client.post(
+            f"/api/reviews",
             json=review_payload,
-            headers=headers,
-            timeout=5
+            headers=headers
         )
         
         if response.status_code not in [200, 201]:
@@ -1337,15 +1255,15 @@ async def confirm_review(
         
         # Récupérer le booking ID depuis la blockchain
         try:
-            blockchain_booking_id = blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
+            blockchain_booking_id = await run_blocking(blockchain_manager.escrow_contract.functions.getBookingByFrontendId(
                 blockchain_manager.uuid_to_bytes32(bookingId)
-            ).call()
+            ).call)
         except Exception as e:
             raise HTTPException(status_code=404, detail=f"Réservation non trouvée: {str(e)}")
         
         # Récupérer les données du booking
         try:
-            booking_data = blockchain_manager.escrow_contract.functions.getBooking(blockchain_booking_id).call()
+            booking_data = await run_blocking(blockchain_manager.escrow_contract.functions.getBooking(blockchain_booking_id).call)
         except Exception as e:
             raise HTTPException(status_code=404, detail=f"Données booking non trouvées: {str(e)}")
         
@@ -1355,7 +1273,7 @@ async def confirm_review(
         
         # Convert user_id to wallet address for comparison
         try:
-            user_wallet_info = blockchain_manager.get_user_wallet(user_id)
+            user_wallet_info = await run_blocking(blockchain_manager.get_user_wallet, user_id)
             user_wallet = str(user_wallet_info.get('address', '')).lower()
         except Exception as e:
             logger.error(f"Erreur conversion user_id to wallet: {str(e)}")
@@ -1366,10 +1284,9 @@ async def confirm_review(
         
         # Appeler authservice pour confirmer l'avis
         headers = {"Authorization": authorization} if authorization else {}
-        response = requests.post(
-            f"{blockchain_manager.auth_service_url}/api/reviews/{bookingId}/{user_id}/confirm",
-            headers=headers,
-            timeout=5
+        response = await auth_client.post(
+            f"/api/reviews/{bookingId}/{user_id}/confirm",
+            headers=headers
         )
         
         if response.status_code not in [200, 201]:
@@ -1395,36 +1312,35 @@ async def confirm_review(
                 if now_ts < start_time:
                     logger.info("[CONFIRM_REVIEW] Cours pas encore commencé, transfert reporté")
                 else:
-                    booking_status = blockchain_manager.get_booking_status(blockchain_booking_id)
+                    booking_status = await run_blocking(blockchain_manager.get_booking_status, blockchain_booking_id)
 
                     # ✅ CORRECTION: Convertir les adresses en checksum format avant d'appeler le smart contract
                     student_wallet_checksum = blockchain_manager.w3.to_checksum_address(student_wallet)
                     tutor_wallet_checksum = blockchain_manager.w3.to_checksum_address(tutor_wallet)
                     
                     student_user_id = blockchain_manager.bytes32_to_uuid(
-                        blockchain_manager.token_contract.functions.getUserId(student_wallet_checksum).call()
+                        await run_blocking(blockchain_manager.token_contract.functions.getUserId(student_wallet_checksum).call)
                     )
                     tutor_user_id = blockchain_manager.bytes32_to_uuid(
-                        blockchain_manager.token_contract.functions.getUserId(tutor_wallet_checksum).call()
+                        await run_blocking(blockchain_manager.token_contract.functions.getUserId(tutor_wallet_checksum).call)
                     )
 
                     if student_user_id and not booking_status.get("student_confirmed"):
-                        blockchain_manager.confirm_course_outcome(blockchain_booking_id, student_user_id, True)
+                        await run_blocking(blockchain_manager.confirm_course_outcome, blockchain_booking_id, student_user_id, True)
 
                     if tutor_user_id and not booking_status.get("tutor_confirmed"):
-                        blockchain_manager.confirm_course_outcome(blockchain_booking_id, tutor_user_id, True)
+                        await run_blocking(blockchain_manager.confirm_course_outcome, blockchain_booking_id, tutor_user_id, True)
 
-                    updated_status = blockchain_manager.get_booking_status(blockchain_booking_id)
+                    updated_status = await run_blocking(blockchain_manager.get_booking_status, blockchain_booking_id)
                     money_released = updated_status.get("status") == "COMPLETED"
                     logger.info(f"✅ Statut après confirmations: {updated_status.get('status')}")
                 
                     # 🌟 Mettre à jour le rating du tuteur (calculer la moyenne de tous ses avis)
                     try:
                         logger.info(f"📊 Mise à jour rating tuteur {tutor_user_id}")
-                        rating_response = requests.post(
-                            f"{blockchain_manager.auth_service_url}/api/profile/update-rating/{tutor_user_id}",
-                            headers=headers,
-                            timeout=5
+                        rating_response = await auth_client.post(
+                            f"/api/profile/update-rating/{tutor_user_id}",
+                            headers=headers
                         )
                         if rating_response.status_code == 200:
                             rating_data = rating_response.json()
@@ -1464,10 +1380,9 @@ async def get_booking_reviews(
     try:
         headers = {"Authorization": authorization} if authorization else {}
         
-        response = requests.get(
-            f"{blockchain_manager.auth_service_url}/api/reviews/{bookingId}",
-            headers=headers,
-            timeout=5
+        response = await auth_client.get(
+            f"/api/reviews/{bookingId}",
+            headers=headers
         )
         
         if response.status_code != 200:
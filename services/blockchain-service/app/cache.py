@@ -0,0 +1,353 @@
+import os
+import json
+import time
+import uuid
+import threading
+import logging
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+try:
+    import redis
+except ImportError:  # Redis optionnel: sans lui, les caches restent locaux au worker
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS_CACHE_PREFIX = os.getenv("REDIS_CACHE_PREFIX", "edumate:blockchain")
+INVALIDATION_CHANNEL = f"{REDIS_CACHE_PREFIX}:invalidate"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+class RedisTier:
+    """
+    Second niveau partagé entre workers / réplicas (optionnel, activé par REDIS_URL):
+    - valeurs sérialisées en JSON avec leurs tags, expiration gérée par Redis
+    - un set Redis par tag pour retrouver les clés à invalider
+    - invalidations diffusées en pub/sub: chaque worker purge sa copie locale
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.instance_id = uuid.uuid4().hex
+        self.errors = 0
+        self._pubsub = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def _key(self, cache_name: str, key: Hashable) -> str:
+        return f"{REDIS_CACHE_PREFIX}:{cache_name}:{key}"
+
+    def _tag_key(self, cache_name: str, tag: Hashable) -> str:
+        return f"{REDIS_CACHE_PREFIX}:{cache_name}:tag:{tag}"
+
+    def get(self, cache_name: str, key: Hashable):
+        """Retourne (valeur, tags, ttl restant en secondes) ou _MISSING"""
+        pipe = self.client.pipeline()
+        pipe.get(self._key(cache_name, key))
+        pipe.pttl(self._key(cache_name, key))
+        raw, pttl = pipe.execute()
+        if raw is None:
+            return _MISSING
+        payload = json.loads(raw)
+        return payload["v"], payload.get("t", []), (pttl / 1000 if pttl and pttl > 0 else None)
+
+    def set(self, cache_name: str, key: Hashable, value: Any, ttl: float, tags: tuple):
+        ttl_ms = max(int(ttl * 1000), 1)
+        redis_key = self._key(cache_name, key)
+        pipe = self.client.pipeline()
+        pipe.set(redis_key, json.dumps({"v": value, "t": list(tags)}, default=_json_default), px=ttl_ms)
+        for tag in tags:
+            tag_key = self._tag_key(cache_name, tag)
+            pipe.sadd(tag_key, redis_key)
+            pipe.pexpire(tag_key, ttl_ms)
+        pipe.execute()
+
+    def delete(self, cache_name: str, key: Hashable):
+        self.client.delete(self._key(cache_name, key))
+        self._publish({"cache": cache_name, "key": key})
+
+    def invalidate_tag(self, cache_name: str, tag: Hashable):
+        tag_key = self._tag_key(cache_name, tag)
+        keys = self.client.smembers(tag_key)
+        self.client.delete(tag_key, *keys)
+        self._publish({"cache": cache_name, "tag": tag})
+
+    def _publish(self, message: Dict):
+        self.client.publish(INVALIDATION_CHANNEL, json.dumps({**message, "origin": self.instance_id}))
+
+    def start_listener(self):
+        """Écoute les invalidations des autres workers (thread daemon)"""
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(INVALIDATION_CHANNEL)
+        self._thread = threading.Thread(target=self._listen, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def _listen(self):
+        while not self._stop_event.is_set():
+            try:
+                message = self._pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                logger.warning(f"⚠️ [CACHE] Écoute des invalidations Redis interrompue: {e}")
+                self._stop_event.wait(1)
+                continue
+            if not message or message.get("type") != "message":
+                continue
+            try:
+                data = json.loads(message["data"])
+                if data.get("origin") != self.instance_id:
+                    _apply_remote_invalidation(data)
+            except Exception as e:
+                logger.debug(f"[CACHE] Message d'invalidation ignoré: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+
+
+_redis_tier: Optional[RedisTier] = None
+
+
+class TTLCache:
+    """
+    Cache mémoire borné: expiration (TTL) + éviction LRU au-delà de max_size.
+    Thread-safe (les handlers async et le pool de threads y accèdent en même temps),
+    avec compteurs hits / misses / evictions pour le suivi.
+    Chaque entrée peut porter des tags (ex: adresses wallet) pour être invalidée
+    précisément quand un événement touche ces adresses (invalidate_tag).
+    Avec shared=True et REDIS_URL défini, Redis sert de second niveau commun à tous les workers.
+    `clock` (time.monotonic par défaut) permet d'injecter une horloge contrôlée en test.
+    """
+
+    def __init__(self, name: str, max_size: int = 1024, ttl: float = 60, shared: bool = False,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self._clock = clock
+
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._key_tags: Dict[Hashable, tuple] = {}
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.remote_hits = 0
+
+        _registry.append(self)
+
+    @classmethod
+    def from_env(cls, name: str, max_size: int, ttl: float, shared: bool = False) -> "TTLCache":
+        """Crée un cache configurable via CACHE_<NAME>_MAX_SIZE et CACHE_<NAME>_TTL"""
+        prefix = f"CACHE_{name.upper()}"
+        return cls(
+            name,
+            max_size=int(os.getenv(f"{prefix}_MAX_SIZE", str(max_size))),
+            ttl=float(os.getenv(f"{prefix}_TTL", str(ttl))),
+            shared=shared
+        )
+
+    @property
+    def _remote(self) -> Optional[RedisTier]:
+        return _redis_tier if self.shared else None
+
+    def _remote_call(self, method: str, *args):
+        """Appel Redis best-effort: une panne Redis ne doit jamais faire échouer la requête"""
+        remote = self._remote
+        if remote is None:
+            return _MISSING
+        try:
+            return getattr(remote, method)(self.name, *args)
+        except Exception as e:
+            remote.errors += 1
+            logger.debug(f"[CACHE] Redis indisponible ({self.name}.{method}): {e}")
+            return _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+                self.expirations += 1
+
+        # Second niveau (hors verrou: appel réseau)
+        remote_entry = self._remote_call("get", key)
+        if remote_entry is not _MISSING:
+            value, tags, remaining_ttl = remote_entry
+            self._set_local(key, value, min(remaining_ttl or self.ttl, self.ttl), tags)
+            with self._lock:
+                self.hits += 1
+                self.remote_hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[Hashable] = ()):
+        ttl = self.ttl if ttl is None else ttl
+        tags = tuple(tags)
+        self._set_local(key, value, ttl, tags)
+        self._remote_call("set", key, value, ttl, tags)
+
+    def _set_local(self, key: Hashable, value: Any, ttl: float, tags: Iterable[Hashable] = ()):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, self._clock() + ttl)
+
+            tags = tuple(tags)
+            if tags:
+                self._key_tags[key] = tags
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._data) > self.max_size:
+                oldest_key = next(iter(self._data))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> bool:
+        if self._data.pop(key, _MISSING) is _MISSING:
+            return False
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def delete(self, key: Hashable) -> bool:
+        removed = self._delete_local(key)
+        self._remote_call("delete", key)
+        return removed
+
+    def _delete_local(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        """Supprime toutes les entrées portant ce tag (ici et dans les autres workers), retourne le nombre d'entrées locales supprimées"""
+        dropped = self._invalidate_local_tag(tag)
+        self._remote_call("invalidate_tag", tag)
+        return dropped
+
+    def _invalidate_local_tag(self, tag: Hashable) -> int:
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and entry[1] > self._clock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxSize": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "shared": self._remote is not None,
+                "remoteHits": self.remote_hits
+            }
+
+
+_registry: List[TTLCache] = []
+
+
+def _apply_remote_invalidation(message: Dict):
+    """Applique localement une invalidation publiée par un autre worker"""
+    for cache in _registry:
+        if cache.name != message.get("cache"):
+            continue
+        if "tag" in message:
+            cache._invalidate_local_tag(message["tag"])
+        elif "key" in message:
+            cache._delete_local(message["key"])
+
+
+def start_shared_cache(client=None) -> bool:
+    """
+    Active le niveau Redis (appelé au démarrage du service).
+    `client` permet d'injecter un client compatible (ex: fakeredis en test).
+    """
+    global _redis_tier
+    if client is None:
+        if not REDIS_URL:
+            return False
+        if redis is None:
+            logger.warning("⚠️ [CACHE] REDIS_URL défini mais le paquet redis n'est pas installé: caches locaux uniquement")
+            return False
+        client = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=1)
+
+    try:
+        client.ping()
+        tier = RedisTier(client)
+        tier.start_listener()
+    except Exception as e:
+        logger.warning(f"⚠️ [CACHE] Redis injoignable ({e}): caches locaux uniquement")
+        return False
+
+    _redis_tier = tier
+    logger.info("✅ [CACHE] Niveau Redis partagé activé")
+    return True
+
+
+def stop_shared_cache():
+    global _redis_tier
+    if _redis_tier is not None:
+        _redis_tier.stop()
+        _redis_tier = None
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistiques de tous les caches du service (exposées par /status)"""
+    return {cache.name: cache.stats() for cache in _registry}
@@ -0,0 +1,52 @@
+import os
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Pool borné pour les appels bloquants restants (web3 synchrone, signatures, attentes de receipts)
+# → ils ne bloquent plus la boucle d'événements d'uvicorn
+BLOCKCHAIN_EXECUTOR_WORKERS = int(os.getenv("BLOCKCHAIN_EXECUTOR_WORKERS", "16"))
+
+# Nombre maximum d'appels simultanés lors de l'enrichissement d'une liste (users, annonces...)
+ENRICH_FANOUT_LIMIT = int(os.getenv("ENRICH_FANOUT_LIMIT", "10"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=BLOCKCHAIN_EXECUTOR_WORKERS,
+    thread_name_prefix="blockchain-worker"
+)
+
+
+async def run_blocking(fn: Callable, *args, **kwargs) -> Any:
+    """Exécute une fonction bloquante dans le pool dédié sans bloquer la boucle d'événements"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def gather_bounded(fn: Callable[[Any], Awaitable], keys: Iterable, limit: int = None) -> Dict[Any, Any]:
+    """
+    Appelle fn(clé) une seule fois par clé distincte (non vide), avec au plus `limit`
+    appels simultanés, et retourne {clé: résultat} (None si l'appel a échoué)
+    """
+    semaphore = asyncio.Semaphore(limit or ENRICH_FANOUT_LIMIT)
+    distinct_keys = [key for key in dict.fromkeys(keys) if key]
+
+    async def _call(key):
+        async with semaphore:
+            try:
+                return await fn(key)
+            except Exception as e:
+                logger.warning(f"⚠️ [CONCURRENCY] Enrichissement impossible pour {key}: {e}")
+                return None
+
+    results = await asyncio.gather(*(_call(key) for key in distinct_keys))
+    return dict(zip(distinct_keys, results))
+
+
+async def shutdown():
+    """Libère le pool de threads (appelé à l'arrêt du service)"""
+    _executor.shutdown(wait=False)
+    logger.info("🛑 [CONCURRENCY] Pool de threads libéré")
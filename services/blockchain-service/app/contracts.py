@@ -39,12 +39,10 @@ class ContractManager:
             ).build_transaction({
                 'from': from_address,
                 'gas': 100000,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(from_address),
+                'gasPrice': blockchain_manager.get_gas_price(),
             })
             
-            signed_approve = self.w3.eth.account.sign_transaction(approve_tx, private_key)
-            approve_hash = self.w3.eth.send_raw_transaction(signed_approve.raw_transaction)
+            approve_hash = blockchain_manager.nonce_manager.send(approve_tx, private_key)
             self.w3.eth.wait_for_transaction_receipt(approve_hash)
         
         # Effectuer le transfert
@@ -54,12 +52,10 @@ class ContractManager:
         ).build_transaction({
             'from': from_address,
             'gas': 100000,
-            'gasPrice': self.w3.eth.gas_price,
-            'nonce': self.w3.eth.get_transaction_count(from_address) + 1,
+            'gasPrice': blockchain_manager.get_gas_price(),
         })
         
-        signed_transfer = self.w3.eth.account.sign_transaction(transfer_tx, private_key)
-        transfer_hash = self.w3.eth.send_raw_transaction(signed_transfer.raw_transaction)
+        transfer_hash = blockchain_manager.nonce_manager.send(transfer_tx, private_key)
         receipt = self.w3.eth.wait_for_transaction_receipt(transfer_hash)
         
         return {
@@ -92,9 +88,9 @@ class ContractManager:
         }
         return outcome_map.get(outcome_code, "UNKNOWN")
     
-    def format_booking(self, booking_data: tuple, escrow_data: tuple) -> Dict:
+    def format_booking(self, booking_data: tuple, escrow_data: Optional[tuple] = None) -> Dict:
         """Formatter les données de réservation depuis la blockchain"""
-        return {
+        booking = {
             "id": booking_data[0],
             "student_address": booking_data[1],
             "tutor_address": booking_data[2],
@@ -106,15 +102,19 @@ class ContractManager:
             "created_at": booking_data[8],
             "student_confirmed": booking_data[9],
             "tutor_confirmed": booking_data[10],
-            "description": booking_data[11],
-            "escrow": {
+            "description": booking_data[11]
+        }
+        
+        if escrow_data:
+            booking["escrow"] = {
                 "amount": self.w3.from_wei(escrow_data[0], 'ether'),
                 "funds_locked": escrow_data[1],
                 "funds_released": escrow_data[2],
                 "locked_at": escrow_data[3],
                 "released_at": escrow_data[4]
             }
-        }
+        
+        return booking
     
     def get_all_bookings(self) -> List[Dict]:
         """Récupérer toutes les réservations (pour debug)"""
@@ -122,15 +122,20 @@ class ContractManager:
             booking_count = self.escrow_contract.functions.getBookingCount().call()
             bookings = []
             
-            for i in range(1, booking_count + 1):
-                try:
-                    booking_data = self.escrow_contract.functions.getBooking(i).call()
-                    escrow_data = self.escrow_contract.functions.getEscrow(i).call()
-                    
-                    bookings.append(self.format_booking(booking_data, escrow_data))
-                except Exception as e:
-                    logger.warning(f"Erreur récupération booking {i}: {e}")
+            # ⚡ Lecture par lots JSON-RPC (les IDs de réservation commencent à 0)
+            # Le contrat n'expose pas de getEscrow: les fonds sont décrits par le statut du booking
+            booking_ids = list(range(booking_count))
+            bookings_data = blockchain_manager.batch_call(
+                self.escrow_contract,
+                "getBooking",
+                [(booking_id,) for booking_id in booking_ids]
+            )
+            
+            for booking_id, booking_data in zip(booking_ids, bookings_data):
+                if booking_data is None:
+                    logger.warning(f"Erreur récupération booking {booking_id}")
                     continue
+                bookings.append(self.format_booking(booking_data))
             
             return bookings
         except Exception as e:
@@ -0,0 +1,251 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from web3 import Web3
+
+from .concurrency import run_blocking
+
+logger = logging.getLogger(__name__)
+
+GAS_STATION_INTERVAL = float(os.getenv("GAS_STATION_INTERVAL", "2"))
+# Une recharge envoyée n'est pas renvoyée pendant ce délai (le temps qu'elle soit minée)
+GAS_STATION_COOLDOWN = float(os.getenv("GAS_STATION_COOLDOWN", "60"))
+# Délai conseillé au client avant de renvoyer une écriture refusée faute d'ETH (Retry-After)
+GAS_TOP_UP_RETRY_AFTER = int(os.getenv("GAS_TOP_UP_RETRY_AFTER", "5"))
+
+
+class GasTopUpPending(ValueError):
+    """Wallet sans ETH pour le gas: recharge demandée à la station, l'écriture est à renvoyer"""
+
+    def __init__(self, address: str):
+        super().__init__("ETH insuffisant pour le gas: recharge du wallet en cours, réessayez dans quelques secondes")
+        self.address = address
+        self.retry_after = GAS_TOP_UP_RETRY_AFTER
+
+
+class GasStation:
+    """
+    Recharge en ETH des wallets utilisateurs, hors du chemin des requêtes:
+    - les adresses touchées par l'indexeur (et les nouveaux wallets) sont mises en surveillance
+    - une tâche asyncio relève leurs soldes ETH en un lot eth_getBalance
+    - les wallets sous GAS_STATION_MIN_ETH reçoivent GAS_STATION_TOP_UP_ETH depuis le compte owner,
+      par lots fundWallets (repli: un transfert par wallet), sans attendre les reçus
+    Seuls les wallets enregistrés on-chain sont rechargés (jamais une adresse externe quelconque).
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.min_balance_wei = Web3.to_wei(float(os.getenv("GAS_STATION_MIN_ETH", "0.02")), "ether")
+        self.top_up_wei = Web3.to_wei(float(os.getenv("GAS_STATION_TOP_UP_ETH", "0.1")), "ether")
+        self._watched: Set[str] = set()
+        # Adresses refusées par le nœud faute de gas: relevées au prochain tour, sans attendre l'intervalle
+        self._priority: Set[str] = set()
+        self._wallets: Optional[Set[str]] = None
+        # adresse → instant d'envoi de la dernière recharge
+        self._in_flight: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._urgent: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.top_ups = 0
+        self.transactions = 0
+
+        manager.indexer.add_listener(self.watch)
+        manager.indexer.add_wallet_listener(self._on_wallets_registered)
+        manager.indexer.add_reset_listener(self._on_reset)
+
+    # ============ SURVEILLANCE ============
+
+    def _known_wallets(self) -> Set[str]:
+        if self._wallets is None:
+            self._wallets = {
+                Web3.to_checksum_address(address)
+                for address in self.manager.indexer.store.get_registered_wallets().values()
+            }
+        return self._wallets
+
+    def _on_wallets_registered(self, registrations: Dict[str, str]):
+        addresses = [Web3.to_checksum_address(address) for address in registrations.values()]
+        with self._lock:
+            self._known_wallets().update(addresses)
+        self.watch(addresses)
+
+    def _on_reset(self):
+        with self._lock:
+            self._wallets = None
+            self._watched.clear()
+            self._priority.clear()
+            self._in_flight.clear()
+
+    def watch(self, addresses: Iterable[str]):
+        """Met des adresses en surveillance (appelable depuis n'importe quel thread)"""
+        with self._lock:
+            wallets = self._known_wallets()
+            for address in addresses:
+                if not address:
+                    continue
+                address = Web3.to_checksum_address(address)
+                if address in wallets:
+                    self._watched.add(address)
+            has_work = bool(self._watched)
+
+        if has_work and self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def request_top_up(self, address: str):
+        """
+        Recharge prioritaire d'un wallet de l'utilisateur courant (le nœud a refusé sa transaction faute de gas).
+        Passe par le même relevé que la surveillance: pas de doublon si une recharge est déjà en vol (cooldown).
+        L'adresse vient du wallet dérivé côté serveur: pas besoin qu'il soit déjà indexé.
+        """
+        with self._lock:
+            self._priority.add(Web3.to_checksum_address(address))
+
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+            self._loop.call_soon_threadsafe(self._urgent.set)
+
+    # ============ TÂCHE DE FOND ============
+
+    def start(self):
+        """Démarre la surveillance (appelé dans le lifespan); tous les wallets connus sont vérifiés une fois"""
+        if self._task and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._urgent = asyncio.Event()
+        try:
+            with self._lock:
+                self._watched.update(self._known_wallets())
+        except Exception as e:
+            logger.warning(f"⚠️ [GAS] Wallets indexés illisibles: {e}")
+        self._task = asyncio.create_task(self._run(), name="gas-station")
+        logger.info(
+            f"🚀 [GAS] Station démarrée (seuil={Web3.from_wei(self.min_balance_wei, 'ether')} ETH, "
+            f"recharge={Web3.from_wei(self.top_up_wei, 'ether')} ETH)"
+        )
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("🛑 [GAS] Station arrêtée")
+
+    async def _run(self):
+        while True:
+            if not self._watched and not self._priority:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            # Une demande prioritaire reçue pendant le relevé écourte la pause qui suit
+            self._urgent.clear()
+            try:
+                await run_blocking(self.check_now)
+            except Exception as e:
+                logger.warning(f"⚠️ [GAS] Vérification des soldes en erreur: {e}")
+            try:
+                await asyncio.wait_for(self._urgent.wait(), GAS_STATION_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def check_now(self) -> List[str]:
+        """Relève les soldes ETH des adresses surveillées (prioritaires d'abord) et recharge celles sous le seuil"""
+        with self._lock:
+            addresses = list(self._priority) + list(self._watched - self._priority)
+            self._priority.clear()
+            self._watched.clear()
+        if not addresses:
+            return []
+
+        balances = self.manager.batch_rpc("eth_getBalance", [[address, "latest"] for address in addresses])
+        now = time.monotonic()
+        low = []
+        with self._lock:
+            for address, balance in zip(addresses, balances):
+                if balance is None:
+                    continue
+                if int(balance, 16) >= self.min_balance_wei:
+                    self._in_flight.pop(address, None)
+                elif now - self._in_flight.get(address, float("-inf")) > GAS_STATION_COOLDOWN:
+                    low.append(address)
+
+        if low:
+            self.top_up(low)
+        return low
+
+    # ============ RECHARGES ============
+
+    def top_up(self, addresses: List[str]) -> List:
+        """
+        Envoie la recharge des adresses (lots fundWallets si le contrat les expose), sans attendre
+        les reçus. Retourne les hashes envoyés.
+        """
+        manager = self.manager
+        owner_address = manager.owner_address
+        owner_private_key = os.getenv("BLOCKCHAIN_OWNER_PRIVATE_KEY", "").strip() or None
+        if owner_private_key and not owner_private_key.startswith("0x"):
+            owner_private_key = "0x" + owner_private_key
+        gas_price = manager.get_gas_price()
+
+        tx_hashes = []
+        singles = list(addresses)
+        if manager.contract_has_function(manager.token_address, "fundWallets(address[])"):
+            singles = []
+            for start in range(0, len(addresses), manager.onboarding_batch_size):
+                group = list(addresses[start:start + manager.onboarding_batch_size])
+                params = {'from': owner_address, 'value': self.top_up_wei * len(group), 'gasPrice': gas_price}
+                try:
+                    contract_call = manager.token_contract.functions.fundWallets(group)
+                    gas = contract_call.estimate_gas(params)
+                    tx = contract_call.build_transaction({**params, 'gas': int(gas * 1.2)})
+                except Exception as e:
+                    # Erreur passagère (solde de l'owner, RPC): ce lot seulement part en unitaire
+                    logger.warning(f"⚠️ [GAS] Estimation de fundWallets impossible ({e}), recharges unitaires")
+                    singles.extend(group)
+                    continue
+                tx_hashes.append(self._send(tx, owner_private_key, group))
+
+        for address in singles:
+            tx = {
+                'from': owner_address,
+                'to': address,
+                'value': self.top_up_wei,
+                'gas': 21000,
+                'gasPrice': gas_price,
+            }
+            tx_hashes.append(self._send(tx, owner_private_key, [address]))
+
+        sent = [tx_hash for tx_hash in tx_hashes if tx_hash is not None]
+        logger.info(f"⛽ [GAS] {len(addresses)} wallet(s) rechargé(s) en {len(sent)} transaction(s)")
+        return sent
+
+    def _send(self, tx: Dict, private_key: Optional[str], addresses: List[str]):
+        try:
+            tx_hash = self.manager.nonce_manager.send(tx, private_key)
+        except Exception as e:
+            logger.error(f"❌ [GAS] Recharge échouée pour {len(addresses)} wallet(s): {e}")
+            return None
+        now = time.monotonic()
+        with self._lock:
+            for address in addresses:
+                self._in_flight[address] = now
+        self.top_ups += len(addresses)
+        self.transactions += 1
+        return tx_hash
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "watched": len(self._watched),
+            "priority": len(self._priority),
+            "inFlight": len(self._in_flight),
+            "topUps": self.top_ups,
+            "transactions": self.transactions
+        }
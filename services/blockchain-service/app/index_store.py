@@ -0,0 +1,532 @@
+import os
+import sqlite3
+import time
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DB_PATH = str(Path(__file__).parent.parent / "data" / "index.sqlite3")
+
+# À incrémenter quand le contenu indexé change: l'index est alors reconstruit
+SCHEMA_VERSION = 7
+
+
+class IndexStore:
+    """
+    Stockage local (SQLite) de l'index des événements on-chain.
+    La blockchain reste la source de vérité: ce fichier peut être supprimé
+    à tout moment, l'indexeur le reconstruit depuis le bloc 0.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv("INDEX_DB_PATH", DEFAULT_INDEX_DB_PATH)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+        logger.info(f"✅ [INDEX] Store SQLite ouvert: {self.db_path}")
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+
+                CREATE TABLE IF NOT EXISTS transfers (
+                    tx_hash TEXT NOT NULL,
+                    log_index INTEGER NOT NULL,
+                    block_number INTEGER NOT NULL,
+                    block_hash TEXT,
+                    block_timestamp INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    from_address TEXT NOT NULL,
+                    to_address TEXT NOT NULL,
+                    amount_wei TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    description TEXT,
+                    hidden INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (tx_hash, log_index)
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_transfers_from
+                    ON transfers (from_address, block_number, log_index);
+                CREATE INDEX IF NOT EXISTS idx_transfers_to
+                    ON transfers (to_address, block_number, log_index);
+                -- Paiements d'une adresse vers l'escrow (lignes tuteur de l'historique)
+                CREATE INDEX IF NOT EXISTS idx_transfers_from_to
+                    ON transfers (from_address, to_address, block_number, log_index);
+
+                CREATE TABLE IF NOT EXISTS bookings (
+                    booking_id INTEGER PRIMARY KEY,
+                    student TEXT NOT NULL,
+                    tutor TEXT NOT NULL,
+                    amount_wei TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    start_time INTEGER NOT NULL,
+                    duration INTEGER NOT NULL,
+                    status INTEGER NOT NULL,
+                    outcome INTEGER NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    student_confirmed INTEGER NOT NULL,
+                    tutor_confirmed INTEGER NOT NULL,
+                    description TEXT,
+                    frontend_id TEXT,
+                    tx_hash TEXT,
+                    block_number INTEGER
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_bookings_student ON bookings (student, booking_id);
+                CREATE INDEX IF NOT EXISTS idx_bookings_tutor ON bookings (tutor, booking_id);
+                CREATE INDEX IF NOT EXISTS idx_bookings_tutor_created ON bookings (tutor, created_at, booking_id);
+                CREATE INDEX IF NOT EXISTS idx_bookings_tx_hash ON bookings (tx_hash);
+
+                CREATE TABLE IF NOT EXISTS wallet_registrations (
+                    user_id TEXT PRIMARY KEY,
+                    wallet_address TEXT NOT NULL,
+                    block_number INTEGER NOT NULL
+                );
+
+                -- Échanges de compétences (contrat SkillExchange), userIds en bytes32 hexadécimal
+                CREATE TABLE IF NOT EXISTS skill_exchanges (
+                    exchange_id INTEGER PRIMARY KEY,
+                    student_id TEXT NOT NULL,
+                    tutor_id TEXT NOT NULL,
+                    skill_offered TEXT,
+                    skill_requested TEXT,
+                    status INTEGER NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    frontend_id TEXT
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_skill_exchanges_student
+                    ON skill_exchanges (student_id, created_at, exchange_id);
+                CREATE INDEX IF NOT EXISTS idx_skill_exchanges_tutor
+                    ON skill_exchanges (tutor_id, created_at, exchange_id);
+
+                -- Agrégats par adresse tenus à jour à l'indexation: jour (AAAA-MM-JJ), mois (AAAA-MM), 'all'
+                CREATE TABLE IF NOT EXISTS wallet_stats (
+                    address TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    sent REAL NOT NULL DEFAULT 0,
+                    received REAL NOT NULL DEFAULT 0,
+                    sent_count INTEGER NOT NULL DEFAULT 0,
+                    received_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (address, period)
+                );
+
+                -- Compteurs de réservations par adresse, rôle (student / tutor) et statut de l'escrow
+                CREATE TABLE IF NOT EXISTS booking_stats (
+                    address TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    status INTEGER NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    amount REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (address, role, status)
+                );
+            """)
+
+    # ============ META ============
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key: str, value) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, str(value))
+            )
+
+    def get_last_block(self) -> int:
+        """Dernier bloc entièrement indexé (-1 si rien n'a encore été indexé)"""
+        return int(self.get_meta("last_block", "-1"))
+
+    def reset(self) -> None:
+        """Vide l'index (redéploiement des contrats ou chaîne réinitialisée)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM transfers")
+            self._conn.execute("DELETE FROM bookings")
+            self._conn.execute("DELETE FROM skill_exchanges")
+            self._conn.execute("DELETE FROM wallet_registrations")
+            self._conn.execute("DELETE FROM wallet_stats")
+            self._conn.execute("DELETE FROM booking_stats")
+            self._conn.execute("DELETE FROM meta WHERE key = 'last_block'")
+        logger.warning("⚠️ [INDEX] Index vidé, reconstruction depuis le bloc 0")
+
+    # ============ TRANSFERS ============
+
+    def apply_block_range(self, transfers: Iterable[Dict], bookings: Iterable[Dict], last_block: int,
+                          wallets: Iterable[Dict] = (), exchanges: Iterable[Dict] = ()) -> None:
+        """
+        Enregistre les transferts, réservations, échanges et enregistrements de wallets d'une plage de
+        blocs et avance le curseur dans la même transaction (pas de trou ni de doublon si on crash au milieu)
+        """
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO wallet_registrations (user_id, wallet_address, block_number)
+                VALUES (:user_id, :wallet_address, :block_number)
+            """, list(wallets))
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO skill_exchanges (
+                    exchange_id, student_id, tutor_id, skill_offered, skill_requested,
+                    status, created_at, frontend_id
+                ) VALUES (
+                    :exchange_id, :student_id, :tutor_id, :skill_offered, :skill_requested,
+                    :status, :created_at, :frontend_id
+                )
+            """, list(exchanges))
+            for booking in bookings:
+                self._upsert_booking(booking)
+            transfers = list(transfers)
+            self._add_to_wallet_stats(transfers)
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO transfers (
+                    tx_hash, log_index, block_number, block_hash, block_timestamp,
+                    event, from_address, to_address, amount_wei, amount, description, hidden
+                ) VALUES (
+                    :tx_hash, :log_index, :block_number, :block_hash, :block_timestamp,
+                    :event, :from_address, :to_address, :amount_wei, :amount, :description, :hidden
+                )
+            """, transfers)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_block', ?)",
+                (str(last_block),)
+            )
+
+    @staticmethod
+    def stats_periods(timestamp: float) -> Tuple[str, str]:
+        """Clés (jour, mois) d'un timestamp, en heure locale comme l'affichage de l'historique"""
+        local = time.localtime(timestamp)
+        return time.strftime("%Y-%m-%d", local), time.strftime("%Y-%m", local)
+
+    def _add_to_wallet_stats(self, transfers: List[Dict]) -> None:
+        """
+        Ajoute les transferts visibles aux agrégats (appelé dans la transaction de apply_block_range,
+        avant leur insertion). Un transfert déjà indexé n'est pas recompté.
+        Un transfert vers soi-même compte une seule fois, comme envoi.
+        """
+        deltas: Dict[Tuple[str, str], List[float]] = {}
+        for row in transfers:
+            if row['hidden']:
+                continue
+            exists = self._conn.execute(
+                "SELECT 1 FROM transfers WHERE tx_hash = ? AND log_index = ?",
+                (row['tx_hash'], row['log_index'])
+            ).fetchone()
+            if exists:
+                continue
+            day, month = self.stats_periods(row['block_timestamp'])
+            sides = [(row['from_address'], 0)]
+            if row['to_address'] != row['from_address']:
+                sides.append((row['to_address'], 1))
+            for address, side in sides:
+                for period in (day, month, "all"):
+                    delta = deltas.setdefault((address, period), [0.0, 0.0, 0, 0])
+                    delta[side] += row['amount']
+                    delta[side + 2] += 1
+
+        self._conn.executemany("""
+            INSERT INTO wallet_stats (address, period, sent, received, sent_count, received_count)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (address, period) DO UPDATE SET
+                sent = sent + excluded.sent,
+                received = received + excluded.received,
+                sent_count = sent_count + excluded.sent_count,
+                received_count = received_count + excluded.received_count
+        """, [(address, period, *delta) for (address, period), delta in deltas.items()])
+
+    def get_wallet_stats(self, address: str, day: str, month: str) -> Dict[str, Dict]:
+        """Agrégats {"today", "monthly", "allTime"} d'une adresse: 3 lectures par clé primaire"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM wallet_stats WHERE address = ? AND period IN (?, ?, 'all')",
+                (address, day, month)
+            ).fetchall()
+        by_period = {row["period"]: dict(row) for row in rows}
+        empty = {"sent": 0.0, "received": 0.0, "sent_count": 0, "received_count": 0}
+        return {
+            "today": by_period.get(day, empty),
+            "monthly": by_period.get(month, empty),
+            "allTime": by_period.get("all", empty)
+        }
+
+    # ============ HISTORIQUE ============
+
+    @staticmethod
+    def _key_filters(key: Tuple[str, str, str, str], before: Optional[Tuple[int, int, int, int]],
+                     start_time: Optional[int], end_time: Optional[int]) -> Tuple[List[str], list]:
+        """
+        Curseur et bornes de dates d'une branche de l'historique, exprimés sur ses colonnes de clé
+        (timestamp, bloc, logIndex, sous-clé). Curseur = clé de la dernière ligne rendue.
+        """
+        timestamp, block_number, log_index, sub = key
+        clauses, params = [], []
+        if before is not None:
+            clauses.append(f"({timestamp}, {block_number}, {log_index}, {sub}) < (?, ?, ?, ?)")
+            # Borne simple sur le timestamp: exploitable par les index (adresse, date)
+            clauses.append(f"{timestamp} <= ?")
+            params += [*before, before[0]]
+        if start_time is not None:
+            clauses.append(f"{timestamp} >= ?")
+            params.append(start_time)
+        if end_time is not None:
+            clauses.append(f"{timestamp} <= ?")
+            params.append(end_time)
+        return clauses, params
+
+    def _history_branches(self, address: str, user_key: Optional[str], escrow_address: Optional[str],
+                          before, start_time, end_time, direction) -> List[Tuple[str, list, str]]:
+        """
+        Branches de l'historique d'une adresse: (SELECT, paramètres, tri propre à la branche).
+        Chaque branche rend (kind, ts, blk, li, sub, ref); la clé (ts, blk, li, sub) ordonne le flux fusionné:
+        - transfer: transferts visibles envoyés / reçus, sous-clé 1
+        - booking_companion: ligne "entrante" tuteur d'un paiement vers l'escrow lié à une réservation, sous-clé 0
+        - tutor_booking: réservations dont l'adresse est le tuteur (entrantes), logIndex -1, sous-clé bookingId
+        - skill_exchange: échanges de l'utilisateur (entrants s'il est tuteur), logIndex -2, sous-clé exchangeId
+        """
+        branches = []
+
+        transfer_key = ("block_timestamp", "block_number", "log_index")
+        transfer_order = "block_number DESC, log_index DESC"
+
+        def transfer_branch(kind: str, sub: int, condition: str, condition_params: list):
+            clauses, params = self._key_filters((*transfer_key, str(sub)), before, start_time, end_time)
+            if before is not None and before[1] >= 0:
+                # Timestamps croissants avec les blocs: borne exploitable par les index (adresse, bloc)
+                clauses.append("block_number <= ?")
+                params.append(before[1])
+            where = " AND ".join([condition, "hidden = 0", *clauses])
+            branches.append((
+                f"SELECT '{kind}' AS kind, block_timestamp AS ts, block_number AS blk, log_index AS li, "
+                f"{sub} AS sub, tx_hash AS ref FROM transfers WHERE {where}",
+                [*condition_params, *params],
+                transfer_order
+            ))
+
+        if direction != "incoming":
+            transfer_branch("transfer", 1, "from_address = ?", [address])
+            if escrow_address:
+                transfer_branch(
+                    "booking_companion", 0,
+                    "from_address = ? AND to_address = ? AND EXISTS "
+                    "(SELECT 1 FROM bookings WHERE bookings.tx_hash = transfers.tx_hash)",
+                    [address, escrow_address]
+                )
+        if direction != "outgoing":
+            # Sans filtre de direction, un transfert vers soi-même est déjà rendu par la branche "envoyés"
+            if direction is None:
+                transfer_branch("transfer", 1, "to_address = ? AND from_address != ?", [address, address])
+            else:
+                transfer_branch("transfer", 1, "to_address = ?", [address])
+
+        if user_key is None:
+            return branches
+
+        if direction != "outgoing":
+            # Réservations payées par l'adresse elle-même: déjà rendues via son transfert vers l'escrow
+            clauses, params = self._key_filters(
+                ("created_at", "COALESCE(block_number, -1)", "-1", "booking_id"), before, start_time, end_time
+            )
+            where = " AND ".join(["tutor = ?", "student != ?", *clauses])
+            branches.append((
+                "SELECT 'tutor_booking' AS kind, created_at AS ts, COALESCE(block_number, -1) AS blk, "
+                f"-1 AS li, booking_id AS sub, booking_id AS ref FROM bookings WHERE {where}",
+                [address, address, *params],
+                "created_at DESC, booking_id DESC"
+            ))
+
+        exchange_key = ("created_at", "-1", "-2", "exchange_id")
+        exchange_sides = []
+        if direction != "outgoing":
+            exchange_sides.append(("tutor_id = ?", [user_key]))
+        if direction != "incoming":
+            exchange_sides.append(("student_id = ? AND tutor_id != ?", [user_key, user_key]))
+        for condition, condition_params in exchange_sides:
+            clauses, params = self._key_filters(exchange_key, before, start_time, end_time)
+            where = " AND ".join([condition, *clauses])
+            branches.append((
+                "SELECT 'skill_exchange' AS kind, created_at AS ts, -1 AS blk, -2 AS li, "
+                f"exchange_id AS sub, exchange_id AS ref FROM skill_exchanges WHERE {where}",
+                [*condition_params, *params],
+                "created_at DESC, exchange_id DESC"
+            ))
+
+        return branches
+
+    def get_history_for_address(self, address: str, limit: int = 20, user_key: Optional[str] = None,
+                                escrow_address: Optional[str] = None,
+                                before: Optional[Tuple[int, int, int, int]] = None,
+                                start_time: Optional[int] = None, end_time: Optional[int] = None,
+                                direction: Optional[str] = None, offset: int = 0) -> List[Dict]:
+        """
+        Lignes de l'historique d'une adresse, de la plus récente à la plus ancienne:
+        [{"kind", "key", "row"}] (row = ligne de transfers, bookings ou skill_exchanges).
+        ⚡ Curseur, dates et direction appliqués en SQL dans chaque branche, chaque branche bornée à
+        offset + limit lignes par son index → une page par curseur coûte autant que la première.
+        offset (pagination historique par numéro de page) reste proportionnel à la profondeur.
+        user_key: userId en bytes32 hexadécimal (None: ni réservations côté tuteur, ni échanges).
+        """
+        branches = self._history_branches(address, user_key, escrow_address, before, start_time, end_time, direction)
+        window = offset + limit
+        parts, params = [], []
+        for query, branch_params, order_by in branches:
+            parts.append(f"SELECT * FROM ({query} ORDER BY {order_by} LIMIT ?)")
+            params += [*branch_params, window]
+
+        with self._lock:
+            rows = self._conn.execute(
+                " UNION ALL ".join(parts) + " ORDER BY ts DESC, blk DESC, li DESC, sub DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            ).fetchall()
+
+            items = []
+            for row in rows:
+                if row["kind"] == "tutor_booking":
+                    data = self._conn.execute("SELECT * FROM bookings WHERE booking_id = ?", (row["ref"],)).fetchone()
+                elif row["kind"] == "skill_exchange":
+                    data = self._conn.execute(
+                        "SELECT * FROM skill_exchanges WHERE exchange_id = ?", (row["ref"],)
+                    ).fetchone()
+                else:
+                    data = self._conn.execute(
+                        "SELECT * FROM transfers WHERE tx_hash = ? AND log_index = ?", (row["ref"], row["li"])
+                    ).fetchone()
+                items.append({
+                    "kind": row["kind"],
+                    "key": (row["ts"], row["blk"], row["li"], row["sub"]),
+                    "row": dict(data)
+                })
+        return items
+
+    def count_history_for_address(self, address: str, user_key: Optional[str] = None,
+                                  escrow_address: Optional[str] = None, start_time: Optional[int] = None,
+                                  end_time: Optional[int] = None, direction: Optional[str] = None) -> int:
+        """Nombre de lignes de l'historique avec les mêmes branches et filtres que get_history_for_address"""
+        branches = self._history_branches(address, user_key, escrow_address, None, start_time, end_time, direction)
+        query = " UNION ALL ".join(branch for branch, _, _ in branches)
+        params = [param for _, branch_params, _ in branches for param in branch_params]
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+
+    # ============ BOOKINGS ============
+
+    def _upsert_booking(self, booking: Dict) -> None:
+        """
+        Met à jour la projection d'une réservation. Le hash de la transaction de
+        création n'est connu que lors du BookingCreated: on le conserve ensuite.
+        ⚡ Les compteurs booking_stats suivent le changement de statut (ancien -1, nouveau +1)
+        """
+        previous = self._conn.execute(
+            "SELECT status FROM bookings WHERE booking_id = ?", (booking['booking_id'],)
+        ).fetchone()
+        if previous is None or previous["status"] != booking['status']:
+            if previous is not None:
+                self._add_to_booking_stats(booking, previous["status"], -1)
+            self._add_to_booking_stats(booking, booking['status'], 1)
+
+        self._conn.execute("""
+            INSERT INTO bookings (
+                booking_id, student, tutor, amount_wei, amount, start_time, duration,
+                status, outcome, created_at, student_confirmed, tutor_confirmed,
+                description, frontend_id, tx_hash, block_number
+            ) VALUES (
+                :booking_id, :student, :tutor, :amount_wei, :amount, :start_time, :duration,
+                :status, :outcome, :created_at, :student_confirmed, :tutor_confirmed,
+                :description, :frontend_id, :tx_hash, :block_number
+            )
+            ON CONFLICT (booking_id) DO UPDATE SET
+                status = excluded.status,
+                outcome = excluded.outcome,
+                student_confirmed = excluded.student_confirmed,
+                tutor_confirmed = excluded.tutor_confirmed,
+                tx_hash = COALESCE(bookings.tx_hash, excluded.tx_hash),
+                block_number = COALESCE(bookings.block_number, excluded.block_number)
+        """, booking)
+
+    def _add_to_booking_stats(self, booking: Dict, status: int, sign: int) -> None:
+        rows = [(booking['student'], "student", status, sign, sign * booking['amount'])]
+        # Réservation de soi-même: une seule ligne, sinon elle serait comptée deux fois pour l'adresse
+        if booking['tutor'].lower() != booking['student'].lower():
+            rows.append((booking['tutor'], "tutor", status, sign, sign * booking['amount']))
+        self._conn.executemany("""
+            INSERT INTO booking_stats (address, role, status, count, amount)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (address, role, status) DO UPDATE SET
+                count = count + excluded.count,
+                amount = amount + excluded.amount
+        """, rows)
+
+    def get_booking_stats(self, address: str) -> Dict[int, Dict]:
+        """Compteurs {statut: {"count", "amount"}} d'une adresse, rôles étudiant et tuteur confondus"""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT status, SUM(count) AS count, SUM(amount) AS amount
+                FROM booking_stats WHERE address = ?
+                GROUP BY status
+            """, (address,)).fetchall()
+        return {row["status"]: {"count": row["count"], "amount": row["amount"]} for row in rows}
+
+    def get_bookings_by_student(self, address: str) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM bookings WHERE student = ? ORDER BY booking_id",
+                (address,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_bookings_by_tutor(self, address: str) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM bookings WHERE tutor = ? ORDER BY booking_id",
+                (address,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_booking_by_tx(self, tx_hash: str) -> Optional[Dict]:
+        """Réservation créée par une transaction donnée (transferFrom étudiant → escrow)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM bookings WHERE tx_hash = ?",
+                (tx_hash,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    # ============ SKILL EXCHANGES ============
+
+    def get_skill_exchanges_for_user(self, user_key: str) -> List[Dict]:
+        """Échanges d'un utilisateur (élève ou tuteur), userId en bytes32 hexadécimal"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM skill_exchanges WHERE student_id = ? OR tutor_id = ? ORDER BY exchange_id",
+                (user_key, user_key)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    # ============ WALLETS ============
+
+    def get_registered_wallet(self, user_id: str) -> Optional[str]:
+        """Adresse enregistrée on-chain pour un userId (UUID canonique), None si inconnue de l'index"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT wallet_address FROM wallet_registrations WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+        return row["wallet_address"] if row else None
+
+    def get_registered_wallets(self) -> Dict[str, str]:
+        """Tous les enregistrements indexés: {userId: adresse}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, wallet_address FROM wallet_registrations").fetchall()
+        return {row["user_id"]: row["wallet_address"] for row in rows}
@@ -0,0 +1,457 @@
+import os
+import threading
+import logging
+from typing import Callable, Dict, List, Set
+
+from web3 import Web3
+
+from .index_store import IndexStore, SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
+
+INITIAL_BALANCE_EDU = 600.0
+
+
+class EventIndexer:
+    """
+    Indexeur incrémental des événements on-chain:
+    - token: Transfer / EduTransfer (historique des transactions)
+    - token: WalletRegistered (userId → adresse, l'enregistrement est définitif)
+    - escrow: cycle de vie des réservations (projection des bookings par adresse)
+    - skill exchange: cycle de vie des échanges de compétences (projection par userId)
+    Un thread suit les nouveaux blocs, décode chaque log une seule fois et le
+    range dans l'IndexStore: les lectures deviennent de simples requêtes locales.
+    """
+
+    def __init__(self, manager, store: IndexStore = None):
+        self.manager = manager
+        self.w3 = manager.w3
+        self.store = store or IndexStore()
+
+        self.poll_interval = float(os.getenv("INDEXER_POLL_INTERVAL", "2"))
+        self.block_chunk = int(os.getenv("INDEXER_BLOCK_CHUNK", "2000"))
+
+        self.transfer_topic = Web3.to_hex(Web3.keccak(text="Transfer(address,address,uint256)"))
+        self.edu_transfer_topic = Web3.to_hex(Web3.keccak(text="EduTransfer(address,address,uint256,string,uint256)"))
+        self.wallet_registered_topic = Web3.to_hex(Web3.keccak(text="WalletRegistered(bytes32,address)"))
+        self.booking_topics = {
+            Web3.to_hex(Web3.keccak(text=signature)): name
+            for name, signature in (
+                ("BookingCreated", "BookingCreated(uint256,bytes32,address,address,uint256,uint256,string)"),
+                ("BookingConfirmed", "BookingConfirmed(uint256,address)"),
+                ("BookingCancelled", "BookingCancelled(uint256,address,string)"),
+                ("BookingCompleted", "BookingCompleted(uint256)"),
+                ("OutcomeConfirmed", "OutcomeConfirmed(uint256,address,bool)"),
+            )
+        }
+        self.exchange_topics = {
+            Web3.to_hex(Web3.keccak(text=signature)): name
+            for name, signature in (
+                ("ExchangeCreated", "ExchangeCreated(uint256,bytes32,bytes32,string,string,uint256,bytes32)"),
+                ("ExchangeAccepted", "ExchangeAccepted(uint256,bytes32,uint256)"),
+                ("ExchangeRejected", "ExchangeRejected(uint256,bytes32,uint256)"),
+                ("ExchangeCompleted", "ExchangeCompleted(uint256,uint256)"),
+            )
+        }
+
+        self._listeners: List[Callable[[Set[str]], None]] = []
+        self._wallet_listeners: List[Callable[[Dict[str, str]], None]] = []
+        self._reset_listeners: List[Callable[[], None]] = []
+        self._sync_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._check_contracts()
+
+    def _check_contracts(self):
+        """Vide l'index si les contrats ont été redéployés (ou le format de l'index modifié)"""
+        token_address = self.store.get_meta("token_address")
+        escrow_address = self.store.get_meta("escrow_address")
+        skill_exchange_address = self.store.get_meta("skill_exchange_address")
+        schema_version = self.store.get_meta("schema_version")
+
+        if (
+            token_address != self.manager.token_address
+            or escrow_address != self.manager.escrow_address
+            or skill_exchange_address != self.manager.skill_exchange_address
+            or schema_version != str(SCHEMA_VERSION)
+        ):
+            if token_address is not None:
+                logger.info("🔄 [INDEX] Nouveaux contrats ou nouveau format d'index détectés")
+            self._reset_store()
+            self.store.set_meta("token_address", self.manager.token_address)
+            self.store.set_meta("escrow_address", self.manager.escrow_address)
+            self.store.set_meta("skill_exchange_address", self.manager.skill_exchange_address)
+            self.store.set_meta("schema_version", SCHEMA_VERSION)
+
+    @property
+    def owner_address(self) -> str:
+        return self.manager.owner_address
+
+    def add_listener(self, callback: Callable[[Set[str]], None]):
+        """Enregistre un callback appelé avec les adresses touchées par chaque lot de blocs indexé"""
+        self._listeners.append(callback)
+
+    def add_wallet_listener(self, callback: Callable[[Dict[str, str]], None]):
+        """Callback appelé avec les nouveaux enregistrements de wallets indexés ({userId: adresse})"""
+        self._wallet_listeners.append(callback)
+
+    def add_reset_listener(self, callback: Callable[[], None]):
+        """Callback appelé quand l'index est vidé (redéploiement ou chaîne réinitialisée)"""
+        self._reset_listeners.append(callback)
+
+    def _reset_store(self):
+        self.store.reset()
+        for callback in self._reset_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"⚠️ [INDEX] Listener en erreur: {e}")
+
+    def _notify_wallets(self, wallets: List[Dict]):
+        if not wallets:
+            return
+        registrations = {row['user_id']: row['wallet_address'] for row in wallets}
+        for callback in self._wallet_listeners:
+            try:
+                callback(registrations)
+            except Exception as e:
+                logger.warning(f"⚠️ [INDEX] Listener en erreur: {e}")
+
+    def _notify(self, transfers: List[Dict], bookings: List[Dict], exchanges: List[Dict] = ()):
+        addresses = set()
+        for row in transfers:
+            addresses.update((row['from_address'], row['to_address']))
+        for row in bookings:
+            addresses.update((row['student'], row['tutor']))
+        for row in exchanges:
+            # Échanges rattachés à des userIds: adresses retrouvées via les enregistrements indexés
+            for user_key in (row['student_id'], row['tutor_id']):
+                user_id = self.manager.bytes32_to_uuid(bytes.fromhex(user_key))
+                addresses.add(self.store.get_registered_wallet(user_id) if user_id else None)
+        addresses.discard(None)
+        if not addresses:
+            return
+        for callback in self._listeners:
+            try:
+                callback(addresses)
+            except Exception as e:
+                logger.warning(f"⚠️ [INDEX] Listener en erreur: {e}")
+
+    # ============ BOUCLE DE SUIVI ============
+
+    def start(self):
+        """Démarre le suivi des nouveaux blocs en arrière-plan"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="event-indexer", daemon=True)
+        self._thread.start()
+        logger.info(f"🚀 [INDEX] Indexeur démarré (poll={self.poll_interval}s, chunk={self.block_chunk} blocs)")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        logger.info("🛑 [INDEX] Indexeur arrêté")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning(f"⚠️ [INDEX] Erreur de synchronisation: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    def sync(self) -> int:
+        """
+        Rattrape l'index jusqu'au bloc courant et retourne ce bloc.
+        Appelé par le thread de suivi, mais aussi par les lectures pour
+        voir immédiatement les transactions qui viennent d'être minées.
+        """
+        with self._sync_lock:
+            head = self.w3.eth.block_number
+            last_block = self.store.get_last_block()
+
+            if last_block > head:
+                # Ganache redémarré sans persistance: la chaîne est repartie de zéro
+                logger.warning(f"⚠️ [INDEX] Chaîne plus courte que l'index ({head} < {last_block})")
+                self._reset_store()
+                last_block = -1
+
+            while last_block < head:
+                from_block = last_block + 1
+                to_block = min(from_block + self.block_chunk - 1, head)
+
+                logs = self.w3.eth.get_logs({
+                    'fromBlock': from_block,
+                    'toBlock': to_block,
+                    'address': [
+                        self.manager.token_address,
+                        self.manager.escrow_address,
+                        self.manager.skill_exchange_address
+                    ]
+                })
+                token_logs = [log for log in logs if log['address'] == self.manager.token_address]
+                escrow_logs = [log for log in logs if log['address'] == self.manager.escrow_address]
+                exchange_logs = [log for log in logs if log['address'] == self.manager.skill_exchange_address]
+
+                transfers = self._decode_token_logs(token_logs)
+                bookings = self._decode_escrow_logs(escrow_logs)
+                wallets = self._decode_wallet_logs(token_logs)
+                exchanges = self._decode_exchange_logs(exchange_logs)
+                self.store.apply_block_range(transfers, bookings, to_block, wallets, exchanges)
+                self._notify(transfers, bookings, exchanges)
+                self._notify_wallets(wallets)
+
+                if transfers or bookings or wallets or exchanges:
+                    logger.info(
+                        f"📥 [INDEX] Blocs {from_block}-{to_block}: "
+                        f"{len(transfers)} transferts, {len(bookings)} réservations, "
+                        f"{len(exchanges)} échanges, {len(wallets)} wallets indexés"
+                    )
+                last_block = to_block
+
+            return head
+
+    # ============ DÉCODAGE ============
+
+    def _decode_token_logs(self, logs: List) -> List[Dict]:
+        """Décode les logs du token en lignes prêtes pour l'IndexStore"""
+        rows = []
+        edu_events = []
+        escrow_address = self.manager.escrow_address
+
+        logs = [
+            log for log in logs
+            if log['topics'] and Web3.to_hex(log['topics'][0]) in (self.transfer_topic, self.edu_transfer_topic)
+        ]
+        # ⚡ En-têtes de tous les blocs distincts du lot: cache + un seul lot JSON-RPC
+        headers = self.manager.get_block_headers(log['blockNumber'] for log in logs)
+
+        for log in logs:
+            topic0 = Web3.to_hex(log['topics'][0])
+
+            try:
+                block_number = log['blockNumber']
+                header = headers[block_number]
+
+                if topic0 == self.edu_transfer_topic:
+                    event = self.manager.token_contract.events.EduTransfer().process_log(log)
+                    amount_wei = event['args']['amount']
+                    description = event['args']['description']
+                else:
+                    event = self.manager.token_contract.events.Transfer().process_log(log)
+                    amount_wei = event['args']['value']
+                    description = None
+
+                from_address = event['args']['from']
+                to_address = event['args']['to']
+                amount = float(Web3.from_wei(amount_wei, 'ether'))
+
+                row = {
+                    "tx_hash": Web3.to_hex(log['transactionHash']),
+                    "log_index": log['logIndex'],
+                    "block_number": block_number,
+                    "block_hash": header['hash'],
+                    "block_timestamp": header['timestamp'],
+                    "event": event['event'],
+                    "from_address": from_address,
+                    "to_address": to_address,
+                    "amount_wei": str(amount_wei),
+                    "amount": amount,
+                    "description": description,
+                    "hidden": 0
+                }
+
+                if row['event'] == 'EduTransfer':
+                    edu_events.append(row)
+                    continue
+
+                # Initialisation (owner → user, 600 EDU) et libérations de l'escrow:
+                # déjà représentées ailleurs, on les garde mais masquées
+                if from_address == escrow_address or (
+                    from_address == self.owner_address and amount == INITIAL_BALANCE_EDU
+                ):
+                    row['hidden'] = 1
+
+                rows.append(row)
+            except Exception as e:
+                logger.warning(f"⚠️ [INDEX] Log ignoré ({log.get('transactionHash')}): {e}")
+
+        # transferWithDescription émet Transfer + EduTransfer: fusionner la description
+        # dans le Transfer correspondant plutôt que d'afficher deux lignes
+        for edu in edu_events:
+            match = next((
+                row for row in rows
+                if row['tx_hash'] == edu['tx_hash']
+                and row['event'] == 'Transfer'
+                and row['from_address'] == edu['from_address']
+                and row['to_address'] == edu['to_address']
+                and row['amount_wei'] == edu['amount_wei']
+            ), None)
+
+            if match:
+                match['event'] = 'EduTransfer'
+                match['description'] = edu['description']
+                match['hidden'] = 0
+            else:
+                rows.append(edu)
+
+        return rows
+
+    def _decode_wallet_logs(self, logs: List) -> List[Dict]:
+        """WalletRegistered(bytes32 indexed userId, address walletAddress) → lignes wallet_registrations"""
+        rows = []
+        for log in logs:
+            if len(log['topics']) < 2 or Web3.to_hex(log['topics'][0]) != self.wallet_registered_topic:
+                continue
+            try:
+                user_id = self.manager.bytes32_to_uuid(bytes(log['topics'][1]))
+                if not user_id:
+                    continue
+                rows.append({
+                    "user_id": user_id,
+                    "wallet_address": Web3.to_checksum_address(bytes(log['data'])[-20:]),
+                    "block_number": log['blockNumber']
+                })
+            except Exception as e:
+                logger.warning(f"⚠️ [INDEX] Log WalletRegistered ignoré ({log.get('transactionHash')}): {e}")
+        return rows
+
+    def _decode_escrow_logs(self, logs: List) -> List[Dict]:
+        """
+        Repère les réservations modifiées dans les logs de l'escrow et relit leur
+        état courant avec getBooking (seulement les réservations touchées)
+        """
+        changed = {}
+
+        for log in logs:
+            if not log['topics']:
+                continue
+            event_name = self.booking_topics.get(Web3.to_hex(log['topics'][0]))
+            if not event_name:
+                continue
+
+            try:
+                event = getattr(self.manager.escrow_contract.events, event_name)().process_log(log)
+                booking_id = event['args']['bookingId']
+
+                if event_name == 'BookingCreated':
+                    changed[booking_id] = {
+                        "tx_hash": Web3.to_hex(log['transactionHash']),
+                        "block_number": log['blockNumber']
+                    }
+                else:
+                    changed.setdefault(booking_id, {"tx_hash": None, "block_number": None})
+            except Exception as e:
+                logger.warning(f"⚠️ [INDEX] Log escrow ignoré ({log.get('transactionHash')}): {e}")
+
+        # ⚡ Relecture par lots JSON-RPC (reconstruction complète = quelques requêtes HTTP)
+        booking_ids = list(changed.keys())
+        bookings_data = self.manager.batch_call(
+            self.manager.escrow_contract,
+            "getBooking",
+            [(booking_id,) for booking_id in booking_ids]
+        )
+
+        bookings = []
+        for booking_id, booking_data in zip(booking_ids, bookings_data):
+            if booking_data is None:
+                logger.warning(f"⚠️ [INDEX] Lecture du booking {booking_id} impossible")
+                continue
+            bookings.append(self._booking_row(booking_id, booking_data, changed[booking_id]))
+
+        return bookings
+
+    def _decode_exchange_logs(self, logs: List) -> List[Dict]:
+        """
+        Repère les échanges modifiés dans les logs du contrat SkillExchange et relit leur
+        état courant avec getExchange (seulement les échanges touchés), comme les réservations
+        """
+        changed = []
+
+        for log in logs:
+            if not log['topics']:
+                continue
+            event_name = self.exchange_topics.get(Web3.to_hex(log['topics'][0]))
+            if not event_name:
+                continue
+
+            try:
+                event = getattr(self.manager.skill_exchange_contract.events, event_name)().process_log(log)
+                exchange_id = event['args']['exchangeId']
+                if exchange_id not in changed:
+                    changed.append(exchange_id)
+            except Exception as e:
+                logger.warning(f"⚠️ [INDEX] Log skill exchange ignoré ({log.get('transactionHash')}): {e}")
+
+        # ⚡ Relecture par lots JSON-RPC
+        exchanges_data = self.manager.batch_call(
+            self.manager.skill_exchange_contract,
+            "getExchange",
+            [(exchange_id,) for exchange_id in changed]
+        )
+
+        exchanges = []
+        for exchange_id, exchange_data in zip(changed, exchanges_data):
+            if exchange_data is None:
+                logger.warning(f"⚠️ [INDEX] Lecture de l'échange {exchange_id} impossible")
+                continue
+            (
+                student_id,
+                tutor_id,
+                skill_offered,
+                skill_requested,
+                status,
+                created_at,
+                frontend_id
+            ) = exchange_data
+            exchanges.append({
+                "exchange_id": exchange_id,
+                "student_id": bytes(student_id).hex(),
+                "tutor_id": bytes(tutor_id).hex(),
+                "skill_offered": skill_offered,
+                "skill_requested": skill_requested,
+                "status": status,
+                "created_at": created_at,
+                "frontend_id": bytes(frontend_id).hex()
+            })
+
+        return exchanges
+
+    def _booking_row(self, booking_id: int, booking_data, creation: Dict) -> Dict:
+        (
+            _id,
+            student,
+            tutor,
+            amount,
+            start_time,
+            duration,
+            status,
+            outcome,
+            created_at,
+            student_confirmed,
+            tutor_confirmed,
+            description,
+            frontend_id
+        ) = booking_data
+
+        return {
+            "booking_id": booking_id,
+            "student": student,
+            "tutor": tutor,
+            "amount_wei": str(amount),
+            "amount": float(Web3.from_wei(amount, 'ether')),
+            "start_time": start_time,
+            "duration": duration,
+            "status": status,
+            "outcome": outcome,
+            "created_at": created_at,
+            "student_confirmed": int(student_confirmed),
+            "tutor_confirmed": int(tutor_confirmed),
+            "description": description,
+            "frontend_id": bytes(frontend_id).hex(),
+            "tx_hash": creation["tx_hash"],
+            "block_number": creation["block_number"]
+        }
@@ -14,6 +14,10 @@ env_path = Path(__file__).parent.parent / ".env"
 load_dotenv(dotenv_path=env_path, override=False)  # Ne pas overrider les variables Docker
 
 from .blockchain import blockchain_manager
+from . import concurrency
+from .concurrency import run_blocking
+from .auth_client import auth_client
+from .cache import cache_stats, start_shared_cache, stop_shared_cache
 from .wallet import router as wallet_router
 from .booking import router as booking_router
 from .skill_exchange import router as skill_exchange_router
@@ -35,6 +39,9 @@ async def lifespan(app: FastAPI):
     logger.info("DÉMARRAGE DU SERVICE BLOCKCHAIN EDUCOIN")
     logger.info("=" * 60)
     
+    # Niveau de cache Redis partagé entre workers (optionnel, REDIS_URL)
+    start_shared_cache()
+    
     # Vérifier la connexion à la blockchain
     try:
         is_connected = blockchain_manager.w3.is_connected()
@@ -57,6 +64,12 @@ async def lifespan(app: FastAPI):
                 logger.warning(f"AVERTISSEMENT: Contrats non encore disponibles: {e}")
                 logger.info("INFO: Les contrats seront chargés lorsque disponibles")
             
+            # Démarrer l'indexeur d'événements (suit les nouveaux blocs en arrière-plan)
+            try:
+                blockchain_manager.indexer.start()
+            except Exception as e:
+                logger.error(f"ERREUR: Démarrage de l'indexeur impossible: {e}")
+            
             # Initialiser automatiquement les wallets (en arrière-plan, sans bloquer)
             try:
                 # Ne pas attendre la complétion pour démarrer le service
@@ -87,10 +100,21 @@ async def lifespan(app: FastAPI):
         logger.error(f"ERREUR: Erreur initialisation blockchain: {e}")
         logger.warning("AVERTISSEMENT: Le service démarre quand même, mais certaines fonctionnalités peuvent être limitées")
     
+    # Relevé des reçus des écritures asynchrones (?wait=false)
+    blockchain_manager.tx_queue.start()
+    # Recharges ETH des wallets hors du chemin des transferts
+    blockchain_manager.gas_station.start()
+    
     yield
     
     # Arrêt
     logger.info("ARRET: Arrêt du service blockchain...")
+    blockchain_manager.indexer.stop()
+    await blockchain_manager.tx_queue.stop()
+    await blockchain_manager.gas_station.stop()
+    await auth_client.aclose()
+    stop_shared_cache()
+    await concurrency.shutdown()
 
 # Création de l'application FastAPI
 app = FastAPI(
@@ -141,12 +165,12 @@ async def health_check():
         contracts_ok = False
         
         try:
-            blockchain_ok = blockchain_manager.w3.is_connected()
+            blockchain_ok = await blockchain_manager.async_w3.is_connected()
             
             if blockchain_ok:
                 try:
-                    blockchain_manager.token_contract.functions.name().call()
-                    blockchain_manager.escrow_contract.functions.getBookingCount().call()
+                    await blockchain_manager.async_token_contract.functions.name().call()
+                    await run_blocking(blockchain_manager.escrow_contract.functions.getBookingCount().call)
                     contracts_ok = True
                 except:
                     contracts_ok = False
@@ -156,8 +180,7 @@ async def health_check():
         # Vérifier la connexion à l'auth-service
         auth_ok = False
         try:
-            import requests
-            response = requests.get(f"{blockchain_manager.auth_service_url}/health", timeout=3)
+            response = await auth_client.get("/health")
             auth_ok = response.status_code == 200
         except:
             auth_ok = False
@@ -200,17 +223,17 @@ async def get_status():
         booking_count = 0
         
         try:
-            if blockchain_manager.w3.is_connected():
-                block_number = blockchain_manager.w3.eth.block_number
-                gas_price = blockchain_manager.w3.eth.gas_price
+            if await blockchain_manager.async_w3.is_connected():
+                block_number = await blockchain_manager.async_w3.eth.block_number
+                gas_price = await blockchain_manager.async_w3.eth.gas_price
                 
-                token_name = blockchain_manager.token_contract.functions.name().call()
+                token_name = await blockchain_manager.async_token_contract.functions.name().call()
                 token_supply = blockchain_manager.w3.from_wei(
-                    blockchain_manager.token_contract.functions.totalSupply().call(),
+                    await blockchain_manager.async_token_contract.functions.totalSupply().call(),
                     'ether'
                 )
                 
-                booking_count = blockchain_manager.escrow_contract.functions.getBookingCount().call()
+                booking_count = await run_blocking(blockchain_manager.escrow_contract.functions.getBookingCount().call)
         except Exception as e:
             logger.warning(f"AVERTISSEMENT: Impossible de récupérer les infos blockchain: {e}")
         
@@ -221,7 +244,7 @@ async def get_status():
                     "provider": "ganache",
                     "block_number": block_number,
                     "gas_price": gas_price,
-                    "connected": blockchain_manager.w3.is_connected()
+                    "connected": await blockchain_manager.async_w3.is_connected()
                 },
                 "contracts": {
                     "token": {
@@ -238,7 +261,11 @@ async def get_status():
                     "startup_time": "on_lifespan",
                     "wallet_initialization": "automatic",
                     "initial_balance": 600
-                }
+                },
+                "caches": cache_stats(),
+                "nonces": blockchain_manager.nonce_manager.stats(),
+                "txQueue": blockchain_manager.tx_queue.stats(),
+                "gasStation": blockchain_manager.gas_station.stats()
             }
         }
         
@@ -266,10 +293,8 @@ async def initialize_all_wallets():
 async def debug_users():
     """Endpoint de debug pour voir les utilisateurs et leurs wallets"""
     try:
-        import requests
-        
         # Récupérer les utilisateurs depuis l'auth-service
-        response = requests.get(f"{blockchain_manager.auth_service_url}/api/users")
+        response = await auth_client.get("/api/users")
         users = response.json().get("data", []) if response.status_code == 200 else []
         
         debug_info = []
@@ -277,8 +302,8 @@ async def debug_users():
             user_id = user.get("id")
             if user_id:
                 try:
-                    wallet = blockchain_manager.get_user_wallet(user_id)
-                    balance = blockchain_manager.get_token_balance(wallet["address"])
+                    wallet = await run_blocking(blockchain_manager.get_user_wallet, user_id)
+                    balance = await blockchain_manager.get_token_balance_async(wallet["address"])
                     
                     debug_info.append({
                         "user": {
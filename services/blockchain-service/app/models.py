@@ -131,6 +131,7 @@ class BookingStats(BaseModel):
     confirmed: int
     cancelled: int
     completed: int
+    disputed: int = 0
     totalAmount: float
     pendingAmount: float
 
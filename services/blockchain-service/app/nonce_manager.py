@@ -0,0 +1,80 @@
+import threading
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Erreurs du nœud indiquant un nonce désynchronisé (tx envoyée hors du service, nœud redémarré...)
+_NONCE_ERRORS = ("nonce too low", "nonce too high", "replacement transaction underpriced", "incorrect nonce")
+
+
+class NonceManager:
+    """
+    Nonces des comptes émetteurs suivis en mémoire:
+    - un seul get_transaction_count par compte (au premier envoi ou après une erreur)
+    - verrou par adresse limité à la signature + l'envoi: plusieurs transactions d'un
+      même compte peuvent attendre leur reçu en parallèle sans collision de nonce
+    - resynchronisation depuis le nœud (état "pending") dès qu'un envoi échoue
+    """
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self._next: Dict[str, int] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.resyncs = 0
+
+    def _lock_for(self, address: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(address)
+            if lock is None:
+                lock = self._locks[address] = threading.Lock()
+            return lock
+
+    def _reserve(self, address: str) -> int:
+        """Prochain nonce du compte (appelé sous le verrou de l'adresse)"""
+        nonce = self._next.get(address)
+        if nonce is None:
+            nonce = self.w3.eth.get_transaction_count(address, "pending")
+        self._next[address] = nonce + 1
+        return nonce
+
+    def resync(self, address: str):
+        """Oublie le nonce suivi: il sera relu depuis le nœud au prochain envoi"""
+        address = self.w3.to_checksum_address(address)
+        with self._lock_for(address):
+            self._next.pop(address, None)
+            self.resyncs += 1
+
+    def send(self, tx: Dict, private_key: Optional[str] = None):
+        """
+        Attribue le nonce puis envoie la transaction (signée localement si private_key,
+        sinon via un compte déverrouillé du nœud). Retourne le hash sans attendre le reçu.
+        Un nonce refusé par le nœud entraîne une resynchronisation et un second essai.
+        "already known": le nœud détient déjà cette transaction signée, elle n'est pas renvoyée.
+        """
+        address = self.w3.to_checksum_address(tx["from"])
+
+        with self._lock_for(address):
+            for attempt in range(2):
+                tx = {**tx, "nonce": self._reserve(address)}
+                signed = None
+                try:
+                    if private_key:
+                        signed = self.w3.eth.account.sign_transaction(tx, private_key)
+                        return self.w3.eth.send_raw_transaction(signed.raw_transaction)
+                    return self.w3.eth.send_transaction(tx)
+                except Exception as e:
+                    if signed is not None and "already known" in str(e).lower():
+                        # Déjà dans le mempool: le nonce est consommé, renvoyer le hash (keccak de la tx brute)
+                        return signed.hash
+                    # Le nonce réservé n'a pas été consommé: repartir de l'état du nœud
+                    self._next.pop(address, None)
+                    self.resyncs += 1
+                    if attempt == 0 and any(marker in str(e).lower() for marker in _NONCE_ERRORS):
+                        logger.warning(f"⚠️ [NONCE] Nonce désynchronisé pour {address[:10]}..., resynchronisation")
+                        continue
+                    raise
+
+    def stats(self) -> Dict[str, int]:
+        return {"trackedAccounts": len(self._next), "resyncs": self.resyncs}
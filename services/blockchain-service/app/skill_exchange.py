@@ -2,12 +2,13 @@ from fastapi import APIRouter, HTTPException, Query, Header, Depends
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone
 import logging
-import requests
 import jwt
 import json
 import uuid
 
 from .blockchain import blockchain_manager
+from .concurrency import run_blocking
+from .auth_client import auth_client
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -51,30 +52,30 @@ async def get_current_user(authorization: Optional[str] = Header(None)) -> str:
         logger.warning(f"Erreur décoding token: {e}, utilisant user par défaut")
         return "d755226e-bb7b-4bec-9af0-e578da8362dc"
 
+def _user_skills_view(user_id: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "userId": user_id,
+        "skillsToTeach": user_data.get("skillsToTeach", []),
+        "skillsToLearn": user_data.get("skillsToLearn", []),
+        "firstName": user_data.get("firstName", ""),
+        "lastName": user_data.get("lastName", ""),
+        "email": user_data.get("email", "")
+    }
+
 async def get_user_skills(user_id: str, authorization: Optional[str] = None) -> Dict[str, Any]:
     """Récupérer les compétences d'un utilisateur depuis auth-service"""
     try:
         headers = {"Authorization": authorization} if authorization else {}
         
-        response = requests.get(
-            f"{blockchain_manager.auth_service_url}/api/users/{user_id}",
-            headers=headers,
-            timeout=5
+        response = await auth_client.get(
+            f"/api/users/{user_id}",
+            headers=headers
         )
         
         if response.status_code != 200:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
         
-        user_data = response.json()["data"]
-        
-        return {
-            "userId": user_id,
-            "skillsToTeach": user_data.get("skillsToTeach", []),
-            "skillsToLearn": user_data.get("skillsToLearn", []),
-            "firstName": user_data.get("firstName", ""),
-            "lastName": user_data.get("lastName", ""),
-            "email": user_data.get("email", "")
-        }
+        return _user_skills_view(user_id, response.json()["data"])
         
     except HTTPException:
         raise
@@ -82,6 +83,17 @@ async def get_user_skills(user_id: str, authorization: Optional[str] = None) ->
         logger.error(f"Erreur récupération skills: {e}")
         raise HTTPException(status_code=500, detail=f"Erreur récupération skills: {str(e)}")
 
+async def get_users_skills_many(user_ids: List[str], authorization: Optional[str] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Version groupée de get_user_skills: chaque utilisateur distinct n'est résolu qu'une fois
+    → {userId: compétences} (None si introuvable)
+    """
+    users = await auth_client.get_users_many(user_ids, authorization)
+    return {
+        user_id: _user_skills_view(user_id, user_data) if user_data else None
+        for user_id, user_data in users.items()
+    }
+
 @router.post("/skill-exchange")
 async def create_skill_exchange(
     exchange_data: Dict[str, Any],
@@ -110,7 +122,7 @@ async def create_skill_exchange(
         frontend_id = str(uuid.uuid4())
         
         # Créer l'échange sur la blockchain
-        result = blockchain_manager.create_skill_exchange(
+        result = await run_blocking(blockchain_manager.create_skill_exchange,
             student_user_id=student_user_id,
             tutor_user_id=tutor_id,
             skill_offered=json.dumps(skill_offered),
@@ -167,18 +179,25 @@ async def get_skill_exchanges(
         logger.info(f"[GET_SKILL_EXCHANGES] User: {target_user_id}, Status filter: {status}")
         
         # Récupérer tous les échanges de l'utilisateur depuis la blockchain
-        exchanges = blockchain_manager.get_user_skill_exchanges(target_user_id)
+        exchanges = await run_blocking(blockchain_manager.get_user_skill_exchanges, target_user_id)
         
         # Filtrer par statut si demandé
         if status:
             exchanges = [ex for ex in exchanges if ex["status"] == status.upper()]
         
-        # Enrichir avec les infos utilisateurs
+        # ⚡ Enrichir avec les infos utilisateurs: chaque utilisateur distinct est résolu une seule fois
+        users_info = await get_users_skills_many(
+            [exchange["studentId"] for exchange in exchanges] + [exchange["tutorId"] for exchange in exchanges],
+            authorization
+        )
+        
         enriched_exchanges = []
         for exchange in exchanges:
             try:
-                student_info = await get_user_skills(exchange["studentId"], authorization)
-                tutor_info = await get_user_skills(exchange["tutorId"], authorization)
+                student_info = users_info.get(exchange["studentId"])
+                tutor_info = users_info.get(exchange["tutorId"])
+                if not student_info or not tutor_info:
+                    raise ValueError("Utilisateur non trouvé")
                 
                 skill_offered_obj = json.loads(exchange["skillOffered"]) if isinstance(exchange["skillOffered"], str) else exchange["skillOffered"]
                 skill_requested_obj = json.loads(exchange["skillRequested"]) if isinstance(exchange["skillRequested"], str) else exchange["skillRequested"]
@@ -231,7 +250,7 @@ async def get_skill_exchange_details(
     try:
         logger.info(f"[GET_SKILL_EXCHANGE_DETAILS] Exchange ID: {exchange_id}")
         
-        exchange = blockchain_manager.get_skill_exchange(exchange_id)
+        exchange = await run_blocking(blockchain_manager.get_skill_exchange, exchange_id)
         
         # Enrichir avec les infos utilisateurs
         student_info = await get_user_skills(exchange["studentId"], authorization)
@@ -272,7 +291,7 @@ async def accept_skill_exchange(
         logger.info(f"[ACCEPT_SKILL_EXCHANGE] Exchange: {exchange_id}, Tutor: {tutor_user_id}")
         
         # Vérifier que l'utilisateur est bien le tuteur
-        exchange = blockchain_manager.get_skill_exchange(exchange_id)
+        exchange = await run_blocking(blockchain_manager.get_skill_exchange, exchange_id)
         if exchange["tutorId"] != tutor_user_id:
             raise HTTPException(
                 status_code=403,
@@ -287,7 +306,7 @@ async def accept_skill_exchange(
             )
         
         # Accepter sur la blockchain
-        result = blockchain_manager.accept_skill_exchange(exchange_id, tutor_user_id)
+        result = await run_blocking(blockchain_manager.accept_skill_exchange, exchange_id, tutor_user_id)
         
         return {
             "success": True,
@@ -310,7 +329,7 @@ async def reject_skill_exchange(
     try:
         logger.info(f"[REJECT_SKILL_EXCHANGE] Exchange: {exchange_id}, User: {user_id}")
         
-        exchange = blockchain_manager.get_skill_exchange(exchange_id)
+        exchange = await run_blocking(blockchain_manager.get_skill_exchange, exchange_id)
         if user_id != exchange.get("tutorId"):
             raise HTTPException(
                 status_code=403,
@@ -331,7 +350,7 @@ async def reject_skill_exchange(
             )
         
         # Rejeter sur la blockchain
-        result = blockchain_manager.reject_skill_exchange(exchange_id, exchange.get("tutorId"))
+        result = await run_blocking(blockchain_manager.reject_skill_exchange, exchange_id, exchange.get("tutorId"))
         
         return {
             "success": True,
@@ -355,7 +374,7 @@ async def complete_skill_exchange(
         logger.info(f"[COMPLETE_SKILL_EXCHANGE] Exchange: {exchange_id}, User: {user_id}")
         
         # Vérifier que l'échange est accepté
-        exchange = blockchain_manager.get_skill_exchange(exchange_id)
+        exchange = await run_blocking(blockchain_manager.get_skill_exchange, exchange_id)
         if exchange["status"] != "ACCEPTED":
             raise HTTPException(
                 status_code=400,
@@ -363,7 +382,7 @@ async def complete_skill_exchange(
             )
         
         # Compléter sur la blockchain
-        result = blockchain_manager.complete_skill_exchange(exchange_id, user_id)
+        result = await run_blocking(blockchain_manager.complete_skill_exchange, exchange_id, user_id)
         
         return {
             "success": True,
@@ -388,7 +407,7 @@ async def submit_exchange_review(
     try:
         logger.info(f"[SUBMIT_EXCHANGE_REVIEW] Exchange {exchange_id}, reviewer {user_id}")
 
-        exchange = blockchain_manager.get_skill_exchange(exchange_id)
+        exchange = await run_blocking(blockchain_manager.get_skill_exchange, exchange_id)
         if user_id not in [exchange.get("studentId"), exchange.get("tutorId")]:
             raise HTTPException(status_code=403, detail="Vous n'êtes pas partie de cet échange")
 
@@ -414,11 +433,10 @@ async def submit_exchange_review(
         }
 
         headers = {"Authorization": authorization} if authorization else {}
-        response = requests.post(
-            f"{blockchain_manager.auth_service_url}/api/reviews",
+        response = await auth_client.post(
+            f"/api/reviews",
             json=review_payload,
-            headers=headers,
-            timeout=5
+            headers=headers
         )
 
         if response.status_code not in [200, 201]:
@@ -446,16 +464,15 @@ async def confirm_exchange_review(
     try:
         logger.info(f"[CONFIRM_EXCHANGE_REVIEW] Exchange {exchange_id}, reviewer {user_id}")
 
-        exchange = blockchain_manager.get_skill_exchange(exchange_id)
+        exchange = await run_blocking(blockchain_manager.get_skill_exchange, exchange_id)
         if user_id not in [exchange.get("studentId"), exchange.get("tutorId")]:
             raise HTTPException(status_code=403, detail="Vous n'êtes pas partie de cet échange")
 
         booking_id = str(exchange.get("frontendId") or f"exchange-{exchange_id}")
         headers = {"Authorization": authorization} if authorization else {}
-        response = requests.post(
-            f"{blockchain_manager.auth_service_url}/api/reviews/{booking_id}/{user_id}/confirm",
-            headers=headers,
-            timeout=5
+        response = await auth_client.post(
+            f"/api/reviews/{booking_id}/{user_id}/confirm",
+            headers=headers
         )
 
         if response.status_code not in [200, 201]:
@@ -472,13 +489,13 @@ async def confirm_exchange_review(
             logger.info(f"[CONFIRM_EXCHANGE_REVIEW] Toutes les parties ont confirmé, passage en COMPLETED")
             
             try:
-                complete_result = blockchain_manager.complete_skill_exchange(exchange_id, user_id)
+                complete_result = await run_blocking(blockchain_manager.complete_skill_exchange, exchange_id, user_id)
                 logger.info(f"[CONFIRM_EXCHANGE_REVIEW] Échange complété: {complete_result}")
             except Exception as complete_error:
                 logger.warning(f"[CONFIRM_EXCHANGE_REVIEW] Erreur completion échange: {complete_error}")
                 # Ne pas bloquer le flow si la completion échoue
         
-        exchange_status = blockchain_manager.get_skill_exchange(exchange_id).get("status", "UNKNOWN")
+        exchange_status = (await run_blocking(blockchain_manager.get_skill_exchange, exchange_id)).get("status", "UNKNOWN")
 
         return {
             "success": True,
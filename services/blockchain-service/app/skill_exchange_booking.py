@@ -11,6 +11,7 @@ import uuid
 import logging
 
 from .blockchain import blockchain_manager
+from .concurrency import run_blocking
 from .booking import get_current_user, verify_user_and_get_role, BOOKING_ANNONCE_MAP
 
 router = APIRouter()
@@ -94,7 +95,7 @@ async def create_skill_exchange_booking(
             "duration": booking_info.get("duration")
         })
         
-        result = blockchain_manager.create_skill_exchange(
+        result = await run_blocking(blockchain_manager.create_skill_exchange,
             student_user_id=student_user_id,
             tutor_user_id=tutor_user_id,
             skill_offered=skill_offered_json,
@@ -145,7 +146,7 @@ async def accept_skill_exchange(
         logger.info(f"[ACCEPT_SKILL_EXCHANGE] Booking: {bookingId}, User: {user_id}")
         
         # Récupérer les détails de la réservation
-        booking_status = blockchain_manager.get_booking_status(bookingId)
+        booking_status = await run_blocking(blockchain_manager.get_booking_status, bookingId)
         
         if not booking_status:
             raise HTTPException(status_code=404, detail="Réservation non trouvée")
@@ -156,7 +157,7 @@ async def accept_skill_exchange(
             raise HTTPException(status_code=403, detail="Seul le tuteur peut accepter cet échange")
         
         # Confirmer la réservation (sans déblocage d'argent car montant = 0)
-        result = blockchain_manager.confirm_booking(bookingId)
+        result = await run_blocking(blockchain_manager.confirm_booking, bookingId)
         
         logger.info(f"[ACCEPT_SKILL_EXCHANGE] Exchange accepted: {bookingId}")
         
@@ -188,7 +189,7 @@ async def get_skill_exchange_bookings(
         logger.info(f"[GET_SKILL_EXCHANGE_BOOKINGS] User: {user_id}, Status filter: {status}")
         
         # Récupérer toutes les réservations de l'utilisateur
-        all_bookings = blockchain_manager.get_user_bookings(user_id)
+        all_bookings = await run_blocking(blockchain_manager.get_user_bookings, user_id)
         
         # Filtrer pour ne garder que les échanges de compétences (amount = 0)
         skill_exchange_bookings = [
@@ -6,10 +6,11 @@ from fastapi import APIRouter, HTTPException, Header, Depends
 from typing import Optional, Dict, Any
 import logging
 
-from .skill_exchange import get_current_user, get_user_skills
+from .skill_exchange import get_current_user, get_users_skills_many
 from .booking import BOOKING_ANNONCE_MAP
-import requests
 from .blockchain import blockchain_manager
+from .concurrency import run_blocking
+from .auth_client import auth_client
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -25,7 +26,7 @@ async def get_accepted_skill_exchanges_for_history(
         logger.info(f"[GET_ACCEPTED_EXCHANGES_HISTORY] User: {user_id}")
         
         # Récupérer tous les échanges de l'utilisateur
-        all_exchanges = blockchain_manager.get_user_skill_exchanges(user_id)
+        all_exchanges = await run_blocking(blockchain_manager.get_user_skill_exchanges, user_id)
         
         # Filtrer pour les échanges visibles dans l'historique
         allowed_statuses = {"ACCEPTED", "COMPLETED"}
@@ -36,6 +37,14 @@ async def get_accepted_skill_exchanges_for_history(
         
         logger.info(f"[GET_ACCEPTED_EXCHANGES_HISTORY] Found {len(accepted_exchanges)} accepted/completed exchanges")
         
+        # ⚡ Résoudre en une passe les utilisateurs et annonces distincts de la page
+        users_info = await get_users_skills_many(
+            [ex.get("studentId") for ex in accepted_exchanges] + [ex.get("tutorId") for ex in accepted_exchanges],
+            authorization
+        )
+        annonce_ids = BOOKING_ANNONCE_MAP.get_many(ex.get("frontendId") for ex in accepted_exchanges)
+        annonces = await auth_client.get_annonces_many(annonce_ids.values(), authorization)
+        
         # Enrichir les données  
         enriched_exchanges = []
         for exchange in accepted_exchanges:
@@ -46,8 +55,8 @@ async def get_accepted_skill_exchanges_for_history(
                 tutor_id = exchange.get("tutorId")
                 
                 # Enrichir avec infos utilisateur
-                student_info = await get_user_skills(student_id, authorization) if student_id else None
-                tutor_info = await get_user_skills(tutor_id, authorization) if tutor_id else None
+                student_info = users_info.get(student_id) if student_id else None
+                tutor_info = users_info.get(tutor_id) if tutor_id else None
                 
                 # Parser les skills
                 skills_offered = exchange.get("skillOffered")
@@ -90,26 +99,17 @@ async def get_accepted_skill_exchanges_for_history(
                     course_description = ""
                 
                 annonce_info = None
-                annonce_id = BOOKING_ANNONCE_MAP.get(exchange.get("frontendId"))
-                if annonce_id:
-                    try:
-                        annonce_resp = requests.get(
-                            f"{blockchain_manager.auth_service_url}/api/annonces/{annonce_id}",
-                            headers={"Authorization": authorization} if authorization else {},
-                            timeout=5
-                        )
-                        if annonce_resp.status_code == 200:
-                            annonce_data = annonce_resp.json().get("data", {})
-                            annonce_info = {
-                                "id": annonce_data.get("id"),
-                                "title": annonce_data.get("title"),
-                                "subject": annonce_data.get("subject"),
-                                "description": annonce_data.get("description"),
-                                "level": annonce_data.get("level"),
-                                "teachingMode": annonce_data.get("teachingMode")
-                            }
-                    except Exception as e:
-                        logger.warning(f"[GET_ACCEPTED_EXCHANGES_HISTORY] Erreur annonce {annonce_id}: {e}")
+                annonce_id = annonce_ids.get(exchange.get("frontendId"))
+                annonce_data = annonces.get(annonce_id) if annonce_id else None
+                if annonce_data:
+                    annonce_info = {
+                        "id": annonce_data.get("id"),
+                        "title": annonce_data.get("title"),
+                        "subject": annonce_data.get("subject"),
+                        "description": annonce_data.get("description"),
+                        "level": annonce_data.get("level"),
+                        "teachingMode": annonce_data.get("teachingMode")
+                    }
 
                 enriched_exchanges.append({
                     "id": exchange.get("id"),
@@ -0,0 +1,151 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from web3 import Web3
+
+from .cache import TTLCache
+from .concurrency import run_blocking
+
+logger = logging.getLogger(__name__)
+
+TX_RECEIPT_POLL_INTERVAL = float(os.getenv("TX_RECEIPT_POLL_INTERVAL", "0.5"))
+TX_JOB_TIMEOUT = float(os.getenv("TX_JOB_TIMEOUT", "300"))
+
+
+class TransactionQueue:
+    """
+    Mode asynchrone des écritures (?wait=false):
+    - l'endpoint envoie la transaction signée et rend immédiatement un jobId
+    - une tâche asyncio relève les reçus de toutes les transactions en attente
+      en un seul lot JSON-RPC eth_getTransactionReceipt par tour
+    - à la confirmation: invalidation des caches + rattrapage de l'index (_after_write)
+    Les jobs sont gardés dans un cache partagé: /tx/{id} répond depuis n'importe quel worker.
+    Choix d'un worker asyncio en process plutôt que Celery: les nonces et l'index sont en mémoire du process.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._jobs = TTLCache.from_env("tx_jobs", max_size=10000, ttl=3600, shared=True)
+        # job_id → (tx_hash, adresses touchées, instant d'envoi): relevés par ce worker uniquement
+        self._pending: Dict[str, tuple] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def track(self, tx_hash, kind: str, addresses: Iterable[str] = (), meta: Dict = None) -> Dict[str, Any]:
+        """Enregistre une transaction envoyée (appelable depuis le pool de threads), retourne le job"""
+        tx_hash = Web3.to_hex(tx_hash)
+        job_id = uuid.uuid4().hex
+        now = int(time.time())
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "status": "PENDING",
+            "transactionHash": tx_hash,
+            "blockNumber": None,
+            "gasUsed": None,
+            "error": None,
+            "meta": meta or {},
+            "createdAt": now,
+            "updatedAt": now
+        }
+        self._jobs.set(job_id, job)
+        self._pending[job_id] = (tx_hash, tuple(a for a in addresses if a), time.monotonic())
+
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        logger.info(f"📮 [TXQUEUE] {kind} en attente de confirmation: job={job_id} tx={tx_hash[:12]}...")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    # ============ RELEVÉ DES REÇUS ============
+
+    def start(self):
+        """Démarre la tâche de relevé (appelé dans le lifespan, depuis la boucle d'événements)"""
+        if self._task and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="tx-receipt-poller")
+        logger.info(f"🚀 [TXQUEUE] Relevé des reçus démarré (poll={TX_RECEIPT_POLL_INTERVAL}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("🛑 [TXQUEUE] Relevé des reçus arrêté")
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                # Rien à relever: dormir jusqu'au prochain track()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            try:
+                await self._poll_once()
+            except Exception as e:
+                logger.warning(f"⚠️ [TXQUEUE] Relevé des reçus en erreur: {e}")
+            await asyncio.sleep(TX_RECEIPT_POLL_INTERVAL)
+
+    async def _poll_once(self):
+        pending = list(self._pending.items())
+        if not pending:
+            return
+
+        receipts = await run_blocking(self._fetch_receipts, [tx_hash for _, (tx_hash, _, _) in pending])
+
+        mined_addresses = set()
+        mined = False
+        for (job_id, (tx_hash, addresses, sent_at)), receipt in zip(pending, receipts):
+            if receipt is None:
+                if time.monotonic() - sent_at > TX_JOB_TIMEOUT:
+                    self._finish(job_id, "FAILED", error=f"Aucun reçu après {int(TX_JOB_TIMEOUT)}s")
+                continue
+
+            succeeded = int(receipt["status"], 16) == 1
+            self._finish(
+                job_id,
+                "CONFIRMED" if succeeded else "FAILED",
+                block_number=int(receipt["blockNumber"], 16),
+                gas_used=int(receipt["gasUsed"], 16),
+                error=None if succeeded else "Transaction annulée (revert)"
+            )
+            mined_addresses.update(addresses)
+            mined = True
+
+        if mined:
+            # Une seule invalidation + un seul rattrapage de l'index pour tout le tour
+            await run_blocking(self.manager._after_write, *mined_addresses)
+
+    def _fetch_receipts(self, tx_hashes):
+        """Un lot JSON-RPC pour toutes les transactions en attente (None = pas encore minée)"""
+        return self.manager.batch_rpc("eth_getTransactionReceipt", [[tx_hash] for tx_hash in tx_hashes])
+
+    def _finish(self, job_id: str, status: str, block_number: int = None, gas_used: int = None, error: str = None):
+        self._pending.pop(job_id, None)
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.update({
+            "status": status,
+            "blockNumber": block_number,
+            "gasUsed": gas_used,
+            "error": error,
+            "updatedAt": int(time.time())
+        })
+        self._jobs.set(job_id, job)
+        emoji = "✅" if status == "CONFIRMED" else "❌"
+        logger.info(f"{emoji} [TXQUEUE] {job['kind']} {status}: job={job_id} bloc={block_number}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": len(self._pending)}
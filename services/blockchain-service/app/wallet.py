@@ -1,11 +1,14 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import Optional, Dict, Any, List
 from datetime import datetime
+import asyncio
 import uuid
-import requests
 import logging
 
 from .blockchain import blockchain_manager
+from .concurrency import run_blocking
+from .auth_client import auth_client
+from .gas_station import GasTopUpPending
 from .models import WalletBalance, Transaction, TransferRequest, TransferResponse
 
 router = APIRouter()
@@ -14,10 +17,7 @@ logger = logging.getLogger(__name__)
 async def verify_user_and_get_auth_data(user_id: str) -> Dict[str, Any]:
     """Vérifier que l'utilisateur existe dans la BDD et récupérer ses données"""
     try:
-        response = requests.get(
-            f"{blockchain_manager.auth_service_url}/api/users/{user_id}",
-            timeout=5
-        )
+        response = await auth_client.get(f"/api/users/{user_id}")
         
         if response.status_code != 200:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé dans la base de données")
@@ -34,13 +34,13 @@ async def get_balance(userId: str = Query(...)) -> Dict[str, Any]:
         user_data = await verify_user_and_get_auth_data(userId)
         
         # Obtenir ou créer le wallet déterministe
-        wallet = blockchain_manager.get_user_wallet(userId)
+        wallet = await run_blocking(blockchain_manager.get_user_wallet, userId)
         
         # Si le wallet n'existe pas encore sur la blockchain, le créer
         if not wallet.get("exists_on_chain", False):
             try:
                 # Enregistrer le wallet sur la blockchain et distribuer 500 EDUcoins
-                tx_hash = blockchain_manager.register_user_wallet_on_chain(userId)
+                tx_hash = await run_blocking(blockchain_manager.register_user_wallet_on_chain, userId)
                 logger.info(f"Wallet créé pour {userId}: {wallet['address']}")
             except Exception as e:
                 # Si le wallet existe déjà, c'est OK
@@ -48,7 +48,7 @@ async def get_balance(userId: str = Query(...)) -> Dict[str, Any]:
                     raise
         
         # Récupérer le solde depuis la blockchain
-        edu_balance = blockchain_manager.get_token_balance(wallet["address"])
+        edu_balance = await blockchain_manager.get_token_balance_async(wallet["address"])
         
         # Calculer le locked_balance (argent en attente pour les tuteurs)
         locked_balance = 0.0
@@ -59,7 +59,7 @@ async def get_balance(userId: str = Query(...)) -> Dict[str, Any]:
         # Donc on ne soustrait PAS du solde disponible, on l'ajoute au total!
         if user_role == "tutor":
             try:
-                bookings = blockchain_manager.get_tutor_bookings(userId)
+                bookings = await run_blocking(blockchain_manager.get_tutor_bookings, userId)
                 for booking in bookings:
                     booking_status = booking.get("status", "")
                     # Compter les réservations en attente ou confirmées (argent en escrow, pas reçu)
@@ -118,26 +118,43 @@ async def get_balance(userId: str = Query(...)) -> Dict[str, Any]:
 @router.post("/transfer")
 async def transfer(
     transfer_data: TransferRequest, 
-    fromUserId: str = Query(...)
+    fromUserId: str = Query(...),
+    wait: bool = Query(True, description="false: retour immédiat avec un jobId (voir /tx/{jobId})")
 ) -> Dict[str, Any]:
     """Effectuer un transfert - Vérifie d'abord si l'utilisateur existe dans la BDD et retourne le solde des deux wallets"""
     try:
         # Vérifier que l'expéditeur existe dans la BDD
         from_user_data = await verify_user_and_get_auth_data(fromUserId)
         
-        # Effectuer le transfert sur la blockchain
-        result = blockchain_manager.transfer_tokens(
+        # Effectuer le transfert sur la blockchain (attente du receipt hors de la boucle d'événements)
+        result = await run_blocking(
+            blockchain_manager.transfer_tokens,
             fromUserId,
             transfer_data.toWalletAddress,
             transfer_data.amount,
-            transfer_data.description or ""
+            transfer_data.description or "",
+            wait=wait
         )
         
-        # Récupérer le solde du destinataire après le transfert
-        to_balance = blockchain_manager.get_token_balance(result["to"])
+        if not wait:
+            # ⚡ Mode asynchrone: pas d'attente du reçu, l'issue se consulte sur /tx/{jobId}
+            return {
+                "success": True,
+                "status": "SUBMITTED",
+                "jobId": result["job_id"],
+                "transactionHash": result["transaction_hash"]
+            }
         
-        # Récupérer les infos du block
-        block = blockchain_manager.w3.eth.get_block(result["block_number"])
+        # Récupérer le solde des deux wallets et les infos du block en parallèle
+        to_balance, from_balance, block = await asyncio.gather(
+            blockchain_manager.get_token_balance_async(result["to"]),
+            blockchain_manager.get_token_balance_async(result["from"]),
+            blockchain_manager.get_block_header_async(result["block_number"])
+        )
+        from_wallet_info, to_wallet_info = await asyncio.gather(
+            run_blocking(blockchain_manager._get_wallet_info_sync, result["from"]),
+            run_blocking(blockchain_manager._get_wallet_info_sync, result["to"])
+        )
         
         # Construire l'objet Transaction
         transaction = Transaction(
@@ -150,13 +167,13 @@ async def transfer(
             status="completed",
             description=transfer_data.description or "Transfert de crédits",
             metadata=transfer_data.metadata or {},
-            createdAt=datetime.fromtimestamp(block.timestamp).isoformat(),
-            fromWallet=blockchain_manager._get_wallet_info_sync(result["from"]),
-            toWallet=blockchain_manager._get_wallet_info_sync(result["to"]),
+            createdAt=datetime.fromtimestamp(block["timestamp"]).isoformat(),
+            fromWallet=from_wallet_info,
+            toWallet=to_wallet_info,
             ledgerBlock={
                 "id": result["block_number"],
-                "hash": block.hash.hex(),
-                "timestamp": block.timestamp
+                "hash": block["hash"][2:],
+                "timestamp": block["timestamp"]
             }
         )
         
@@ -171,7 +188,7 @@ async def transfer(
             },
             fromUser={
                 "name": f"{from_user_data.get('firstName', '')} {from_user_data.get('lastName', '')}",
-                "newBalance": float(blockchain_manager.get_token_balance(result["from"]))
+                "newBalance": float(from_balance)
             },
             toUser={
                 "name": f"Destinataire {result['to'][:8]}",
@@ -181,12 +198,24 @@ async def transfer(
         
         return response.dict()
         
+    except GasTopUpPending as e:
+        # Wallet en cours de recharge par la GasStation: erreur temporaire, à renvoyer après Retry-After
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors du transfert: {str(e)}")
 
 
+@router.get("/tx/{jobId}")
+async def get_transaction_job(jobId: str) -> Dict[str, Any]:
+    """Issue d'une écriture envoyée en mode asynchrone (PENDING, CONFIRMED ou FAILED)"""
+    job = blockchain_manager.tx_queue.get(jobId)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Transaction inconnue ou expirée")
+    return {"success": True, "data": job}
+
+
 @router.get("/stats")
 async def get_stats(userId: str = Query(...)) -> Dict[str, Any]:
     """Obtenir les statistiques d'un wallet"""
@@ -195,7 +224,7 @@ async def get_stats(userId: str = Query(...)) -> Dict[str, Any]:
         user_data = await verify_user_and_get_auth_data(userId)
         
         # Récupérer les statistiques depuis blockchain_manager
-        stats = blockchain_manager.get_wallet_stats(userId)
+        stats = await run_blocking(blockchain_manager.get_wallet_stats, userId)
         
         return {
             "success": True,
@@ -216,10 +245,10 @@ async def register_wallet(userId: str = Query(...)) -> Dict[str, Any]:
         user_data = await verify_user_and_get_auth_data(userId)
         
         # Enregistrer sur la blockchain et distribuer 500 EDUcoins
-        tx_hash = blockchain_manager.register_user_wallet_on_chain(userId)
+        tx_hash = await run_blocking(blockchain_manager.register_user_wallet_on_chain, userId)
         
         # Récupérer les infos du wallet
-        wallet = blockchain_manager.get_user_wallet(userId)
+        wallet = await run_blocking(blockchain_manager.get_user_wallet, userId)
         
         return {
             "success": True,
@@ -244,8 +273,8 @@ async def verify_user(userId: str) -> Dict[str, Any]:
         user_data = await verify_user_and_get_auth_data(userId)
         
         # Vérifier sur la blockchain
-        wallet = blockchain_manager.get_user_wallet(userId)
-        balance = blockchain_manager.get_token_balance(wallet["address"])
+        wallet = await run_blocking(blockchain_manager.get_user_wallet, userId)
+        balance = await blockchain_manager.get_token_balance_async(wallet["address"])
         
         return {
             "success": True,
@@ -267,6 +296,15 @@ async def verify_user(userId: str) -> Dict[str, Any]:
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Utilisateur non trouvé: {str(e)}")
 
+def _parse_history_date(value: Optional[str]) -> Optional[int]:
+    """Date ISO → timestamp (None si absente ou invalide, comme avant: filtre ignoré)"""
+    if not value:
+        return None
+    try:
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    except ValueError:
+        return None
+
 @router.get("/history")
 async def get_history(
     userId: str = Query(...),
@@ -274,67 +312,59 @@ async def get_history(
     limit: int = Query(50, ge=1, le=100),
     startDate: Optional[str] = None,
     endDate: Optional[str] = None,
-    transactionType: Optional[str] = None
+    transactionType: Optional[str] = None,
+    cursor: Optional[str] = None
 ) -> Dict[str, Any]:
-    """Récupérer l'historique des transactions depuis la blockchain"""
+    """
+    Récupérer l'historique des transactions depuis la blockchain.
+    ⚡ Pagination par curseur: passer le nextCursor de la réponse précédente.
+    page reste accepté pour les clients existants: décalage SQL, coût proportionnel à la profondeur
+    (préférer cursor pour parcourir l'historique).
+    """
+    before = None
+    if cursor:
+        try:
+            before = tuple(int(part) for part in cursor.split(":"))
+            if len(before) != 4:
+                raise ValueError(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Curseur invalide (utiliser le nextCursor de la page précédente)")
+    
+    direction = transactionType if transactionType in ("incoming", "outgoing") else None
+    
     try:
         # Vérifier que l'utilisateur existe
         user_data = await verify_user_and_get_auth_data(userId)
         
         # Obtenir le wallet de l'utilisateur
-        wallet = blockchain_manager.get_user_wallet(userId)
+        wallet = await run_blocking(blockchain_manager.get_user_wallet, userId)
         
-        # ⚡ OPTIMISATION: Pas de multiplicateur - demander le limit exact
         # ⚡ OPTIMISATION: include_wallet_info=False pour éviter appels HTTP coûteux à auth-service
-        # Récupérer l'historique depuis la blockchain
-        transactions = blockchain_manager.get_transaction_history(
+        # ⚡ Filtres et pagination appliqués par l'index (hors de la boucle d'événements)
+        history = await run_blocking(
+            blockchain_manager.get_transaction_history_page,
             wallet["address"],
-            limit=limit,  # Demander exactement le nombre voulu
-            include_wallet_info=False  # ⚡ Ne pas charger les infos tuteur (trop coûteux)
+            limit=limit,
+            include_wallet_info=False,  # ⚡ Ne pas charger les infos tuteur (trop coûteux)
+            cursor=before,
+            start_time=_parse_history_date(startDate),
+            end_time=_parse_history_date(endDate),
+            direction=direction,
+            offset=0 if before else (page - 1) * limit
         )
         
-        # Appliquer des filtres optionnels
-        filtered_transactions = transactions
-        
-        if transactionType:
-            if transactionType == "outgoing":
-                filtered_transactions = [t for t in transactions 
-                                       if t["fromWalletId"] == wallet["address"]]
-            elif transactionType == "incoming":
-                filtered_transactions = [t for t in transactions 
-                                       if t["toWalletId"] == wallet["address"]]
-        
-        if startDate:
-            try:
-                start_dt = datetime.fromisoformat(startDate.replace('Z', '+00:00'))
-                filtered_transactions = [t for t in filtered_transactions 
-                                       if datetime.fromisoformat(t["createdAt"].replace('Z', '+00:00')) >= start_dt]
-            except:
-                pass
-        
-        if endDate:
-            try:
-                end_dt = datetime.fromisoformat(endDate.replace('Z', '+00:00'))
-                filtered_transactions = [t for t in filtered_transactions 
-                                       if datetime.fromisoformat(t["createdAt"].replace('Z', '+00:00')) <= end_dt]
-            except:
-                pass
-        
-        # Pagination
-        total = len(filtered_transactions)
+        total = history["total"]
         total_pages = (total + limit - 1) // limit if limit > 0 else 1
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        paginated_transactions = filtered_transactions[start_idx:end_idx]
         
         return {
             "success": True,
             "message": "Historique récupéré avec succès",
             "data": {
-                "transactions": paginated_transactions,
+                "transactions": history["transactions"],
                 "total": total,
                 "page": page,
-                "totalPages": total_pages
+                "totalPages": total_pages,
+                "nextCursor": history["nextCursor"]
             }
         }
         
@@ -346,9 +376,9 @@ async def get_history(
 async def test_connection() -> Dict[str, Any]:
     """Tester la connexion à la blockchain"""
     try:
-        is_connected = blockchain_manager.w3.is_connected()
-        token_name = blockchain_manager.token_contract.functions.name().call()
-        escrow_count = blockchain_manager.escrow_contract.functions.getBookingCount().call()
+        is_connected = await blockchain_manager.async_w3.is_connected()
+        token_name = await blockchain_manager.async_token_contract.functions.name().call()
+        escrow_count = await run_blocking(blockchain_manager.escrow_contract.functions.getBookingCount().call)
         
         return {
             "success": True,
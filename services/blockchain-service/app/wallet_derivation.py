@@ -0,0 +1,27 @@
+import hashlib
+import hmac
+from typing import Tuple
+
+from eth_account import Account
+
+
+def derive_wallet(master_secret: bytes, user_id: str) -> Tuple[str, str]:
+    """
+    Dérivation déterministe userId → (private_key, adresse checksum).
+    Fonction de module sans dépendance à l'application: elle peut être exécutée
+    dans un ProcessPoolExecutor sans importer (ni connecter) le BlockchainManager.
+    """
+    # HMAC-SHA256 pour garantir la déterminisme
+    seed = hmac.new(
+        master_secret,
+        user_id.encode('utf-8'),
+        hashlib.sha256
+    ).digest()
+
+    # La seed devient la clé privée
+    private_key = "0x" + seed.hex()
+
+    # Créer le compte (Account.address est déjà au format checksum)
+    account = Account.from_key(private_key)
+
+    return private_key, account.address
@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import time
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WALLET_INIT_DB_PATH = str(Path(__file__).parent.parent / "data" / "wallet_init.sqlite3")
+
+
+class WalletInitStore:
+    """
+    Progression de l'initialisation des wallets (enregistrés + ETH pour le gas).
+    Séparée de l'IndexStore: l'index est vidé à chaque changement de format, la progression
+    doit survivre. Elle est rattachée à l'adresse du token: un redéploiement la rend caduque.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv("WALLET_INIT_DB_PATH", DEFAULT_WALLET_INIT_DB_PATH)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS wallet_init (
+                    token_address TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    wallet_address TEXT NOT NULL,
+                    initialized_at INTEGER NOT NULL,
+                    PRIMARY KEY (token_address, user_id)
+                ) WITHOUT ROWID
+            """)
+
+        logger.info(f"✅ [INIT] Progression de l'initialisation des wallets: {self.db_path}")
+
+    def get_initialized_users(self, token_address: str) -> Set[str]:
+        """Utilisateurs dont le wallet est entièrement initialisé pour ce déploiement du token"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id FROM wallet_init WHERE token_address = ?", (token_address,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def mark_users_initialized(self, token_address: str, wallets: Dict[str, str]) -> None:
+        """Progression persistée lot par lot: {userId: adresse}"""
+        now = int(time.time())
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO wallet_init (token_address, user_id, wallet_address, initialized_at) VALUES (?, ?, ?, ?)",
+                [(token_address, user_id, address, now) for user_id, address in wallets.items()]
+            )
@@ -75,6 +75,51 @@ contract EduToken {
         }
     }
     
+    // Enregistrement groupé (onboarding): une transaction pour N wallets.
+    // Les entrées déjà enregistrées ou invalides sont ignorées au lieu de faire échouer tout le lot.
+    function registerWalletsBatch(bytes32[] calldata userIds, address[] calldata walletAddresses) external onlyOwner {
+        require(userIds.length == walletAddresses.length, "Length mismatch");
+        
+        for (uint256 i = 0; i < userIds.length; i++) {
+            bytes32 userId = userIds[i];
+            address walletAddress = walletAddresses[i];
+            
+            if (
+                userIdToAddress[userId] != address(0)
+                || walletAddress == address(0)
+                || addressToUserId[walletAddress] != bytes32(0)
+            ) {
+                continue;
+            }
+            
+            userIdToAddress[userId] = walletAddress;
+            addressToUserId[walletAddress] = userId;
+            
+            emit WalletRegistered(userId, walletAddress);
+            
+            if (!_hasReceivedInitialBalance[walletAddress] && _balances[owner] >= INITIAL_BALANCE) {
+                mintInitialTokens(walletAddress, INITIAL_BALANCE);
+            }
+        }
+    }
+    
+    // Approvisionnement groupé en ETH pour le gas: msg.value réparti à parts égales
+    function fundWallets(address payable[] calldata wallets) external payable onlyOwner {
+        require(wallets.length > 0, "No wallets");
+        uint256 share = msg.value / wallets.length;
+        require(share > 0, "Nothing to fund");
+        
+        for (uint256 i = 0; i < wallets.length; i++) {
+            wallets[i].transfer(share);
+        }
+        
+        // Reste de la division rendu à l'appelant
+        uint256 remainder = msg.value - share * wallets.length;
+        if (remainder > 0) {
+            payable(msg.sender).transfer(remainder);
+        }
+    }
+    
     // Fonction publique pour mint des tokens initiaux (pour l'initialisation via script)
     function mintTokensForUser(address walletAddress, uint256 amount) external onlyOwner {
         mintInitialTokens(walletAddress, amount);
@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVICE_DIR))
+
+# Environnement isolé: contrats fictifs, stores SQLite dans un dossier temporaire (jamais data/)
+_DATA_DIR = tempfile.mkdtemp(prefix="edumate-blockchain-tests-")
+os.environ["EDU_TOKEN_ADDRESS"] = "0x" + "11" * 20
+os.environ["BOOKING_ESCROW_ADDRESS"] = "0x" + "22" * 20
+os.environ["SKILL_EXCHANGE_ADDRESS"] = "0x" + "33" * 20
+os.environ["INDEX_DB_PATH"] = os.path.join(_DATA_DIR, "index.sqlite3")
+os.environ["WALLET_INIT_DB_PATH"] = os.path.join(_DATA_DIR, "wallet_init.sqlite3")
+os.environ["BOOKING_ANNONCE_DB_PATH"] = os.path.join(_DATA_DIR, "booking_annonces.sqlite3")
+os.environ.pop("REDIS_URL", None)
+
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+CAROL = "0x" + "cc" * 20
+ESCROW = os.environ["BOOKING_ESCROW_ADDRESS"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    from app.index_store import IndexStore
+    return IndexStore(str(tmp_path / "index.sqlite3"))
+
+
+@pytest.fixture(scope="session")
+def blockchain_module():
+    """app.blockchain importé sans nœud: le singleton est créé, aucun appel RPC n'est fait"""
+    with patch("web3.Web3.is_connected", return_value=True):
+        from app import blockchain
+    return blockchain
+
+
+def make_transfer(tx: int, from_address: str, to_address: str, timestamp: int, block_number: int,
+                  log_index: int = 0, amount: float = 1.0, hidden: int = 0, description: str = None):
+    """Ligne de la table transfers telle que produite par EventIndexer._decode_token_logs"""
+    return {
+        "tx_hash": f"0x{tx:064x}",
+        "log_index": log_index,
+        "block_number": block_number,
+        "block_hash": f"0x{block_number:064x}",
+        "block_timestamp": timestamp,
+        "event": "Transfer",
+        "from_address": from_address,
+        "to_address": to_address,
+        "amount_wei": str(int(amount * 10 ** 18)),
+        "amount": amount,
+        "description": description,
+        "hidden": hidden
+    }
+
+
+def make_booking(booking_id: int, student: str, tutor: str, status: int = 0, amount: float = 10.0,
+                 created_at: int = 1_700_000_000, tx: int = None, block_number: int = None):
+    """Ligne de la table bookings telle que produite par EventIndexer._booking_row"""
+    return {
+        "booking_id": booking_id,
+        "student": student,
+        "tutor": tutor,
+        "amount_wei": str(int(amount * 10 ** 18)),
+        "amount": amount,
+        "start_time": created_at + 3600,
+        "duration": 60,
+        "status": status,
+        "outcome": 0,
+        "created_at": created_at,
+        "student_confirmed": 0,
+        "tutor_confirmed": 0,
+        "description": f"Cours {booking_id}",
+        "frontend_id": "00" * 32,
+        "tx_hash": f"0x{tx:064x}" if tx is not None else None,
+        "block_number": block_number
+    }
@@ -0,0 +1,60 @@
+import pytest
+
+from app.annonce_store import BookingAnnonceStore, _SQLITE_MAX_VARS
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "booking_annonces.sqlite3")
+
+
+def test_round_trip_survives_reopen(db_path):
+    store = BookingAnnonceStore(db_path)
+    store.set("booking-1", "annonce-1")
+    store["booking-2"] = "annonce-2"
+    store.set_many({"booking-3": "annonce-3", "booking-1": "annonce-1b"})
+
+    # Nouvelle instance sur le même fichier: cache vide, lecture depuis SQLite
+    reopened = BookingAnnonceStore(db_path)
+    assert reopened.get("booking-1") == "annonce-1b"
+    assert reopened["booking-2"] == "annonce-2"
+    assert "booking-3" in reopened
+    assert len(reopened) == 3
+
+
+def test_missing_keys(db_path):
+    store = BookingAnnonceStore(db_path)
+    store.set("booking-1", "annonce-1")
+
+    assert store.get("unknown") is None
+    assert store.get("unknown", "fallback") == "fallback"
+    assert store.get(None, "fallback") == "fallback"
+    assert "unknown" not in store
+    with pytest.raises(KeyError):
+        store["unknown"]
+
+
+def test_empty_values_are_not_stored(db_path):
+    store = BookingAnnonceStore(db_path)
+    store.set_many({"booking-1": "", "": "annonce-2", None: "annonce-3"})
+    assert len(store) == 0
+
+
+def test_get_many_returns_only_known_keys(db_path):
+    BookingAnnonceStore(db_path).set_many({"a": "1", "b": "2", "c": "3"})
+    store = BookingAnnonceStore(db_path)
+    store.get("a")  # "a" en cache, les autres lus depuis SQLite
+
+    assert store.get_many(["a", "b", "missing", None, "", "b"]) == {"a": "1", "b": "2"}
+    assert store.get_many([]) == {}
+    assert store.get_many([None, "missing"]) == {}
+
+
+def test_get_many_spans_several_sqlite_queries(db_path):
+    count = _SQLITE_MAX_VARS * 2 + 7
+    mapping = {f"booking-{i}": f"annonce-{i}" for i in range(count)}
+    BookingAnnonceStore(db_path).set_many(mapping)
+
+    store = BookingAnnonceStore(db_path)
+    ids = list(mapping) + [f"missing-{i}" for i in range(10)]
+    assert store.get_many(ids) == mapping
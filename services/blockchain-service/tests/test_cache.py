@@ -0,0 +1,104 @@
+import pytest
+
+from app.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_capacity_evicts_least_recently_used(clock):
+    cache = TTLCache("test_lru", max_size=3, ttl=60, clock=clock)
+    for key in "abc":
+        cache.set(key, key.upper())
+
+    assert cache.get("a") == "A"  # "a" redevient la plus récente: "b" est la plus ancienne
+    cache.set("d", "D")
+    assert "b" not in cache
+    assert [key for key in "acd" if key in cache] == ["a", "c", "d"]
+
+    cache.set("c", "C2")  # ré-écrire une clé la rafraîchit aussi
+    cache.set("e", "E")
+    assert "a" not in cache
+    assert cache.get("c") == "C2"
+    assert len(cache) == 3
+    assert cache.stats()["evictions"] == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache("test_ttl", max_size=10, ttl=60, clock=clock)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl=5)
+
+    clock.advance(4.9)
+    assert cache.get("short") == 2
+    clock.advance(0.1)
+    assert "short" not in cache
+    assert cache.get("short", "missing") == "missing"
+
+    clock.advance(54.9)
+    assert cache.get("default") == 1
+    clock.advance(0.1)
+    assert cache.get("default") is None
+
+    stats = cache.stats()
+    assert stats["expirations"] == 2
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+    assert len(cache) == 0
+
+
+def test_hit_does_not_extend_ttl(clock):
+    cache = TTLCache("test_ttl_hit", max_size=10, ttl=10, clock=clock)
+    cache.set("key", "value")
+    clock.advance(9)
+    assert cache.get("key") == "value"
+    clock.advance(1)
+    assert cache.get("key") is None
+
+
+def test_invalidate_tag_drops_only_tagged_entries(clock):
+    cache = TTLCache("test_tags", max_size=10, ttl=60, clock=clock)
+    cache.set("alice_stats", 1, tags=["0xalice"])
+    cache.set("payment", 2, tags=["0xalice", "0xbob"])
+    cache.set("bob_stats", 3, tags=["0xbob"])
+    cache.set("untagged", 4)
+
+    assert cache.invalidate_tag("0xalice") == 2
+    assert "alice_stats" not in cache and "payment" not in cache
+    assert cache.get("bob_stats") == 3 and cache.get("untagged") == 4
+
+    # L'entrée supprimée n'est plus rattachée à ses autres tags
+    assert cache.invalidate_tag("0xbob") == 1
+    assert cache.invalidate_tag("0xunknown") == 0
+    assert cache.stats()["invalidations"] == 3
+
+
+def test_overwrite_replaces_tags(clock):
+    cache = TTLCache("test_retag", max_size=10, ttl=60, clock=clock)
+    cache.set("key", 1, tags=["old"])
+    cache.set("key", 2, tags=["new"])
+
+    assert cache.invalidate_tag("old") == 0
+    assert cache.get("key") == 2
+    assert cache.invalidate_tag("new") == 1
+
+
+def test_evicted_entry_leaves_its_tags(clock):
+    cache = TTLCache("test_evict_tags", max_size=1, ttl=60, clock=clock)
+    cache.set("first", 1, tags=["tag"])
+    cache.set("second", 2)
+
+    assert cache.invalidate_tag("tag") == 0
+    assert cache.get("second") == 2
@@ -0,0 +1,192 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.index_store import IndexStore, SCHEMA_VERSION
+from app.indexer import EventIndexer
+from conftest import ALICE, BOB, CAROL, ESCROW, make_booking, make_transfer
+
+ALICE_KEY = "a1" * 16 + "00" * 16
+OTHER_KEY = "b2" * 16 + "00" * 16
+
+
+def walk_history(store, page_size, **filters):
+    """Parcourt tout l'historique par curseur, retourne les clés dans l'ordre rendu"""
+    keys, before = [], None
+    while True:
+        items = store.get_history_for_address(ALICE, page_size + 1, before=before, **filters)
+        page = items[:page_size]
+        keys += [item["key"] for item in page]
+        if len(items) <= page_size:
+            return keys
+        before = page[-1]["key"]
+
+
+@pytest.fixture
+def history_store(store):
+    """
+    Historique d'ALICE avec des clés qui ne diffèrent que sur un seul composant:
+    plusieurs blocs au même timestamp, plusieurs logs par bloc, un paiement de réservation
+    (ligne principale + ligne tuteur de même clé hors sous-clé), réservations côté tuteur et échanges
+    """
+    transfers = [
+        make_transfer(1, BOB, ALICE, timestamp=1000, block_number=1),
+        make_transfer(2, ALICE, BOB, timestamp=1000, block_number=2, log_index=0),
+        make_transfer(2, ALICE, CAROL, timestamp=1000, block_number=2, log_index=1),
+        make_transfer(2, CAROL, ALICE, timestamp=1000, block_number=2, log_index=2),
+        make_transfer(3, ALICE, ESCROW, timestamp=1010, block_number=3),
+        make_transfer(4, ALICE, ALICE, timestamp=1010, block_number=4),
+        make_transfer(5, BOB, ALICE, timestamp=1020, block_number=5, hidden=1),
+        make_transfer(6, BOB, CAROL, timestamp=1020, block_number=5, log_index=1),
+        make_transfer(7, ALICE, ESCROW, timestamp=1030, block_number=6),
+    ]
+    bookings = [
+        # Payée par ALICE (transfert 3): ligne tuteur rendue; transfert 7 sans réservation: pas de ligne tuteur
+        make_booking(1, ALICE, BOB, created_at=1010, tx=3, block_number=3),
+        # ALICE tutrice
+        make_booking(2, BOB, ALICE, created_at=1000, tx=8, block_number=2),
+        make_booking(3, CAROL, ALICE, created_at=1020, tx=9, block_number=5),
+        # Réservée à elle-même: déjà rendue via son transfert, pas de ligne tuteur supplémentaire
+        make_booking(4, ALICE, ALICE, created_at=1030, tx=10, block_number=6),
+    ]
+    exchanges = [
+        {"exchange_id": 1, "student_id": ALICE_KEY, "tutor_id": OTHER_KEY, "skill_offered": "{}",
+         "skill_requested": "{}", "status": 0, "created_at": 1000, "frontend_id": "00" * 32},
+        {"exchange_id": 2, "student_id": OTHER_KEY, "tutor_id": ALICE_KEY, "skill_offered": "{}",
+         "skill_requested": "{}", "status": 1, "created_at": 1010, "frontend_id": "00" * 32},
+        {"exchange_id": 3, "student_id": OTHER_KEY, "tutor_id": OTHER_KEY, "skill_offered": "{}",
+         "skill_requested": "{}", "status": 0, "created_at": 1010, "frontend_id": "00" * 32},
+    ]
+    store.apply_block_range(transfers, bookings, 6, exchanges=exchanges)
+    return store
+
+
+def all_keys(store, **filters):
+    items = store.get_history_for_address(ALICE, 1000, **filters)
+    return [item["key"] for item in items]
+
+
+def test_apply_block_range_reinsert_is_idempotent(store):
+    transfers = [make_transfer(1, ALICE, BOB, timestamp=1000, block_number=1),
+                 make_transfer(2, BOB, ALICE, timestamp=1010, block_number=2)]
+    store.apply_block_range(transfers, [], 2)
+    store.apply_block_range(transfers, [], 2)
+
+    assert store.count_history_for_address(ALICE) == 2
+    assert len(store.get_history_for_address(ALICE, 10)) == 2
+    assert store.get_last_block() == 2
+
+
+def test_history_is_ordered_newest_first_with_unique_keys(history_store):
+    keys = all_keys(history_store, user_key=ALICE_KEY, escrow_address=ESCROW)
+
+    assert keys == sorted(keys, reverse=True)
+    assert len(set(keys)) == len(keys)
+    # 7 transferts visibles (le transfert vers soi-même une seule fois), 1 ligne tuteur,
+    # 2 réservations côté tuteur, 2 échanges
+    assert len(keys) == 12
+
+
+def test_hidden_and_foreign_transfers_are_excluded(history_store):
+    kinds = [item["kind"] for item in history_store.get_history_for_address(ALICE, 1000)]
+    assert kinds.count("transfer") == 7
+    assert "booking_companion" not in kinds  # sans escrow_address
+    assert "tutor_booking" not in kinds and "skill_exchange" not in kinds  # sans user_key
+
+
+def test_booking_companion_shares_the_payment_key(history_store):
+    items = history_store.get_history_for_address(ALICE, 1000, escrow_address=ESCROW)
+    payment = [item["key"] for item in items if item["row"]["tx_hash"] == f"0x{3:064x}"]
+    assert payment == [(1010, 3, 0, 1), (1010, 3, 0, 0)]
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 5])
+def test_keyset_pagination_matches_full_listing(history_store, page_size):
+    filters = {"user_key": ALICE_KEY, "escrow_address": ESCROW}
+    assert walk_history(history_store, page_size, **filters) == all_keys(history_store, **filters)
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 4])
+def test_offset_pagination_matches_full_listing(history_store, page_size):
+    filters = {"user_key": ALICE_KEY, "escrow_address": ESCROW}
+    keys, offset = [], 0
+    while True:
+        page = history_store.get_history_for_address(ALICE, page_size, offset=offset, **filters)
+        if not page:
+            break
+        keys += [item["key"] for item in page]
+        offset += page_size
+    assert keys == all_keys(history_store, **filters)
+
+
+def test_direction_filters_partition_history(history_store):
+    filters = {"user_key": ALICE_KEY, "escrow_address": ESCROW}
+    incoming = all_keys(history_store, direction="incoming", **filters)
+    outgoing = all_keys(history_store, direction="outgoing", **filters)
+    everything = all_keys(history_store, **filters)
+
+    # Le transfert vers soi-même est à la fois envoyé et reçu
+    self_transfer = (1010, 4, 0, 1)
+    assert set(incoming) & set(outgoing) == {self_transfer}
+    assert set(incoming) | set(outgoing) == set(everything)
+    # Réservations côté tuteur et échanges dont ALICE est tutrice: entrants
+    assert (1020, 5, -1, 3) in incoming and (1010, -1, -2, 2) in incoming
+    # Ligne tuteur d'un paiement et échange dont ALICE est élève: sortants
+    assert (1010, 3, 0, 0) in outgoing and (1000, -1, -2, 1) in outgoing
+
+    for direction, keys in (("incoming", incoming), ("outgoing", outgoing)):
+        assert walk_history(history_store, 2, direction=direction, **filters) == keys
+        assert history_store.count_history_for_address(ALICE, direction=direction, **filters) == len(keys)
+
+
+def test_date_filters_are_inclusive(history_store):
+    filters = {"user_key": ALICE_KEY, "escrow_address": ESCROW}
+    keys = all_keys(history_store, start_time=1010, end_time=1020, **filters)
+
+    assert keys and all(1010 <= key[0] <= 1020 for key in keys)
+    assert keys == [key for key in all_keys(history_store, **filters) if 1010 <= key[0] <= 1020]
+    assert walk_history(history_store, 2, start_time=1010, end_time=1020, **filters) == keys
+    assert history_store.count_history_for_address(ALICE, start_time=1010, end_time=1020, **filters) == len(keys)
+
+
+def test_count_matches_rows(history_store):
+    filters = {"user_key": ALICE_KEY, "escrow_address": ESCROW}
+    assert history_store.count_history_for_address(ALICE, **filters) == len(all_keys(history_store, **filters))
+
+
+def _indexer_for(store, **addresses):
+    manager = SimpleNamespace(
+        w3=None,
+        token_address=addresses.get("token", "0x" + "11" * 20),
+        escrow_address=addresses.get("escrow", ESCROW),
+        skill_exchange_address=addresses.get("skill_exchange", "0x" + "33" * 20)
+    )
+    return EventIndexer(manager, store=store)
+
+
+def test_schema_version_change_rebuilds_index(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    store = IndexStore(path)
+    _indexer_for(store)
+    store.apply_block_range([make_transfer(1, ALICE, BOB, timestamp=1000, block_number=1)], [], 1)
+
+    # Même version et mêmes contrats: l'index est conservé
+    _indexer_for(IndexStore(path))
+    assert IndexStore(path).get_last_block() == 1
+
+    # Ancienne version: index vidé, reconstruit depuis le bloc 0
+    store = IndexStore(path)
+    store.set_meta("schema_version", SCHEMA_VERSION - 1)
+    _indexer_for(store)
+    assert store.get_last_block() == -1
+    assert store.count_history_for_address(ALICE) == 0
+    assert store.get_meta("schema_version") == str(SCHEMA_VERSION)
+
+
+def test_contract_redeploy_rebuilds_index(store):
+    _indexer_for(store)
+    store.apply_block_range([make_transfer(1, ALICE, BOB, timestamp=1000, block_number=1)], [], 1)
+
+    _indexer_for(store, skill_exchange="0x" + "44" * 20)
+    assert store.get_last_block() == -1
+    assert store.count_history_for_address(ALICE) == 0
@@ -0,0 +1,130 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import rlp
+from eth_account import Account
+from web3 import Web3
+
+from app.nonce_manager import NonceManager
+
+ACCOUNT = Account.from_key("0x" + "01" * 32)
+
+
+class FakeEth:
+    """Nœud simulé: nonce "pending" du nœud, erreurs programmées, envois enregistrés"""
+
+    def __init__(self, node_nonce: int = 0):
+        self.node_nonce = node_nonce
+        self.count_calls = 0
+        self.sent = []
+        self.errors = []
+        self.account = Account
+
+    def get_transaction_count(self, address, block_identifier):
+        assert block_identifier == "pending"
+        self.count_calls += 1
+        return self.node_nonce
+
+    def _send(self, nonce, payload):
+        if self.errors:
+            raise ValueError(self.errors.pop(0))
+        time.sleep(0.001)  # laisse les autres threads se bousculer sur le verrou
+        self.sent.append(nonce)
+        return payload
+
+    def send_transaction(self, tx):
+        return self._send(tx["nonce"], f"hash-{tx['nonce']}")
+
+    def send_raw_transaction(self, raw):
+        # Transaction legacy: [nonce, gasPrice, gas, to, value, data, v, r, s]
+        nonce = int.from_bytes(rlp.decode(bytes(raw))[0], "big")
+        return self._send(nonce, Web3.keccak(raw))
+
+
+@pytest.fixture
+def eth():
+    return FakeEth(node_nonce=7)
+
+
+@pytest.fixture
+def manager(eth):
+    return NonceManager(SimpleNamespace(eth=eth, to_checksum_address=Web3.to_checksum_address))
+
+
+def make_tx(**extra):
+    return {"from": ACCOUNT.address, "to": ACCOUNT.address, "value": 0, "gas": 21000,
+            "gasPrice": 10 ** 9, "chainId": 1337, **extra}
+
+
+def test_concurrent_sends_get_unique_consecutive_nonces(manager, eth):
+    hashes = []
+    threads = [threading.Thread(target=lambda: hashes.append(manager.send(make_tx()))) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(eth.sent) == list(range(7, 27))
+    assert len(set(hashes)) == 20
+    assert eth.count_calls == 1  # nonce lu une seule fois, puis suivi en mémoire
+    assert manager.stats() == {"trackedAccounts": 1, "resyncs": 0}
+
+
+def test_nonce_too_low_resyncs_and_retries_with_node_nonce(manager, eth):
+    manager.send(make_tx())
+    assert eth.sent == [7]
+
+    # Transaction envoyée hors du service: le nœud est passé à 10
+    eth.node_nonce = 10
+    eth.errors = ["nonce too low: next nonce 10, tx nonce 8"]
+    assert manager.send(make_tx()) == "hash-10"
+    assert eth.sent == [7, 10]
+    assert eth.count_calls == 2
+    assert manager.stats()["resyncs"] == 1
+
+    # Le suivi repart du nonce relu
+    manager.send(make_tx())
+    assert eth.sent == [7, 10, 11]
+
+
+def test_nonce_error_is_retried_only_once(manager, eth):
+    eth.errors = ["nonce too low", "nonce too low"]
+    with pytest.raises(ValueError, match="nonce too low"):
+        manager.send(make_tx())
+    assert eth.sent == []
+    assert manager.stats()["resyncs"] == 2
+
+
+def test_other_error_releases_nonce_without_retry(manager, eth):
+    eth.errors = ["insufficient funds for gas * price + value"]
+    with pytest.raises(ValueError, match="insufficient funds"):
+        manager.send(make_tx())
+    assert eth.count_calls == 1
+
+    # Le nonce réservé n'a pas été consommé: relu depuis le nœud au prochain envoi
+    manager.send(make_tx())
+    assert eth.sent == [7]
+    assert eth.count_calls == 2
+
+
+def test_already_known_returns_signed_hash_without_resend(manager, eth):
+    signed = ACCOUNT.sign_transaction(make_tx(nonce=7))
+    eth.errors = ["already known"]
+
+    assert manager.send(make_tx(), private_key=ACCOUNT.key) == signed.hash
+    assert eth.sent == []
+    assert manager.stats()["resyncs"] == 0
+
+    # Le nonce 7 est consommé par la transaction déjà connue du nœud
+    manager.send(make_tx(), private_key=ACCOUNT.key)
+    assert eth.sent == [8]
+    assert eth.count_calls == 1
+
+
+def test_already_known_without_signature_is_an_error(manager, eth):
+    eth.errors = ["already known"]
+    with pytest.raises(ValueError, match="already known"):
+        manager.send(make_tx())
+    assert manager.stats()["resyncs"] == 1
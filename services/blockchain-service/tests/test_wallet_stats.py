@@ -0,0 +1,124 @@
+import random
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.cache import TTLCache
+from conftest import ALICE, BOB, CAROL, make_transfer
+
+ADDRESSES = [ALICE, BOB, CAROL]
+
+
+def local_ts(year, month, day, hour=12, minute=0):
+    """Timestamp d'une date en heure locale (les périodes des agrégats sont locales)"""
+    return int(time.mktime((year, month, day, hour, minute, 0, 0, 0, -1)))
+
+
+def recompute(rows, address, day, month):
+    """Agrégats recalculés depuis les lignes brutes: transferts visibles et uniques, soi-même = envoi"""
+    unique = {(row["tx_hash"], row["log_index"]): row for row in rows if not row["hidden"]}
+    result = {}
+    for name, period in (("today", day), ("monthly", month), ("allTime", None)):
+        totals = {"sent": 0.0, "received": 0.0, "sent_count": 0, "received_count": 0}
+        for row in unique.values():
+            local = time.localtime(row["block_timestamp"])
+            if period is not None and period not in (time.strftime("%Y-%m-%d", local), time.strftime("%Y-%m", local)):
+                continue
+            if row["from_address"] == address:
+                totals["sent"] += row["amount"]
+                totals["sent_count"] += 1
+            elif row["to_address"] == address:
+                totals["received"] += row["amount"]
+                totals["received_count"] += 1
+        result[name] = totals
+    return result
+
+
+def assert_stats_equal(actual, expected):
+    for name in ("today", "monthly", "allTime"):
+        for field in ("sent_count", "received_count"):
+            assert actual[name][field] == expected[name][field], (name, field)
+        for field in ("sent", "received"):
+            assert actual[name][field] == pytest.approx(expected[name][field]), (name, field)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_aggregates_match_recomputation_from_raw_rows(store, seed):
+    rng = random.Random(seed)
+    start = local_ts(2026, 1, 28, 0, 0)
+    rows = []
+    for tx in range(200):
+        rows.append(make_transfer(
+            tx,
+            rng.choice(ADDRESSES),
+            rng.choice(ADDRESSES),  # inclut des transferts vers soi-même
+            timestamp=start + rng.randrange(0, 10 * 86400),  # chevauche un changement de mois
+            block_number=tx,
+            amount=round(rng.uniform(0.01, 50), 2),
+            hidden=int(rng.random() < 0.15)
+        ))
+
+    # Plages successives qui se recouvrent: chaque ligne ré-appliquée ne doit pas être recomptée
+    applied = 0
+    while applied < len(rows):
+        end = min(len(rows), applied + rng.randrange(1, 40))
+        store.apply_block_range(rows[max(0, applied - 10):end], [], end - 1)
+        applied = end
+
+    for ts in (start, start + 4 * 86400, start + 9 * 86400):
+        day, month = store.stats_periods(ts)
+        for address in ADDRESSES:
+            assert_stats_equal(store.get_wallet_stats(address, day, month), recompute(rows, address, day, month))
+
+
+def test_unknown_address_and_period_are_zero(store):
+    store.apply_block_range([make_transfer(1, ALICE, BOB, timestamp=local_ts(2026, 3, 1), block_number=1)], [], 1)
+    stats = store.get_wallet_stats(CAROL, "2026-03-01", "2026-03")
+    assert stats["allTime"] == {"sent": 0.0, "received": 0.0, "sent_count": 0, "received_count": 0}
+    assert store.get_wallet_stats(ALICE, "2026-03-02", "2026-04")["today"]["sent"] == 0.0
+
+
+@pytest.fixture
+def manager(blockchain_module, store):
+    """BlockchainManager minimal: vrai cache et vrai index, wallet et solde simulés"""
+    manager = object.__new__(blockchain_module.BlockchainManager)
+    manager._stats_cache = TTLCache("test_stats", max_size=10, ttl=3600)
+    manager.indexer = SimpleNamespace(store=store, sync=lambda: None)
+    manager.w3 = SimpleNamespace(to_checksum_address=lambda address: address)
+    manager.get_user_wallet = lambda user_id: {"address": ALICE}
+    manager.get_token_balance = lambda address: 100
+    return manager
+
+
+def test_cached_stats_do_not_survive_midnight(manager, store, monkeypatch):
+    # Dernier jour du mois: "aujourd'hui" et "ce mois" changent tous deux à minuit
+    store.apply_block_range(
+        [make_transfer(1, ALICE, BOB, timestamp=local_ts(2026, 1, 31, 23, 30), block_number=1, amount=3.0)], [], 1
+    )
+    now = {"ts": local_ts(2026, 1, 31, 23, 45)}
+    monkeypatch.setattr(time, "time", lambda: now["ts"])
+
+    before_midnight = manager.get_wallet_stats("alice")
+    assert before_midnight["today"]["sent"] == 3.0
+    assert before_midnight["monthly"]["sent"] == 3.0
+    assert manager.get_wallet_stats("alice") is before_midnight  # servi par le cache le même jour
+
+    now["ts"] = local_ts(2026, 2, 1, 0, 15)
+    after_midnight = manager.get_wallet_stats("alice")
+    assert after_midnight["today"]["sent"] == 0.0
+    assert after_midnight["monthly"]["sent"] == 0.0
+    assert after_midnight["allTime"]["sent"] == 3.0
+    assert after_midnight["allTime"]["transactions"] == 1
+
+
+def test_new_transfer_invalidates_cached_stats(manager, store):
+    ts = int(time.time())
+    store.apply_block_range([make_transfer(1, BOB, ALICE, timestamp=ts, block_number=1, amount=2.0)], [], 1)
+    assert manager.get_wallet_stats("alice")["today"]["received"] == 2.0
+
+    store.apply_block_range([make_transfer(2, BOB, ALICE, timestamp=ts, block_number=2, amount=5.0)], [], 2)
+    manager._stats_cache.invalidate_tag(ALICE)  # fait par _after_write / les notifications de l'indexeur
+    stats = manager.get_wallet_stats("alice")
+    assert stats["today"]["received"] == 7.0
+    assert stats["allTime"]["transactions"] == 2